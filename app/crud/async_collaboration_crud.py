@@ -0,0 +1,347 @@
+import asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import SessionLocal
+from app.models.collaboration import CollaborationModel
+from app.schemas.collaboration_schemas import CollaborationCreate, CollaborationUpdate, SharedInventoryAgreement
+from app.crud import collaboration_crud
+from app.utils.collaboration_utils import DEFAULT_NEARBY_RADIUS_KM
+from app.utils.pagination import seller_scoped_select, seller_scoped_version_select, merge_versions, split_page, DEFAULT_PAGE_SIZE
+from app.utils.partnership_graph import partnership_graph
+from app.crud.seller_stats_crud import apply_stats_delta, collaboration_stats_delta, merge_stats_deltas
+from app.utils.rabbitmq import row_data
+from app.crud.outbox_crud import add_outbox_event
+from app.crud.expiry_crud import live_criteria, schedule_expiry, set_expiry, unschedule_expiry
+from app.crud.exclusivity_crud import check_exclusivity, get_exclusivity_index, index_collaboration, unindex_collaboration
+from app.crud.seller_crud import get_seller_knn_index
+from app.utils.exclusivity_index import exclusivity_index
+from app.utils.knn_index import seller_knn_index
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+# Async CRUD Operations for Collaboration (used when settings.USE_ASYNC_DATABASE is enabled)
+
+_index_load_lock = asyncio.Lock()
+
+
+def _load_with_sync_session(loader) -> None:
+    db = SessionLocal()
+    try:
+        loader(db)
+    finally:
+        db.close()
+
+
+async def ensure_index_loaded(index, loader) -> None:
+    """
+    Build an in-memory index in a worker thread, with its own sync session, unless it is
+    already loaded. The build scans whole tables and is CPU-bound; inside db.run_sync it
+    would run on the event loop thread and stall every other request meanwhile.
+
+    :param index: The index singleton, e.g. exclusivity_index.
+    :param loader: Its sync get_*_index(db) loader.
+    """
+    if index.loaded:
+        return
+    async with _index_load_lock:
+        if not index.loaded:
+            await asyncio.to_thread(_load_with_sync_session, loader)
+
+
+async def load_in_memory_indexes() -> None:
+    """
+    Build the in-memory indexes the async write and lookup paths use, e.g. at startup.
+    """
+    await ensure_index_loaded(exclusivity_index, get_exclusivity_index)
+    await ensure_index_loaded(seller_knn_index, get_seller_knn_index)
+
+
+async def create_collaboration(db: AsyncSession, collaboration: CollaborationCreate):
+    """
+    Create a new collaboration and persist it to the database.
+    Raises ExclusivityConflictError if it breaks the geographical exclusivity of another collaboration.
+
+    :param db: The async database session.
+    :param collaboration: CollaborationCreate schema containing collaboration details.
+    :return: The newly created collaboration.
+    """
+    await ensure_index_loaded(exclusivity_index, get_exclusivity_index)
+    locations = await db.run_sync(check_exclusivity, collaboration)
+    new_collaboration = CollaborationModel(**collaboration.dict())
+    set_expiry(new_collaboration)
+    db.add(new_collaboration)
+    await db.flush()  # Fills in column defaults the stats depend on
+    await db.run_sync(apply_stats_delta, collaboration_stats_delta(new_collaboration))
+    add_outbox_event(db, "collaboration", "created", row_data(new_collaboration))
+    await db.commit()
+    await db.refresh(new_collaboration)
+    partnership_graph.upsert(new_collaboration)
+    index_collaboration(new_collaboration, locations)
+    schedule_expiry(new_collaboration)
+    return new_collaboration
+
+
+async def create_collaborations_bulk(
+    db: AsyncSession, collaborations: List[CollaborationCreate], partial: bool = False
+) -> Tuple[List[CollaborationModel], Dict[int, str]]:
+    """
+    Create many collaborations in one transaction with multi-row INSERT ... RETURNING.
+    Runs the synchronous bulk insert on the async session's connection.
+    """
+    await ensure_index_loaded(exclusivity_index, get_exclusivity_index)
+    return await db.run_sync(collaboration_crud.create_collaborations_bulk, collaborations, partial)
+
+
+async def get_collaboration_by_id(db: AsyncSession, collaboration_id: int):
+    """
+    Retrieve a collaboration by its ID.
+
+    :param db: The async database session.
+    :param collaboration_id: ID of the collaboration to retrieve.
+    :return: The collaboration object if found, else None.
+    """
+    result = await db.execute(select(CollaborationModel).where(CollaborationModel.id == collaboration_id))
+    return result.scalar_one_or_none()
+
+
+async def get_collaboration_version(db: AsyncSession, collaboration_id: int):
+    """
+    Look up only the version columns of a collaboration, for conditional requests.
+
+    :param db: The async database session.
+    :param collaboration_id: ID of the collaboration.
+    :return: Row of (id, updated_at) if found, else None.
+    """
+    statement = select(CollaborationModel.id, CollaborationModel.updated_at).where(CollaborationModel.id == collaboration_id)
+    return (await db.execute(statement)).one_or_none()
+
+
+async def get_seller_collaborations_version(db: AsyncSession, seller_id: int) -> Tuple[int, Optional[datetime]]:
+    """
+    Cheap version of all collaborations of a seller (as seller or partner), for conditional
+    requests on the seller listings. See collaboration_crud.get_seller_collaborations_version.
+
+    :param db: The async database session.
+    :param seller_id: ID of the seller.
+    :return: Tuple of (number of collaborations, latest updated_at).
+    """
+    result = await db.execute(seller_scoped_version_select(CollaborationModel, seller_id))
+    return merge_versions(result.all())
+
+
+async def get_collaborations_by_seller(
+    db: AsyncSession, seller_id: int, limit: Optional[int] = None, after: Optional[int] = None, include_expired: bool = True
+):
+    """
+    Retrieve collaborations for a specific seller, one keyset page at a time.
+
+    :param db: The async database session.
+    :param seller_id: ID of the seller whose collaborations are to be retrieved.
+    :param limit: Maximum number of collaborations to return; None returns all of them.
+    :param after: Cursor returned with the previous page (ID of its last collaboration).
+    :param include_expired: Whether to include collaborations whose end date has passed.
+    :return: Tuple of (list of collaboration objects, next cursor or None on the last page).
+    """
+    result = await db.execute(seller_scoped_select(
+        CollaborationModel, seller_id, live_criteria(CollaborationModel, include_expired), limit, after
+    ))
+    return split_page(result.scalars().all(), limit)
+
+
+async def get_collaborations_by_type(
+    db: AsyncSession,
+    seller_id: int,
+    collaboration_type: str,
+    limit: Optional[int] = None,
+    after: Optional[int] = None,
+    include_expired: bool = True,
+) -> Tuple[List[CollaborationModel], Optional[int]]:
+    """
+    Retrieve collaborations for a specific seller based on collaboration type (B2B/B2C).
+
+    :param db: The async database session.
+    :param seller_id: ID of the seller.
+    :param collaboration_type: Type of collaboration to filter (B2B or B2C).
+    :param limit: Maximum number of collaborations to return; None returns all of them.
+    :param after: Cursor returned with the previous page (ID of its last collaboration).
+    :param include_expired: Whether to include collaborations whose end date has passed.
+    :return: Tuple of (collaborations matching the criteria, next cursor or None on the last page).
+    """
+    criteria = (
+        CollaborationModel.collaboration_type == collaboration_type,
+        *live_criteria(CollaborationModel, include_expired),
+    )
+    result = await db.execute(seller_scoped_select(CollaborationModel, seller_id, criteria, limit, after))
+    return split_page(result.scalars().all(), limit)
+
+
+async def search_collaborations(
+    db: AsyncSession,
+    seller_id: Optional[int] = None,
+    criteria=(),
+    sort: str = "id",
+    descending: bool = False,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+) -> Tuple[List[CollaborationModel], Optional[str]]:
+    """
+    Retrieve one page of collaborations matching all filters with a single SQL statement.
+    See collaboration_crud.build_collaboration_query for how the statement is composed.
+
+    :param db: The async database session.
+    :param seller_id: Only collaborations of this seller (as seller or partner); None searches all of them.
+    :param criteria: Filter expressions from collaboration_crud.collaboration_filter_criteria.
+    :param sort: One of collaboration_crud.COLLABORATION_SORT_KEYS.
+    :param descending: Sort in descending order.
+    :param limit: Page size.
+    :param cursor: The next_cursor returned with the previous page.
+    :return: Tuple of (collaborations, cursor of the next page or None on the last page).
+    """
+    after = collaboration_crud.parse_collaboration_cursor(cursor, sort)
+    result = await db.execute(collaboration_crud.build_collaboration_query(seller_id, criteria, sort, descending, limit, after))
+    rows, next_cursor = split_page(result.scalars().all(), limit)
+    return rows, collaboration_crud.collaboration_page_cursor(rows, next_cursor, sort)
+
+
+async def update_collaboration(db: AsyncSession, collaboration_id: int, collaboration: CollaborationUpdate):
+    """
+    Update an existing collaboration.
+
+    :param db: The async database session.
+    :param collaboration_id: ID of the collaboration to update.
+    :param collaboration: CollaborationUpdate schema containing updated details.
+    :return: The updated collaboration object if successful, else None.
+    """
+    db_collaboration = await get_collaboration_by_id(db, collaboration_id)
+    if not db_collaboration:
+        return None
+
+    updates = collaboration.dict(exclude_unset=True)
+    previous_stats = collaboration_stats_delta(db_collaboration, sign=-1)
+    for key, value in updates.items():
+        setattr(db_collaboration, key, value)
+    # Moving the end date is the only update that can extend the collaboration into another's exclusivity
+    locations = None
+    if "collaboration_end_date" in updates:
+        await ensure_index_loaded(exclusivity_index, get_exclusivity_index)
+        locations = await db.run_sync(check_exclusivity, db_collaboration, collaboration_id)
+    set_expiry(db_collaboration)
+    await db.run_sync(apply_stats_delta, merge_stats_deltas(previous_stats, collaboration_stats_delta(db_collaboration)))
+    await db.flush()  # Sets updated_at before the event is built
+    add_outbox_event(db, "collaboration", "updated", row_data(db_collaboration))
+
+    await db.commit()
+    await db.refresh(db_collaboration)
+    partnership_graph.upsert(db_collaboration)
+    if locations is not None:
+        index_collaboration(db_collaboration, locations)
+    schedule_expiry(db_collaboration)
+    return db_collaboration
+
+
+async def delete_collaboration(db: AsyncSession, collaboration_id: int):
+    """
+    Delete a collaboration by its ID.
+
+    :param db: The async database session.
+    :param collaboration_id: ID of the collaboration to delete.
+    :return: The deleted collaboration object if found and deleted, else None.
+    """
+    db_collaboration = await get_collaboration_by_id(db, collaboration_id)
+    if not db_collaboration:
+        return None
+
+    await db.run_sync(apply_stats_delta, collaboration_stats_delta(db_collaboration, sign=-1))
+    add_outbox_event(db, "collaboration", "deleted", row_data(db_collaboration))
+    await db.delete(db_collaboration)
+    await db.commit()
+    partnership_graph.remove(collaboration_id)
+    unindex_collaboration(collaboration_id)
+    unschedule_expiry(db_collaboration)
+    return db_collaboration
+
+
+async def create_shared_inventory_agreement(db: AsyncSession, collaboration_id: int, agreement: SharedInventoryAgreement):
+    """
+    Create a shared inventory agreement between collaborating sellers.
+
+    :param db: The async database session.
+    :param collaboration_id: ID of the collaboration.
+    :param agreement: SharedInventoryAgreement schema containing the agreement details.
+    :return: The updated collaboration, or None if it doesn't exist.
+    """
+    collaboration = await get_collaboration_by_id(db, collaboration_id)
+    if not collaboration:
+        return None
+
+    collaboration.agreement_details = f"Shared Inventory: {agreement.products}, Logistics: {agreement.logistics}, Terms: {agreement.terms}"
+    await db.flush()
+    add_outbox_event(db, "collaboration", "updated", row_data(collaboration))
+    await db.commit()
+    return collaboration
+
+
+async def update_b2b_contract(db: AsyncSession, collaboration_id: int, contract_update: CollaborationUpdate):
+    """
+    Update an existing B2B contract.
+
+    :param db: The async database session.
+    :param collaboration_id: ID of the contract to update.
+    :param contract_update: CollaborationUpdate schema with updated contract details.
+    :return: The updated contract object if found, else None.
+    """
+    return await update_collaboration(db, collaboration_id, contract_update)
+
+
+async def delete_b2b_contract(db: AsyncSession, collaboration_id: int):
+    """
+    Delete a B2B contract by its ID.
+
+    :param db: The async database session.
+    :param collaboration_id: ID of the contract to delete.
+    :return: The deleted contract if found and deleted, else None.
+    """
+    return await delete_collaboration(db, collaboration_id)
+
+
+async def get_contracts_by_seller(
+    db: AsyncSession, seller_id: int, limit: Optional[int] = None, after: Optional[int] = None, include_expired: bool = True
+):
+    """
+    Retrieve contracts for a specific seller, one keyset page at a time.
+
+    :param db: The async database session.
+    :param seller_id: ID of the seller whose contracts are to be retrieved.
+    :param limit: Maximum number of contracts to return; None returns all of them.
+    :param after: Cursor returned with the previous page (ID of its last contract).
+    :param include_expired: Whether to include contracts whose end date has passed.
+    :return: Tuple of (list of contracts, next cursor or None on the last page).
+    """
+    return await get_collaborations_by_seller(db, seller_id, limit, after, include_expired)
+
+
+async def find_nearby_sellers(db: AsyncSession, seller_id: int, location: str, radius_km: float = DEFAULT_NEARBY_RADIUS_KM):
+    """
+    Find sellers whose warehouse lies within a radius of the given location.
+    Runs the synchronous geo search on the async session's connection.
+    """
+    return await db.run_sync(collaboration_crud.find_nearby_sellers, seller_id, location, radius_km)
+
+
+async def find_nearest_sellers(
+    db: AsyncSession,
+    seller_id: int,
+    k: int,
+    collaboration_type: Optional[str] = None,
+    active_only: bool = True,
+    max_distance_km: Optional[float] = None,
+):
+    """
+    Rank the k sellers whose warehouses are closest to the given seller's warehouse.
+    Runs the synchronous nearest-neighbour lookup on the async session's connection, once
+    the index has been built off the event loop.
+    """
+    await ensure_index_loaded(seller_knn_index, get_seller_knn_index)
+    return await db.run_sync(
+        collaboration_crud.find_nearest_sellers, seller_id, k, collaboration_type, active_only, max_distance_km
+    )
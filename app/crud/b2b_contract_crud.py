@@ -3,7 +3,14 @@ from app.models.b2b_contract import B2BContractModel
 from app.schemas.b2b_contract_schemas import B2BContractCreate, B2BContractUpdate
 from typing import Optional
 import logging
-from typing import Optional, List, Union
+from typing import Optional, List, Tuple, Union, Iterator, Mapping
+from datetime import datetime
+from app.utils.pagination import seller_scoped_page
+from app.utils.export import stream_rows, EXPORT_BATCH_SIZE
+from app.crud.seller_stats_crud import apply_stats_delta, contract_stats_delta, merge_stats_deltas
+from app.utils.rabbitmq import row_data
+from app.crud.outbox_crud import add_outbox_event
+from app.crud.expiry_crud import live_criteria, schedule_expiry, set_expiry, unschedule_expiry
 
 logger = logging.getLogger(__name__)
 
@@ -16,9 +23,14 @@ def create_b2b_contract(db: Session, contract: B2BContractCreate):
     :return: The newly created B2B contract.
     """
     new_contract = B2BContractModel(**contract.dict())
+    set_expiry(new_contract)
     db.add(new_contract)
+    db.flush()  # Fills in column defaults the stats depend on
+    apply_stats_delta(db, contract_stats_delta(new_contract))
+    add_outbox_event(db, "contract", "created", row_data(new_contract))
     db.commit()
     db.refresh(new_contract)
+    schedule_expiry(new_contract)
     return new_contract
 
 
@@ -47,11 +59,17 @@ def update_b2b_contract(db: Session, contract_id: int, contract_update: B2BContr
         return None
 
     # Update the contract fields with the provided values
+    previous_stats = contract_stats_delta(contract, sign=-1)
     for key, value in contract_update.dict(exclude_unset=True).items():
         setattr(contract, key, value)
+    set_expiry(contract)
+    apply_stats_delta(db, merge_stats_deltas(previous_stats, contract_stats_delta(contract)))
+    db.flush()  # Sets updated_at before the event is built
+    add_outbox_event(db, "contract", "updated", row_data(contract))
 
     db.commit()
     db.refresh(contract)
+    schedule_expiry(contract)
     return contract
 
 
@@ -67,21 +85,50 @@ def delete_b2b_contract(db: Session, contract_id: int) -> Optional[B2BContractMo
     if not contract:
         return None
 
+    apply_stats_delta(db, contract_stats_delta(contract, sign=-1))
+    add_outbox_event(db, "contract", "deleted", row_data(contract))
     db.delete(contract)
     db.commit()
+    unschedule_expiry(contract)
     return contract
 
 
-def get_contracts_by_seller(db: Session, seller_id: int) -> Optional[List[B2BContractModel]]:
+def get_contracts_by_seller(
+    db: Session, seller_id: int, limit: Optional[int] = None, after: Optional[int] = None, include_expired: bool = True
+) -> Tuple[List[B2BContractModel], Optional[int]]:
     """
-    Retrieve all B2B contracts for a specific seller.
+    Retrieve B2B contracts for a specific seller, one keyset page at a time.
     
     :param db: The database session.
     :param seller_id: The seller's ID whose contracts are to be retrieved.
-    :return: A list of B2B contracts related to the seller.
+    :param limit: Maximum number of contracts to return; None returns all of them.
+    :param after: Cursor returned with the previous page (ID of its last contract).
+    :param include_expired: Whether to include contracts whose end date has passed.
+    :return: Tuple of (list of B2B contracts related to the seller, next cursor or None on the last page).
     """
-    return db.query(B2BContractModel).filter(
-        (B2BContractModel.seller_id == seller_id) |
-        (B2BContractModel.partner_seller_id == seller_id)
-    ).all()
+    return seller_scoped_page(db, B2BContractModel, seller_id, live_criteria(B2BContractModel, include_expired), limit, after)
 
+
+def stream_contracts(
+    db: Session,
+    seller_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[Mapping]:
+    """
+    Stream B2B contracts for export from a server-side cursor, with constant memory.
+    
+    :param db: The database session.
+    :param seller_id: Only contracts of this seller (as seller or partner); None exports all of them.
+    :param created_from: Only contracts created at or after this time.
+    :param created_to: Only contracts created before this time.
+    :param batch_size: Rows fetched per round-trip.
+    :return: An iterator of contract rows as column mappings.
+    """
+    criteria = []
+    if created_from is not None:
+        criteria.append(B2BContractModel.created_at >= created_from)
+    if created_to is not None:
+        criteria.append(B2BContractModel.created_at < created_to)
+    return stream_rows(db, B2BContractModel, seller_id, criteria, batch_size)
@@ -0,0 +1,233 @@
+from typing import Dict, Iterable, Optional
+import httpx
+import requests
+from fastapi import HTTPException
+from app.utils.cache import MISSING, ALL_KEY
+from app.utils.batch_loader import BatchLoader
+from app.utils.circuit_breaker import CircuitOpenError, stale_or_raise
+from app.crud.catalog_replica_crud import read_replica, aread_replica, split_replica_hits
+
+
+class CatalogEntityCrud:
+    """
+    Reads and writes of an entity owned by another catalog service (brands, categories).
+
+    Reads are answered from the local replica while it is fresh, else from the owning
+    service through the entity's TTL cache, with concurrent lookups of the same key
+    coalesced and stale entries served while the service's circuit is open. Writes go to
+    the owning service and invalidate the cache.
+    """
+
+    def __init__(self, entity: str, name: str, client, cache, flights, batch_supported: bool = True):
+        """
+        :param entity: The replica entity, 'brands' or 'categories'.
+        :param name: Singular name used in error messages, e.g. 'brand'.
+        :param client: DownstreamClient of the owning service.
+        :param cache: TTLCache of the entity.
+        :param flights: SingleFlight coalescing lookups of the entity.
+        :param batch_supported: Whether the owning service answers `GET /?ids=...`.
+        """
+        self.entity = entity
+        self.name = name
+        self.client = client
+        self.cache = cache
+        self.flights = flights
+        self.service = f"{name}-service"
+        self.loader = BatchLoader(entity, client, cache, self.get_by_id, self.aget_by_id, batch_supported=batch_supported)
+
+    def _not_found(self) -> HTTPException:
+        return HTTPException(status_code=404, detail=f"{self.name.capitalize()} not found")
+
+    def _write(self, action: str, send, *invalidated):
+        try:
+            response = send()
+            response.raise_for_status()
+            self.cache.invalidate(*invalidated)
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            raise HTTPException(status_code=500, detail=f"Error {action} {self.name} from {self.service}") from e
+
+    def create(self, data: dict):
+        """
+        Create an entity using the owning service's API.
+
+        :param data: Dictionary containing the entity's details.
+        :return: The newly created entity from the owning service.
+        """
+        return self._write("creating", lambda: self.client.post("/", json=data), ALL_KEY)
+
+    def update(self, entity_id: int, data: dict):
+        """
+        Update an existing entity using the owning service's API.
+
+        :param entity_id: ID of the entity to update.
+        :param data: Updated entity data.
+        :return: The updated entity from the owning service.
+        """
+        return self._write("updating", lambda: self.client.put(f"/{entity_id}", json=data), entity_id, ALL_KEY)
+
+    def delete(self, entity_id: int):
+        """
+        Delete an entity by its ID using the owning service's API.
+
+        :param entity_id: ID of the entity to delete.
+        :return: The deleted entity from the owning service.
+        """
+        return self._write("deleting", lambda: self.client.delete(f"/{entity_id}"), entity_id, ALL_KEY)
+
+    def _replica_hit(self, replicated: Optional[Dict], entity_id: int):
+        if replicated is not None and entity_id in replicated:
+            if replicated[entity_id] is None:
+                raise self._not_found()
+            return replicated[entity_id]
+        return self.cache.get(entity_id)
+
+    def get_by_id(self, entity_id: int, db=None):
+        """
+        Retrieve an entity by its ID from the local replica, or the owning service when the replica is stale.
+
+        :param entity_id: ID of the entity to retrieve.
+        :param db: The caller's database session for the replica read; one is opened if None.
+        :return: The entity, in the owning service's response shape.
+        """
+        found = self._replica_hit(read_replica(self.entity, [entity_id], db), entity_id)
+        if found is not MISSING:
+            return found
+
+        def fetch():
+            try:
+                response = self.client.get(f"/{entity_id}")
+                response.raise_for_status()
+                entity = response.json()
+            except CircuitOpenError as e:
+                return stale_or_raise(self.cache, entity_id, e)
+            except requests.exceptions.RequestException as e:
+                raise self._not_found() from e
+
+            self.cache.set(entity_id, entity)
+            return entity
+
+        return self.flights.do(entity_id, fetch)
+
+    async def aget_by_id(self, entity_id: int, db=None):
+        """
+        Async counterpart of get_by_id(); `db` is the caller's AsyncSession.
+        """
+        found = self._replica_hit(await aread_replica(self.entity, [entity_id], db), entity_id)
+        if found is not MISSING:
+            return found
+
+        async def fetch():
+            try:
+                response = await self.client.aget(f"/{entity_id}")
+                response.raise_for_status()
+                entity = response.json()
+            except CircuitOpenError as e:
+                return stale_or_raise(self.cache, entity_id, e)
+            except httpx.HTTPError as e:
+                raise self._not_found() from e
+
+            self.cache.set(entity_id, entity)
+            return entity
+
+        return await self.flights.ado(entity_id, fetch)
+
+    def get_all(self, db=None):
+        """
+        Retrieve every entity from the local replica, or the owning service when the replica is stale.
+
+        :param db: The caller's database session for the replica read; one is opened if None.
+        :return: A list of entities.
+        """
+        replicated = read_replica(self.entity, None, db)
+        if replicated is not None:
+            return list(replicated.values())
+        cached = self.cache.get(ALL_KEY)
+        if cached is not MISSING:
+            return cached
+
+        def fetch():
+            try:
+                response = self.client.get()
+                response.raise_for_status()
+                entities = response.json()
+            except CircuitOpenError as e:
+                return stale_or_raise(self.cache, ALL_KEY, e)
+            except requests.exceptions.RequestException as e:
+                raise HTTPException(status_code=500, detail=f"Error fetching {self.entity} from {self.service}") from e
+
+            self.cache.set(ALL_KEY, entities)
+            return entities
+
+        return self.flights.do(ALL_KEY, fetch)
+
+    async def aget_all(self, db=None):
+        """
+        Async counterpart of get_all(); `db` is the caller's AsyncSession.
+        """
+        replicated = await aread_replica(self.entity, None, db)
+        if replicated is not None:
+            return list(replicated.values())
+        cached = self.cache.get(ALL_KEY)
+        if cached is not MISSING:
+            return cached
+
+        async def fetch():
+            try:
+                response = await self.client.aget()
+                response.raise_for_status()
+                entities = response.json()
+            except CircuitOpenError as e:
+                return stale_or_raise(self.cache, ALL_KEY, e)
+            except httpx.HTTPError as e:
+                raise HTTPException(status_code=500, detail=f"Error fetching {self.entity} from {self.service}") from e
+
+            self.cache.set(ALL_KEY, entities)
+            return entities
+
+        return await self.flights.ado(ALL_KEY, fetch)
+
+    def get_many(self, entity_ids: Iterable[int], db=None) -> Dict:
+        """
+        Retrieve many entities from the local replica; IDs it can't answer (or all of them, when it is stale)
+        are fetched with one batched request to the owning service.
+
+        :param entity_ids: IDs of the entities to retrieve; duplicates are fetched once.
+        :param db: The caller's database session for the replica read; one is opened if None.
+        :return: Dictionary of ID to entity; unknown IDs are left out.
+        """
+        entity_ids = list(entity_ids)
+        replicated = read_replica(self.entity, entity_ids, db)
+        if replicated is None:
+            return self.loader.load_many(entity_ids)
+        found, unseen = split_replica_hits(replicated, entity_ids)
+        if unseen:
+            found.update(self.loader.load_many(unseen))
+        return found
+
+    async def aget_many(self, entity_ids: Iterable[int], db=None) -> Dict:
+        """
+        Async counterpart of get_many(); see aread_many() and aload_missing() to run the
+        replica read and the service lookups of several entities in separate steps.
+        """
+        entity_ids = list(entity_ids)
+        return await self.aload_missing(entity_ids, await self.aread_many(entity_ids, db))
+
+    async def aread_many(self, entity_ids: Iterable[int], db=None) -> Optional[Dict]:
+        """
+        The replica read of aget_many(): read_replica()'s result for `entity_ids`.
+        """
+        return await aread_replica(self.entity, entity_ids, db)
+
+    async def aload_missing(self, entity_ids: Iterable[int], replicated: Optional[Dict]) -> Dict:
+        """
+        The service lookups of aget_many(): the replica's hits plus the IDs it couldn't answer,
+        fetched with one batched request.
+        """
+        entity_ids = list(entity_ids)
+        if replicated is None:
+            return await self.loader.aload_many(entity_ids)
+        found, unseen = split_replica_hits(replicated, entity_ids)
+        if unseen:
+            found.update(await self.loader.aload_many(unseen))
+        return found
@@ -0,0 +1,407 @@
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import AsyncSessionLocal, SessionLocal, upsert_insert
+from app.models.brand import BrandModel
+from app.models.catalog_replica import CatalogReplicaStateModel
+from app.models.category import CategoryModel, category_brand_association
+
+logger = logging.getLogger(__name__)
+
+CATEGORIES = "categories"
+BRANDS = "brands"
+REPLICA_MODELS = {CATEGORIES: CategoryModel, BRANDS: BrandModel}
+UPSERT_ACTIONS = ("created", "updated", "upserted")
+STATE_REFRESH_SECONDS = 5  # How long the replica state is trusted in memory before it is read again
+WRITE_CHUNK_SIZE = 1000
+
+
+def parse_timestamp(value) -> Optional[datetime]:
+    """
+    Parse an ISO 8601 timestamp from another service into a naive UTC datetime, like the
+    ones stored in our tables; None if missing or unparseable.
+    """
+    if value is None or isinstance(value, datetime):
+        return value
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def _category_row(data: Dict, version: datetime) -> Dict:
+    return {
+        "id": int(data["id"]),
+        "name": data["name"],
+        "description": data.get("description"),
+        "brand_id": data.get("brand_id"),
+        "replicated_at": version,
+        "deleted_at": None,
+    }
+
+
+def _brand_row(data: Dict, version: datetime) -> Dict:
+    return {
+        "id": int(data["id"]),
+        "name": data["name"],
+        "description": data.get("description"),
+        "logo_url": data.get("logo_url"),
+        "created_at": parse_timestamp(data.get("created_at")),
+        "updated_at": parse_timestamp(data.get("updated_at")),
+        "replicated_at": version,
+        "deleted_at": None,
+    }
+
+
+def _category_payload(category: CategoryModel) -> Dict:
+    # Same shape as the category-service's responses
+    return {"id": category.id, "name": category.name, "description": category.description}
+
+
+def _brand_payload(brand: BrandModel) -> Dict:
+    # Same shape as the brand-service's responses
+    return {
+        "id": brand.id,
+        "name": brand.name,
+        "description": brand.description,
+        "logo_url": brand.logo_url,
+        "created_at": _isoformat(brand.created_at),
+        "updated_at": _isoformat(brand.updated_at),
+    }
+
+
+ROW_BUILDERS = {CATEGORIES: _category_row, BRANDS: _brand_row}
+PAYLOAD_BUILDERS = {CATEGORIES: _category_payload, BRANDS: _brand_payload}
+
+
+def _not_newer(table, version: datetime):
+    # Rows may only be overwritten by an event or snapshot at least as recent as the one they came from
+    return or_(table.c.replicated_at.is_(None), table.c.replicated_at <= version)
+
+
+def _upsert(db: Session, model, rows: List[Dict]) -> None:
+    insert_stmt = upsert_insert(db, model)
+    table = model.__table__
+    statement = insert_stmt.on_conflict_do_update(
+        index_elements=[table.c.id],
+        set_={column: insert_stmt.excluded[column] for column in rows[0] if column != "id"},
+        where=_not_newer(table, insert_stmt.excluded.replicated_at),
+    )
+    for start in range(0, len(rows), WRITE_CHUNK_SIZE):
+        db.execute(statement, rows[start:start + WRITE_CHUNK_SIZE])
+
+
+def _soft_delete(db: Session, model, ids: List[int], version: datetime) -> None:
+    # Deleted rows are kept (collaborations and products may still reference them) and hidden from reads
+    table = model.__table__
+    for start in range(0, len(ids), WRITE_CHUNK_SIZE):
+        db.execute(
+            update(table)
+            .where(table.c.id.in_(ids[start:start + WRITE_CHUNK_SIZE]), _not_newer(table, version))
+            .values(deleted_at=version, replicated_at=version)
+        )
+
+
+def _writable_ids(db: Session, model, ids: Iterable[int], version: datetime) -> set:
+    # IDs whose stored row (if any) is not newer than `version`
+    table = model.__table__
+    ids = list(ids)
+    stored = dict(db.execute(select(table.c.id, table.c.replicated_at).where(table.c.id.in_(ids))).all()) if ids else {}
+    return {entity_id for entity_id in ids if stored.get(entity_id) is None or stored[entity_id] <= version}
+
+
+def _replace_brand_links(db: Session, links: Dict[int, List[int]]) -> None:
+    table = category_brand_association
+    db.execute(delete(table).where(table.c.category_id.in_(list(links))))
+    rows = [{"category_id": category_id, "brand_id": int(brand_id)} for category_id, brand_ids in links.items() for brand_id in brand_ids]
+    if rows:
+        db.execute(table.insert(), rows)
+
+
+def _save_state(db: Session, entity: str, **values) -> None:
+    insert_stmt = upsert_insert(db, CatalogReplicaStateModel).values(entity=entity, **values)
+    db.execute(insert_stmt.on_conflict_do_update(index_elements=[CatalogReplicaStateModel.entity], set_=values))
+
+
+def _write_rows(db: Session, entity: str, items: List[Dict], version: datetime) -> None:
+    model = REPLICA_MODELS[entity]
+    rows = [ROW_BUILDERS[entity](item, version) for item in items]
+    if not rows:
+        return
+    links = {}
+    if entity == CATEGORIES:
+        # Brand links are only replaced for categories this write actually updates
+        linked = {row["id"]: item["brand_ids"] for row, item in zip(rows, items) if item.get("brand_ids") is not None}
+        writable = _writable_ids(db, model, linked, version)
+        links = {category_id: brand_ids for category_id, brand_ids in linked.items() if category_id in writable}
+    _upsert(db, model, rows)
+    if links:
+        _replace_brand_links(db, links)
+
+
+def apply_catalog_event(db: Session, entity: str, action: str, data: Dict, version: datetime) -> None:
+    """
+    Apply a category or brand change event to the local replica and commit.
+
+    Events are idempotent and may arrive out of order: a row is only overwritten by an
+    event at least as recent as the one it was last written from.
+
+    :param db: The database session.
+    :param entity: 'categories' or 'brands'.
+    :param action: 'created', 'updated', 'upserted' or 'deleted'.
+    :param data: The entity as sent by the owning service; deletions only need its id.
+    :param version: When the change happened in the owning service.
+    :raises ValueError: If the entity, action or payload is not understood.
+    """
+    if entity not in REPLICA_MODELS:
+        raise ValueError(f"Unknown catalog entity '{entity}'")
+    if action not in UPSERT_ACTIONS and action != "deleted":
+        raise ValueError(f"Unknown catalog event action '{action}'")
+    if "id" not in data or (action != "deleted" and "name" not in data):
+        raise ValueError(f"Catalog event for {entity} is missing its id or name")
+
+    try:
+        if action == "deleted":
+            _soft_delete(db, REPLICA_MODELS[entity], [int(data["id"])], version)
+        else:
+            _write_rows(db, entity, [data], version)
+        _save_state(db, entity, last_event_at=version)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+def sync_catalog_snapshot(db: Session, entity: str, items: List[Dict], version: datetime) -> Dict[str, int]:
+    """
+    Write a full snapshot from the owning service into the replica and commit. Rows missing
+    from the snapshot are marked deleted. Rows already written from a more recent event
+    (one that happened after the snapshot was taken) are left alone.
+
+    :param db: The database session.
+    :param entity: 'categories' or 'brands'.
+    :param items: Every entity, as listed by the owning service.
+    :param version: When the snapshot was requested.
+    :return: Number of entities in the snapshot and of rows marked deleted.
+    """
+    model = REPLICA_MODELS[entity]
+    items = [item for item in items if "id" in item and "name" in item]
+    try:
+        _write_rows(db, entity, items, version)
+        snapshot_ids = {int(item["id"]) for item in items}
+        live_ids = db.execute(select(model.id).where(model.deleted_at.is_(None))).scalars()
+        gone = [entity_id for entity_id in live_ids if entity_id not in snapshot_ids]
+        if gone:
+            _soft_delete(db, model, gone, version)
+        _save_state(db, entity, bootstrapped_at=version, synced_at=version)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    replica_freshness.note_synced(entity, version)
+    logger.info(f"Catalog replica of {entity} synced: {len(items)} rows, {len(gone)} deleted upstream")
+    return {"rows": len(items), "deleted": len(gone)}
+
+
+def mark_catalog_synced(db: Session, entities: Iterable[str], synced_at: datetime) -> None:
+    """
+    Record that the replicas of `entities` were caught up with their change events at
+    `synced_at`. Replicas that were never bootstrapped from a snapshot are left unsynced.
+    """
+    entities = list(entities)
+    db.execute(
+        update(CatalogReplicaStateModel)
+        .where(CatalogReplicaStateModel.entity.in_(entities), CatalogReplicaStateModel.bootstrapped_at.isnot(None))
+        .values(synced_at=synced_at)
+    )
+    db.commit()
+    replica_freshness.load(db)
+
+
+def get_catalog_replica_state(db: Session) -> Dict[str, Dict]:
+    """
+    Sync state of each replicated entity.
+    """
+    return {
+        state.entity: {
+            "bootstrapped_at": state.bootstrapped_at,
+            "synced_at": state.synced_at,
+            "last_event_at": state.last_event_at,
+        }
+        for state in db.query(CatalogReplicaStateModel)
+    }
+
+
+class ReplicaFreshness:
+    """
+    Decides whether the replica of an entity is recent enough to serve reads: it must have
+    been caught up with its change events within the last `max_staleness` seconds.
+    The sync state is cached in memory and re-read from the database at most every
+    STATE_REFRESH_SECONDS, so the check costs no query on most reads.
+    """
+
+    def __init__(self, max_staleness: float = settings.CATALOG_REPLICA_MAX_STALENESS, enabled: bool = settings.CATALOG_REPLICA_ENABLED):
+        self.max_staleness = max_staleness
+        self.enabled = enabled
+        self._synced_at: Dict[str, Optional[datetime]] = {}
+        self._expires = 0.0
+        self._lock = threading.Lock()
+        self.replica_reads = 0
+        self.bypassed_reads = 0
+
+    def load(self, db: Session) -> None:
+        synced_at = {entity: state["synced_at"] for entity, state in get_catalog_replica_state(db).items()}
+        with self._lock:
+            self._synced_at = synced_at
+            self._expires = time.monotonic() + STATE_REFRESH_SECONDS
+
+    def _load_in_session(self) -> None:
+        try:
+            with SessionLocal() as db:
+                self.load(db)
+        except Exception as e:
+            logger.warning(f"Could not read the catalog replica state: {e}")
+            with self._lock:
+                self._synced_at = {}  # Treat the replica as stale until the state can be read again
+                self._expires = time.monotonic() + STATE_REFRESH_SECONDS
+
+    def note_synced(self, entity: str, synced_at: datetime) -> None:
+        with self._lock:
+            current = self._synced_at.get(entity)
+            if current is None or synced_at > current:
+                self._synced_at[entity] = synced_at
+
+    def _check(self, entity: str) -> bool:
+        synced_at = self._synced_at.get(entity)
+        fresh = synced_at is not None and datetime.utcnow() - synced_at <= timedelta(seconds=self.max_staleness)
+        if fresh:
+            self.replica_reads += 1
+        else:
+            self.bypassed_reads += 1
+        return fresh
+
+    def is_fresh(self, entity: str) -> bool:
+        if not self.enabled:
+            return False
+        if time.monotonic() >= self._expires:
+            self._load_in_session()
+        return self._check(entity)
+
+    async def ais_fresh(self, entity: str) -> bool:
+        """
+        Async counterpart of is_fresh(); the occasional state read runs in a worker thread.
+        """
+        if not self.enabled:
+            return False
+        if time.monotonic() >= self._expires:
+            await asyncio.to_thread(self._load_in_session)
+        return self._check(entity)
+
+    def stats(self) -> Dict:
+        now = datetime.utcnow()
+        return {
+            "enabled": self.enabled,
+            "max_staleness_seconds": self.max_staleness,
+            "staleness_seconds": {
+                entity: round((now - synced_at).total_seconds(), 3) if synced_at is not None else None
+                for entity, synced_at in self._synced_at.items()
+            },
+            "replica_reads": self.replica_reads,
+            "bypassed_reads": self.bypassed_reads,
+        }
+
+
+replica_freshness = ReplicaFreshness()
+
+
+def _replica_statement(entity: str, ids: Optional[set]):
+    model = REPLICA_MODELS[entity]
+    if ids is None:
+        return select(model).where(model.deleted_at.is_(None)).order_by(model.id)
+    return select(model).where(model.id.in_(ids))
+
+
+def _replica_payloads(entity: str, rows) -> Dict[int, Optional[Dict]]:
+    build = PAYLOAD_BUILDERS[entity]
+    return {row.id: (build(row) if row.deleted_at is None else None) for row in rows}
+
+
+def _read_rows(entity: str, ids: Optional[set], db: Optional[Session] = None):
+    if db is not None:
+        return db.execute(_replica_statement(entity, ids)).scalars().all()
+    with SessionLocal() as db:
+        return db.execute(_replica_statement(entity, ids)).scalars().all()
+
+
+def _lookup_ids(ids: Optional[Iterable[int]]) -> Optional[set]:
+    return None if ids is None else {entity_id for entity_id in ids if entity_id is not None}
+
+
+def read_replica(
+    entity: str, ids: Optional[Iterable[int]] = None, db: Optional[Session] = None
+) -> Optional[Dict[int, Optional[Dict]]]:
+    """
+    Look categories or brands up in the local replica, if it is fresh enough.
+
+    :param entity: 'categories' or 'brands'.
+    :param ids: IDs to look up, duplicates and None allowed; None lists every entity that wasn't deleted.
+    :param db: The caller's session, so a request reads on the connection it already holds;
+               a session is opened for the read if None.
+    :return: None if the replica is stale or was never bootstrapped, in which case the caller
+             asks the owning service. Otherwise a mapping of ID to entity (in the owning service's
+             response shape), with None for entities deleted upstream; IDs the replica has never
+             seen are left out.
+    """
+    ids = _lookup_ids(ids)
+    if ids is not None and not ids:
+        return {}
+    if not replica_freshness.is_fresh(entity):
+        return None
+    return _replica_payloads(entity, _read_rows(entity, ids, db))
+
+
+async def aread_replica(
+    entity: str, ids: Optional[Iterable[int]] = None, db: Optional[AsyncSession] = None
+) -> Optional[Dict[int, Optional[Dict]]]:
+    """
+    Async counterpart of read_replica(), reading on the caller's AsyncSession if given, else
+    on a session of the async engine when it is enabled.
+    """
+    ids = _lookup_ids(ids)
+    if ids is not None and not ids:
+        return {}
+    if not await replica_freshness.ais_fresh(entity):
+        return None
+    if db is not None:
+        rows = (await db.execute(_replica_statement(entity, ids))).scalars().all()
+    elif AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(_replica_statement(entity, ids))).scalars().all()
+    else:
+        rows = await asyncio.to_thread(_read_rows, entity, ids)
+    return _replica_payloads(entity, rows)
+
+
+def split_replica_hits(replicated: Dict[int, Optional[Dict]], ids: Iterable[int]):
+    """
+    Split a read_replica() result into the entities found (deleted ones left out) and the
+    IDs the replica has never seen, which the caller may still look up in the owning service.
+    """
+    found = {entity_id: entity for entity_id, entity in replicated.items() if entity is not None}
+    unseen = [entity_id for entity_id in dict.fromkeys(ids) if entity_id is not None and entity_id not in replicated]
+    return found, unseen
@@ -1,25 +1,195 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, insert, or_, select, union_all
+from sqlalchemy.orm import Session, aliased
 from app.models.collaboration import CollaborationModel
+from app.models.category import CategoryModel
+from app.models.product import ProductModel
 from app.schemas.collaboration_schemas import CollaborationCreate, CollaborationUpdate, SharedInventoryAgreement
-from typing import List
+from app.models.seller import SellerModel
+from app.crud.seller_crud import get_seller_by_id, get_seller_knn_index
+from app.utils.collaboration_utils import suggest_seller_collaborations, DEFAULT_NEARBY_RADIUS_KM
+from app.utils.pagination import seller_scoped_page, seller_scoped_version, split_page, encode_cursor, decode_cursor, DEFAULT_PAGE_SIZE
+from app.utils.export import stream_rows, EXPORT_BATCH_SIZE
+from app.utils.partnership_graph import partnership_graph, PartnershipGraph
+from app.crud.seller_stats_crud import apply_stats_delta, collaboration_stats_delta, merge_stats_deltas
+from app.utils.rabbitmq import row_data
+from app.crud.outbox_crud import add_outbox_event, add_outbox_events
+from app.crud.expiry_crud import expired_at_for, live_criteria, schedule_expiry, set_expiry, unschedule_expiry
+from app.crud.exclusivity_crud import (
+    check_exclusivity, describe_conflict, find_exclusivity_conflicts, index_collaboration, lock_sellers, seller_locations,
+    sync_exclusivity_index, unindex_collaboration,
+)
+from app.utils.exclusivity_index import ExclusivityIndex, SellerLocation
+import logging
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+COLLABORATION_TYPES = ("B2B", "B2C")
+MAX_BULK_COLLABORATIONS = 10_000  # Largest batch accepted by create_collaborations_bulk
+
+# Sort keys accepted by build_collaboration_query, mapped to model attributes
+COLLABORATION_SORT_KEYS = {
+    "id": "id",
+    "created_at": "created_at",
+    "start_date": "collaboration_start_date",
+    "end_date": "collaboration_end_date",
+}
+COLLABORATION_STATUSES = ("active", "expired")
+
+logger = logging.getLogger(__name__)
 
 # CRUD Operations for Collaboration
 
 def create_collaboration(db: Session, collaboration: CollaborationCreate):
     """
     Create a new collaboration and persist it to the database.
+    Raises ExclusivityConflictError if it breaks the geographical exclusivity of another collaboration.
     
     :param db: The database session.
     :param collaboration: CollaborationCreate schema containing collaboration details.
     :return: The newly created collaboration.
     """
+    locations = check_exclusivity(db, collaboration)
     new_collaboration = CollaborationModel(**collaboration.dict())
+    set_expiry(new_collaboration)
     db.add(new_collaboration)
+    db.flush()  # Fills in column defaults the stats depend on
+    apply_stats_delta(db, collaboration_stats_delta(new_collaboration))
+    add_outbox_event(db, "collaboration", "created", row_data(new_collaboration))
     db.commit()
     db.refresh(new_collaboration)
+    partnership_graph.upsert(new_collaboration)
+    index_collaboration(new_collaboration, locations)
+    schedule_expiry(new_collaboration)
     return new_collaboration
 
 
+def _existing_ids(db: Session, column, ids) -> set:
+    ids = {value for value in ids if value is not None}
+    if not ids:
+        return set()
+    return {row[0] for row in db.query(column).filter(column.in_(ids))}
+
+
+def validate_collaborations(
+    db: Session, collaborations: List[CollaborationCreate], locations: Optional[Dict[int, SellerLocation]] = None
+) -> Dict[int, str]:
+    """
+    Check a batch of collaborations against the rules the database would enforce, with one
+    query per referenced table for the whole batch, and against geographical exclusivity:
+    that of the running collaborations and that of the earlier items of the batch.
+    
+    :param db: The database session.
+    :param collaborations: The collaborations to check.
+    :param locations: Warehouse locations of the batch's sellers, if already loaded.
+    :return: Dictionary of item index to error message for every invalid item.
+    """
+    seller_ids = _existing_ids(db, SellerModel.id, (s for c in collaborations for s in (c.seller_id, c.partner_seller_id)))
+    category_ids = _existing_ids(db, CategoryModel.id, (c.category_id for c in collaborations))
+    product_ids = _existing_ids(db, ProductModel.id, (c.product_id for c in collaborations))
+
+    errors = {}
+    for index, collaboration in enumerate(collaborations):
+        if collaboration.collaboration_type not in COLLABORATION_TYPES:
+            errors[index] = f"collaboration_type must be one of {', '.join(COLLABORATION_TYPES)}"
+        elif collaboration.seller_id == collaboration.partner_seller_id:
+            errors[index] = "A seller cannot collaborate with itself"
+        elif collaboration.seller_id not in seller_ids:
+            errors[index] = f"Seller {collaboration.seller_id} not found"
+        elif collaboration.partner_seller_id not in seller_ids:
+            errors[index] = f"Partner seller {collaboration.partner_seller_id} not found"
+        elif collaboration.category_id is not None and collaboration.category_id not in category_ids:
+            errors[index] = f"Category {collaboration.category_id} not found"
+        elif collaboration.product_id is not None and collaboration.product_id not in product_ids:
+            errors[index] = f"Product {collaboration.product_id} not found"
+        elif (
+            collaboration.collaboration_start_date is not None
+            and collaboration.collaboration_end_date is not None
+            and collaboration.collaboration_end_date < collaboration.collaboration_start_date
+        ):
+            errors[index] = "collaboration_end_date is before collaboration_start_date"
+        elif collaboration.revenue_sharing_percentage is not None and not 0 <= collaboration.revenue_sharing_percentage <= 100:
+            errors[index] = "revenue_sharing_percentage must be between 0 and 100"
+
+    if locations is None:
+        locations = seller_locations(db, seller_ids)
+    batch = ExclusivityIndex()  # Valid items so far, which the shared index doesn't have yet
+    batch.load([])
+    for index, collaboration in enumerate(collaborations):
+        if index in errors:
+            continue
+        conflicts = find_exclusivity_conflicts(db, collaboration, locations=locations)
+        if conflicts:
+            errors[index] = describe_conflict(conflicts[0])
+            continue
+        conflicts = find_exclusivity_conflicts(db, collaboration, locations=locations, index=batch)
+        if conflicts:
+            errors[index] = f"Breaks geographical exclusivity with item {-conflicts[0].collaboration_id - 1} of the batch"
+            continue
+        batch.upsert(SimpleNamespace(**collaboration.dict(), id=-index - 1), locations)
+    return errors
+
+
+def create_collaborations_bulk(
+    db: Session, collaborations: List[CollaborationCreate], partial: bool = False
+) -> Tuple[List[CollaborationModel], Dict[int, str]]:
+    """
+    Create many collaborations in one transaction.
+    
+    The batch's sellers are locked and the batch is validated up front (see
+    check_exclusivity), then the valid rows are written with multi-row
+    INSERT ... RETURNING statements (batched by SQLAlchemy's insertmanyvalues), instead of
+    an add/commit/refresh round-trip per collaboration.
+    
+    :param db: The database session.
+    :param collaborations: The collaborations to create.
+    :param partial: If True, create the valid items and report the invalid ones;
+        otherwise nothing is created when any item is invalid.
+    :return: Tuple of (created collaborations in request order, item index to error message).
+    """
+    seller_ids = {s for c in collaborations for s in (c.seller_id, c.partner_seller_id)}
+    # Held until the commit: concurrent writes involving these sellers wait, and the batch is
+    # checked against their collaborations as committed, including by other processes
+    lock_sellers(db, seller_ids)
+    sync_exclusivity_index(db, seller_ids)
+    locations = seller_locations(db, seller_ids)
+    errors = validate_collaborations(db, collaborations, locations)
+    if errors and not partial:
+        db.rollback()
+        return [], errors
+
+    rows = [collaboration.dict() for index, collaboration in enumerate(collaborations) if index not in errors]
+    if not rows:
+        db.rollback()
+        return [], errors
+    now = datetime.utcnow()
+    for row in rows:
+        row["expired_at"] = expired_at_for(row["collaboration_end_date"], now)
+
+    try:
+        # sort_by_parameter_order keeps RETURNING rows in request order; PostgreSQL still
+        # batches it (SQLite has no ordering sentinel and falls back to one row per statement)
+        created = db.scalars(
+            insert(CollaborationModel).returning(CollaborationModel, sort_by_parameter_order=True), rows
+        ).all()
+        apply_stats_delta(db, merge_stats_deltas(*(collaboration_stats_delta(row) for row in created)))
+        add_outbox_events(db, "collaboration", "created", (row_data(row) for row in created))
+        # Detach the rows so commit doesn't expire them: RETURNING already loaded every
+        # column, and reading them back would cost one SELECT per row
+        for row in created:
+            db.expunge(row)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    for collaboration in created:
+        partnership_graph.upsert(collaboration)
+        index_collaboration(collaboration, locations)
+        schedule_expiry(collaboration)
+    return created, errors
+
+
 def get_collaboration_by_id(db: Session, collaboration_id: int):
     """
     Retrieve a collaboration by its ID.
@@ -31,34 +201,243 @@ def get_collaboration_by_id(db: Session, collaboration_id: int):
     return db.query(CollaborationModel).filter(CollaborationModel.id == collaboration_id).one_or_none()
 
 
-def get_collaborations_by_seller(db: Session, seller_id: int):
+def get_collaboration_version(db: Session, collaboration_id: int):
     """
-    Retrieve all collaborations for a specific seller.
+    Look up only the version columns of a collaboration, for conditional requests.
+    
+    :param db: The database session.
+    :param collaboration_id: ID of the collaboration.
+    :return: Row of (id, updated_at) if found, else None.
+    """
+    statement = select(CollaborationModel.id, CollaborationModel.updated_at).where(CollaborationModel.id == collaboration_id)
+    return db.execute(statement).one_or_none()
+
+
+def get_seller_collaborations_version(db: Session, seller_id: int) -> Tuple[int, Optional[datetime]]:
+    """
+    Cheap version of all collaborations of a seller (as seller or partner), for conditional
+    requests on the seller listings. Changes whenever one of them is created, updated or deleted.
+    
+    :param db: The database session.
+    :param seller_id: ID of the seller.
+    :return: Tuple of (number of collaborations, latest updated_at).
+    """
+    return seller_scoped_version(db, CollaborationModel, seller_id)
+
+
+def get_collaborations_by_seller(
+    db: Session, seller_id: int, limit: Optional[int] = None, after: Optional[int] = None, include_expired: bool = True
+):
+    """
+    Retrieve collaborations for a specific seller, one keyset page at a time.
     
     :param db: The database session.
     :param seller_id: ID of the seller whose collaborations are to be retrieved.
-    :return: A list of collaboration objects.
+    :param limit: Maximum number of collaborations to return; None returns all of them.
+    :param after: Cursor returned with the previous page (ID of its last collaboration).
+    :param include_expired: Whether to include collaborations whose end date has passed.
+    :return: Tuple of (list of collaboration objects, next cursor or None on the last page).
     """
-    return db.query(CollaborationModel).filter(
-        (CollaborationModel.seller_id == seller_id) | 
-        (CollaborationModel.partner_seller_id == seller_id)
-    ).all()
+    return seller_scoped_page(db, CollaborationModel, seller_id, live_criteria(CollaborationModel, include_expired), limit, after)
 
 
-def get_collaborations_by_type(db: Session, seller_id: int, collaboration_type: str) -> List[CollaborationModel]:
+def get_collaborations_by_type(
+    db: Session,
+    seller_id: int,
+    collaboration_type: str,
+    limit: Optional[int] = None,
+    after: Optional[int] = None,
+    include_expired: bool = True,
+) -> Tuple[List[CollaborationModel], Optional[int]]:
     """
     Retrieve collaborations for a specific seller based on collaboration type (B2B/B2C).
     
     :param db: The database session.
     :param seller_id: ID of the seller.
     :param collaboration_type: Type of collaboration to filter (B2B or B2C).
-    :return: List of collaborations matching the criteria.
+    :param limit: Maximum number of collaborations to return; None returns all of them.
+    :param after: Cursor returned with the previous page (ID of its last collaboration).
+    :param include_expired: Whether to include collaborations whose end date has passed.
+    :return: Tuple of (collaborations matching the criteria, next cursor or None on the last page).
+    """
+    criteria = (CollaborationModel.collaboration_type == collaboration_type, *live_criteria(CollaborationModel, include_expired))
+    return seller_scoped_page(db, CollaborationModel, seller_id, criteria, limit, after)
+
+
+def collaboration_filter_criteria(
+    collaboration_type: Optional[str] = None,
+    category_id: Optional[int] = None,
+    product_id: Optional[int] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    status: Optional[str] = None,
+    now: Optional[datetime] = None,
+) -> List:
+    """
+    Build the filter expressions of a collaboration search. Unset filters are left out.
+    
+    :param collaboration_type: Only this type (B2B or B2C).
+    :param category_id: Only collaborations on this category.
+    :param product_id: Only collaborations on this product.
+    :param date_from: Only collaborations still running at or after this time.
+    :param date_to: Only collaborations started at or before this time.
+    :param status: 'active' (started and not ended) or 'expired' (ended).
+    :param now: Reference time for the status filter; defaults to the current UTC time.
+    :return: List of SQLAlchemy filter expressions.
+    """
+    model = CollaborationModel
+    criteria = []
+    if collaboration_type is not None:
+        criteria.append(model.collaboration_type == collaboration_type)
+    if category_id is not None:
+        criteria.append(model.category_id == category_id)
+    if product_id is not None:
+        criteria.append(model.product_id == product_id)
+    if date_from is not None:
+        criteria.append(or_(model.collaboration_end_date.is_(None), model.collaboration_end_date >= date_from))
+    if date_to is not None:
+        criteria.append(or_(model.collaboration_start_date.is_(None), model.collaboration_start_date <= date_to))
+    if status is not None:
+        if status not in COLLABORATION_STATUSES:
+            raise ValueError(f"status must be one of {', '.join(COLLABORATION_STATUSES)}")
+        now = now or datetime.utcnow()
+        if status == "active":
+            criteria.append(or_(model.collaboration_start_date.is_(None), model.collaboration_start_date <= now))
+            criteria.append(or_(model.collaboration_end_date.is_(None), model.collaboration_end_date > now))
+        else:
+            criteria.append(model.collaboration_end_date <= now)
+    return criteria
+
+
+def _sort_order(entity, sort: str, descending: bool) -> List:
+    # NULLs sort as if larger than every value (PostgreSQL's default), so a plain
+    # (column, id) index serves both directions
+    column, id_column = getattr(entity, COLLABORATION_SORT_KEYS[sort]), entity.id
+    if sort == "id":
+        return [id_column.desc() if descending else id_column.asc()]
+    if descending:
+        return [column.desc().nulls_first(), id_column.desc()]
+    return [column.asc().nulls_last(), id_column.asc()]
+
+
+def _seek_after(entity, sort: str, descending: bool, after: Sequence):
+    """
+    Keyset predicate selecting the rows that follow `after` (the sort key of the last row seen)
+    in the order produced by _sort_order.
+    """
+    column, id_column = getattr(entity, COLLABORATION_SORT_KEYS[sort]), entity.id
+    if sort == "id":
+        return id_column < after[0] if descending else id_column > after[0]
+
+    value, last_id = after
+    if descending:
+        if value is None:
+            return or_(column.isnot(None), and_(column.is_(None), id_column < last_id))
+        return and_(column <= value, or_(column < value, id_column < last_id))
+    if value is None:
+        return and_(column.is_(None), id_column > last_id)
+    return or_(and_(column >= value, or_(column > value, id_column > last_id)), column.is_(None))
+
+
+def build_collaboration_query(
+    seller_id: Optional[int] = None,
+    criteria: Sequence = (),
+    sort: str = "id",
+    descending: bool = False,
+    limit: int = DEFAULT_PAGE_SIZE,
+    after: Optional[Sequence] = None,
+):
+    """
+    Compose one SELECT for a page of collaborations with filters, sort and keyset pagination.
+    
+    With a seller the query is split into a seller branch and a partner branch combined with
+    UNION ALL (see seller_scoped_select); each branch filters, seeks, orders and limits on its
+    own, so the work per page stays proportional to the page size.
+    
+    :param seller_id: Only collaborations of this seller (as seller or partner); None searches all of them.
+    :param criteria: Filter expressions, e.g. from collaboration_filter_criteria.
+    :param sort: One of COLLABORATION_SORT_KEYS; ties are broken by id.
+    :param descending: Sort in descending order.
+    :param limit: Page size; one look-ahead row is fetched on top.
+    :param after: Sort key of the last row of the previous page: (id,) for the id sort, else (value, id).
+    :return: A select() of collaborations; pass its rows through split_page.
+    """
+    if sort not in COLLABORATION_SORT_KEYS:
+        raise ValueError(f"sort must be one of {', '.join(COLLABORATION_SORT_KEYS)}")
+
+    def page_of(entity, *filters):
+        statement = select(entity).where(*filters)
+        if after is not None:
+            statement = statement.where(_seek_after(entity, sort, descending, after))
+        return statement.order_by(*_sort_order(entity, sort, descending)).limit(limit + 1)
+
+    model = CollaborationModel
+    if seller_id is None:
+        return page_of(model, *criteria)
+
+    branches = [
+        select(page_of(model, model.seller_id == seller_id, *criteria).subquery()),
+        select(page_of(model, model.partner_seller_id == seller_id, model.seller_id != seller_id, *criteria).subquery()),
+    ]
+    entity = aliased(model, union_all(*branches).subquery())
+    return select(entity).order_by(*_sort_order(entity, sort, descending)).limit(limit + 1)
+
+
+def parse_collaboration_cursor(cursor: Optional[str], sort: str) -> Optional[List]:
+    """
+    Decode a search cursor back into the sort key expected by build_collaboration_query.
+    
+    :raises ValueError: If the cursor is malformed or was made for another sort key.
+    """
+    if cursor is None:
+        return None
+    after = decode_cursor(cursor)
+    if len(after) != (1 if sort == "id" else 2) or not isinstance(after[-1], int):
+        raise ValueError("Cursor does not match the requested sort")
+    if sort != "id" and isinstance(after[0], str):
+        try:
+            after[0] = datetime.fromisoformat(after[0])
+        except ValueError as e:
+            raise ValueError("Invalid cursor") from e
+    return after
+
+
+def collaboration_page_cursor(rows: List[CollaborationModel], next_cursor: Optional[int], sort: str) -> Optional[str]:
+    """
+    Build the opaque cursor for the page following `rows` (None on the last page).
     """
-    return db.query(CollaborationModel).filter(
-        ((CollaborationModel.seller_id == seller_id) | 
-         (CollaborationModel.partner_seller_id == seller_id)) & 
-         (CollaborationModel.collaboration_type == collaboration_type)
-    ).all()
+    if next_cursor is None:
+        return None
+    last = rows[-1]
+    if sort == "id":
+        return encode_cursor([last.id])
+    return encode_cursor([getattr(last, COLLABORATION_SORT_KEYS[sort]), last.id])
+
+
+def search_collaborations(
+    db: Session,
+    seller_id: Optional[int] = None,
+    criteria: Sequence = (),
+    sort: str = "id",
+    descending: bool = False,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+) -> Tuple[List[CollaborationModel], Optional[str]]:
+    """
+    Retrieve one page of collaborations matching all filters with a single SQL statement.
+    
+    :param db: The database session.
+    :param seller_id: Only collaborations of this seller (as seller or partner); None searches all of them.
+    :param criteria: Filter expressions from collaboration_filter_criteria.
+    :param sort: One of COLLABORATION_SORT_KEYS.
+    :param descending: Sort in descending order.
+    :param limit: Page size.
+    :param cursor: The next_cursor returned with the previous page.
+    :return: Tuple of (collaborations, cursor of the next page or None on the last page).
+    """
+    statement = build_collaboration_query(seller_id, criteria, sort, descending, limit, parse_collaboration_cursor(cursor, sort))
+    rows, next_cursor = split_page(db.execute(statement).scalars().all(), limit)
+    return rows, collaboration_page_cursor(rows, next_cursor, sort)
 
 
 def update_collaboration(db: Session, collaboration_id: int, collaboration: CollaborationUpdate):
@@ -74,11 +453,23 @@ def update_collaboration(db: Session, collaboration_id: int, collaboration: Coll
     if not db_collaboration:
         return None
 
-    for key, value in collaboration.dict(exclude_unset=True).items():
+    updates = collaboration.dict(exclude_unset=True)
+    previous_stats = collaboration_stats_delta(db_collaboration, sign=-1)
+    for key, value in updates.items():
         setattr(db_collaboration, key, value)
+    # Moving the end date is the only update that can extend the collaboration into another's exclusivity
+    locations = check_exclusivity(db, db_collaboration, collaboration_id) if "collaboration_end_date" in updates else None
+    set_expiry(db_collaboration)
+    apply_stats_delta(db, merge_stats_deltas(previous_stats, collaboration_stats_delta(db_collaboration)))
+    db.flush()  # Sets updated_at before the event is built
+    add_outbox_event(db, "collaboration", "updated", row_data(db_collaboration))
 
     db.commit()
     db.refresh(db_collaboration)
+    partnership_graph.upsert(db_collaboration)
+    if locations is not None:
+        index_collaboration(db_collaboration, locations)
+    schedule_expiry(db_collaboration)
     return db_collaboration
 
 
@@ -94,8 +485,13 @@ def delete_collaboration(db: Session, collaboration_id: int):
     if not db_collaboration:
         return None
 
+    apply_stats_delta(db, collaboration_stats_delta(db_collaboration, sign=-1))
+    add_outbox_event(db, "collaboration", "deleted", row_data(db_collaboration))
     db.delete(db_collaboration)
     db.commit()
+    partnership_graph.remove(collaboration_id)
+    unindex_collaboration(collaboration_id)
+    unschedule_expiry(db_collaboration)
     return db_collaboration
 
 
@@ -115,6 +511,8 @@ def create_shared_inventory_agreement(db: Session, collaboration_id: int, agreem
         return None
     
     collaboration.agreement_details = f"Shared Inventory: {agreement.products}, Logistics: {agreement.logistics}, Terms: {agreement.terms}"
+    db.flush()
+    add_outbox_event(db, "collaboration", "updated", row_data(collaboration))
     db.commit()
     return collaboration
 
@@ -132,11 +530,22 @@ def update_b2b_contract(db: Session, collaboration_id: int, contract_update: Col
     if not collaboration:
         return None
 
-    for key, value in contract_update.dict(exclude_unset=True).items():
+    updates = contract_update.dict(exclude_unset=True)
+    previous_stats = collaboration_stats_delta(collaboration, sign=-1)
+    for key, value in updates.items():
         setattr(collaboration, key, value)
+    locations = check_exclusivity(db, collaboration, collaboration_id) if "collaboration_end_date" in updates else None
+    set_expiry(collaboration)
+    apply_stats_delta(db, merge_stats_deltas(previous_stats, collaboration_stats_delta(collaboration)))
+    db.flush()
+    add_outbox_event(db, "collaboration", "updated", row_data(collaboration))
 
     db.commit()
     db.refresh(collaboration)
+    partnership_graph.upsert(collaboration)
+    if locations is not None:
+        index_collaboration(collaboration, locations)
+    schedule_expiry(collaboration)
     return collaboration
 
 
@@ -152,20 +561,127 @@ def delete_b2b_contract(db: Session, collaboration_id: int):
     if not collaboration:
         return None
 
+    apply_stats_delta(db, collaboration_stats_delta(collaboration, sign=-1))
+    add_outbox_event(db, "collaboration", "deleted", row_data(collaboration))
     db.delete(collaboration)
     db.commit()
+    partnership_graph.remove(collaboration_id)
+    unindex_collaboration(collaboration_id)
+    unschedule_expiry(collaboration)
     return collaboration
 
 
-def get_contracts_by_seller(db: Session, seller_id: int):
+def get_partnership_graph(db: Session) -> PartnershipGraph:
     """
-    Retrieve all contracts for a specific seller.
+    Return the in-process seller partnership graph, loading it from the database on first use.
+    Afterwards it is kept current by the collaboration write functions.
+    
+    :param db: The database session.
+    :return: The loaded partnership graph.
+    """
+    if not partnership_graph.loaded:
+        collaborations = db.query(
+            CollaborationModel.id,
+            CollaborationModel.seller_id,
+            CollaborationModel.partner_seller_id,
+            CollaborationModel.collaboration_type,
+        ).yield_per(10000)
+        partnership_graph.load(collaborations)
+        logger.info(f"Partnership graph loaded with {len(partnership_graph)} collaborations")
+    return partnership_graph
+
+
+def find_nearby_sellers(db: Session, seller_id: int, location: str, radius_km: float = DEFAULT_NEARBY_RADIUS_KM):
+    """
+    Find sellers whose warehouse lies within a radius of the given location.
+    
+    :param db: The database session.
+    :param seller_id: ID of the requesting seller, excluded from the results.
+    :param location: The location in 'latitude,longitude' format.
+    :param radius_km: Search radius in kilometers.
+    :return: A list of nearby sellers, nearest first.
+    """
+    return [
+        seller for seller in suggest_seller_collaborations(location, db, radius_km)
+        if seller.id != seller_id
+    ]
+
+
+def find_nearest_sellers(
+    db: Session,
+    seller_id: int,
+    k: int,
+    collaboration_type: Optional[str] = None,
+    active_only: bool = True,
+    max_distance_km: Optional[float] = None,
+) -> Optional[List[SellerModel]]:
+    """
+    Rank the k sellers whose warehouses are closest to the given seller's warehouse.
+    
+    :param db: The database session.
+    :param seller_id: ID of the seller to find partners for.
+    :param k: Number of sellers to return.
+    :param collaboration_type: Only return sellers preferring this collaboration type (B2B/B2C).
+    :param active_only: Only return active sellers.
+    :param max_distance_km: Optional cut-off distance in kilometers.
+    :return: Sellers ordered nearest first, or None if the seller doesn't exist or has no location.
+    """
+    seller = get_seller_by_id(db, seller_id)
+    if not seller or seller.latitude is None or seller.longitude is None:
+        return None
+
+    ranked = get_seller_knn_index(db).nearest(
+        seller.latitude,
+        seller.longitude,
+        k,
+        active_only=active_only,
+        collaboration_type=collaboration_type,
+        max_distance_km=max_distance_km,
+        exclude_seller_id=seller_id,
+    )
+    if not ranked:
+        return []
+
+    sellers = {s.id: s for s in db.query(SellerModel).filter(SellerModel.id.in_([sid for sid, _ in ranked])).all()}
+    return [sellers[sid] for sid, _ in ranked if sid in sellers]
+
+
+def get_contracts_by_seller(
+    db: Session, seller_id: int, limit: Optional[int] = None, after: Optional[int] = None, include_expired: bool = True
+):
+    """
+    Retrieve contracts for a specific seller, one keyset page at a time.
     
     :param db: The database session.
     :param seller_id: ID of the seller whose contracts are to be retrieved.
-    :return: A list of contracts.
+    :param limit: Maximum number of contracts to return; None returns all of them.
+    :param after: Cursor returned with the previous page (ID of its last contract).
+    :param include_expired: Whether to include contracts whose end date has passed.
+    :return: Tuple of (list of contracts, next cursor or None on the last page).
+    """
+    return seller_scoped_page(db, CollaborationModel, seller_id, live_criteria(CollaborationModel, include_expired), limit, after)
+
+
+def stream_collaborations(
+    db: Session,
+    seller_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[Mapping]:
+    """
+    Stream collaborations for export from a server-side cursor, with constant memory.
+    
+    :param db: The database session.
+    :param seller_id: Only collaborations of this seller (as seller or partner); None exports all of them.
+    :param created_from: Only collaborations created at or after this time.
+    :param created_to: Only collaborations created before this time.
+    :param batch_size: Rows fetched per round-trip.
+    :return: An iterator of collaboration rows as column mappings.
     """
-    return db.query(CollaborationModel).filter(
-        (CollaborationModel.seller_id == seller_id) |
-        (CollaborationModel.partner_seller_id == seller_id)
-    ).all()
+    criteria = []
+    if created_from is not None:
+        criteria.append(CollaborationModel.created_at >= created_from)
+    if created_to is not None:
+        criteria.append(CollaborationModel.created_at < created_to)
+    return stream_rows(db, CollaborationModel, seller_id, criteria, batch_size)
@@ -0,0 +1,316 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import Integer, and_, bindparam, func, literal, or_, select, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session, aliased
+from app.config import settings
+from app.models.collaboration import CollaborationModel
+from app.models.seller import SellerModel
+from app.utils.change_watermark import ChangeWatermark
+from app.utils.exclusivity_index import ExclusivityIndex, RegionConflict, SellerLocation, exclusivity_index
+import logging
+
+logger = logging.getLogger(__name__)
+
+SELLER_LOOKUP_CHUNK = 1000  # Seller ids per IN (...) query
+SELLER_LOCK_KEY = 7301  # First key of the two-key advisory locks taken on sellers; the second is the seller id
+SYNC_MARGIN = timedelta(seconds=settings.INDEX_SYNC_MARGIN)
+
+# Sellers written since the index was loaded, by any process; those that moved get their collaborations reindexed
+_seller_changes = ChangeWatermark(SellerModel.updated_at, SYNC_MARGIN)
+
+
+class ExclusivityConflictError(ValueError):
+    """
+    Raised when a collaboration write would break the geographical exclusivity of another collaboration.
+    """
+
+    def __init__(self, conflicts: List[RegionConflict]):
+        self.conflicts = conflicts
+        super().__init__("; ".join(describe_conflict(conflict) for conflict in conflicts))
+
+
+def describe_conflict(conflict: RegionConflict) -> str:
+    if conflict.exclusive:
+        return (
+            f"Seller {conflict.seller_id} has an exclusive collaboration ({conflict.collaboration_id}) "
+            f"with seller {conflict.partner_seller_id}, {conflict.distance_km:.1f} km from the proposed partner"
+        )
+    return (
+        f"Seller {conflict.seller_id} already collaborates with seller {conflict.partner_seller_id} "
+        f"({conflict.collaboration_id}), {conflict.distance_km:.1f} km from the proposed partner"
+    )
+
+
+def seller_locations(db: Session, seller_ids: Iterable[int]) -> Dict[int, SellerLocation]:
+    """
+    Warehouse locations of the given sellers; sellers without one are left out.
+
+    :param db: The database session.
+    :param seller_ids: IDs of the sellers.
+    :return: Dictionary of seller id to location.
+    """
+    seller_ids = sorted({seller_id for seller_id in seller_ids if seller_id is not None})
+    locations = {}
+    for start in range(0, len(seller_ids), SELLER_LOOKUP_CHUNK):
+        rows = db.execute(
+            select(SellerModel.id, SellerModel.latitude, SellerModel.longitude, SellerModel.geohash).where(
+                SellerModel.id.in_(seller_ids[start:start + SELLER_LOOKUP_CHUNK]), SellerModel.latitude.isnot(None)
+            )
+        )
+        locations.update((seller_id, SellerLocation(latitude, longitude, geohash)) for seller_id, latitude, longitude, geohash in rows)
+    return locations
+
+
+def _collaborations_with_locations(db: Session, *criteria):
+    # Collaborations, each with both sellers' locations
+    seller = aliased(SellerModel)
+    partner = aliased(SellerModel)
+    rows = db.execute(
+        select(
+            CollaborationModel.id,
+            CollaborationModel.seller_id,
+            CollaborationModel.partner_seller_id,
+            CollaborationModel.collaboration_start_date,
+            CollaborationModel.collaboration_end_date,
+            CollaborationModel.geographical_exclusivity,
+            CollaborationModel.expired_at,
+            CollaborationModel.updated_at,
+            seller.latitude, seller.longitude, seller.geohash,
+            partner.latitude, partner.longitude, partner.geohash,
+        )
+        .join(seller, seller.id == CollaborationModel.seller_id)
+        .join(partner, partner.id == CollaborationModel.partner_seller_id)
+        .where(*criteria)
+        .execution_options(yield_per=10000)
+    )
+    for row in rows:
+        locations = {}
+        if row[8] is not None:
+            locations[row.seller_id] = SellerLocation(row[8], row[9], row[10])
+        if row[11] is not None:
+            locations[row.partner_seller_id] = SellerLocation(row[11], row[12], row[13])
+        yield row, locations
+
+
+def _involving(seller_ids):
+    return or_(CollaborationModel.seller_id.in_(seller_ids), CollaborationModel.partner_seller_id.in_(seller_ids))
+
+
+def lock_sellers(db: Session, seller_ids: Iterable[int]) -> None:
+    """
+    Lock the given sellers until the session's transaction ends, serializing the writes that
+    are checked against their collaborations across threads and processes.
+
+    On PostgreSQL this takes transaction-level advisory locks in seller id order, so writers
+    locking overlapping sets of sellers can't deadlock. Elsewhere it writes the seller rows
+    without changing them, which takes their row locks (the database write lock on SQLite).
+
+    :param db: The database session.
+    :param seller_ids: IDs of the sellers.
+    """
+    seller_ids = sorted({seller_id for seller_id in seller_ids if seller_id is not None})
+    if not seller_ids:
+        return
+    if db.get_bind().dialect.name == "postgresql":
+        ids = func.unnest(literal(seller_ids, ARRAY(Integer))).table_valued("seller_id").render_derived()
+        # Volatile functions in the select list are evaluated after ORDER BY
+        db.execute(select(func.pg_advisory_xact_lock(SELLER_LOCK_KEY, ids.c.seller_id)).order_by(ids.c.seller_id))
+        return
+    for start in range(0, len(seller_ids), SELLER_LOOKUP_CHUNK):
+        # Plain SQL, so the no-op write leaves updated_at alone
+        db.execute(
+            text("UPDATE sellers SET id = id WHERE id IN :seller_ids").bindparams(
+                bindparam("seller_ids", seller_ids[start:start + SELLER_LOOKUP_CHUNK], expanding=True)
+            )
+        )
+
+
+def get_exclusivity_index(db: Session) -> ExclusivityIndex:
+    """
+    Return the in-process geographical exclusivity index, loading the running collaborations
+    from the database on first use. Afterwards it is kept current by the collaboration and
+    seller write functions.
+
+    :param db: The database session.
+    :return: The loaded exclusivity index.
+    """
+    if not exclusivity_index.loaded:
+        loaded_at = datetime.utcnow()
+        exclusivity_index.load(_collaborations_with_locations(db, CollaborationModel.expired_at.is_(None)), loaded_at)
+        _seller_changes.reset(loaded_at)
+        logger.info(f"Exclusivity index loaded with {len(exclusivity_index)} collaboration sides")
+    return exclusivity_index
+
+
+def find_exclusivity_conflicts(
+    db: Session,
+    collaboration,
+    exclude_collaboration_id: Optional[int] = None,
+    locations: Optional[Dict[int, SellerLocation]] = None,
+    now: Optional[datetime] = None,
+    index: Optional[ExclusivityIndex] = None,
+) -> List[RegionConflict]:
+    """
+    Check a proposed collaboration against the geographical exclusivity of the running ones.
+
+    An exclusive collaboration binds both of its sellers while it runs: neither may
+    collaborate with another seller within EXCLUSIVITY_RADIUS_KM of its exclusive partner's
+    warehouse. Conversely, a proposed exclusive collaboration conflicts with the running
+    collaborations of its sellers with partners inside that radius.
+
+    :param db: The database session.
+    :param collaboration: The proposed collaboration (CollaborationCreate, or the model being updated).
+    :param exclude_collaboration_id: Collaboration to leave out, e.g. the one being updated.
+    :param locations: Warehouse locations of the two sellers, if already loaded.
+    :param now: Reference time; exclusivity is only checked from this time on.
+    :param index: Index to check against instead of the shared one, e.g. earlier items of a batch.
+    :return: The conflicting collaborations; empty if the collaboration is allowed.
+    """
+    if locations is None:
+        locations = seller_locations(db, (collaboration.seller_id, collaboration.partner_seller_id))
+    shared = index is None
+    if shared:
+        index = get_exclusivity_index(db)
+    conflicts = index.conflicts(
+        collaboration.seller_id,
+        collaboration.partner_seller_id,
+        locations,
+        collaboration.collaboration_start_date,
+        collaboration.collaboration_end_date,
+        bool(collaboration.geographical_exclusivity),
+        settings.EXCLUSIVITY_RADIUS_KM,
+        exclude_collaboration_id=exclude_collaboration_id,
+        now=now,
+    )
+    return _still_running(db, conflicts) if shared and conflicts else conflicts
+
+
+def _still_running(db: Session, conflicts: List[RegionConflict]) -> List[RegionConflict]:
+    # Deletions and expiries don't pass through the sync, since they can only lift conflicts:
+    # a conflict with a collaboration that is gone drops it from the index instead
+    ids = {conflict.collaboration_id for conflict in conflicts}
+    running = set(db.execute(
+        select(CollaborationModel.id).where(CollaborationModel.id.in_(ids), CollaborationModel.expired_at.is_(None))
+    ).scalars())
+    if running != ids:
+        exclusivity_index.remove_many(ids - running)
+    return [conflict for conflict in conflicts if conflict.collaboration_id in running]
+
+
+def sync_exclusivity_index(db: Session, seller_ids: Iterable[int]) -> None:
+    """
+    Catch the exclusivity index up with the writes of other processes that a check involving
+    the given sellers depends on: their collaborations written since they were last synced,
+    and the collaborations of any seller whose warehouse moved. Both are found through the
+    updated_at indexes, and only rows the index hasn't applied at their updated_at are read
+    in full, so a check costs a few index probes rather than a reload.
+
+    Call it with the sellers locked (see lock_sellers): every write that could conflict with
+    them has then committed, and is read back unless it was stamped more than
+    INDEX_SYNC_MARGIN before the newest one seen. No-op until the index has been loaded.
+
+    :param db: The database session.
+    :param seller_ids: IDs of the sellers.
+    """
+    if not exclusivity_index.loaded:
+        return
+    reindex_moved_sellers(db, _seller_changes.changed_rows(db, SellerModel.id, SellerModel.latitude, SellerModel.longitude))
+
+    by_synced_at = defaultdict(list)
+    for seller_id in {seller_id for seller_id in seller_ids if seller_id is not None}:
+        by_synced_at[exclusivity_index.synced_at(seller_id)].append(seller_id)
+    for synced_at, group in by_synced_at.items():
+        group.sort()
+        for start in range(0, len(group), SELLER_LOOKUP_CHUNK):
+            chunk = group[start:start + SELLER_LOOKUP_CHUNK]
+            if synced_at is None:
+                criteria = (_involving(chunk), CollaborationModel.expired_at.is_(None))
+            else:
+                since = CollaborationModel.updated_at >= synced_at - SYNC_MARGIN
+                criteria = (or_(and_(CollaborationModel.seller_id.in_(chunk), since), and_(CollaborationModel.partner_seller_id.in_(chunk), since)),)
+            # Versions first, so that only the rows the index hasn't applied yet are read in full
+            versions = db.execute(
+                select(CollaborationModel.id, CollaborationModel.seller_id, CollaborationModel.partner_seller_id, CollaborationModel.updated_at)
+                .where(*criteria)
+            ).all()
+            outdated = exclusivity_index.outdated((row.id, row.updated_at) for row in versions)
+            for first in range(0, len(outdated), SELLER_LOOKUP_CHUNK):
+                exclusivity_index.upsert_many(_collaborations_with_locations(db, CollaborationModel.id.in_(outdated[first:first + SELLER_LOOKUP_CHUNK])))
+            latest = {}
+            for row in versions:
+                for seller_id in (row.seller_id, row.partner_seller_id):
+                    if row.updated_at is not None and (seller_id not in latest or row.updated_at > latest[seller_id]):
+                        latest[seller_id] = row.updated_at
+            for seller_id in chunk:
+                exclusivity_index.mark_synced(seller_id, latest.get(seller_id, synced_at))
+
+
+def check_exclusivity(db: Session, collaboration, exclude_collaboration_id: Optional[int] = None) -> Dict[int, SellerLocation]:
+    """
+    Raise ExclusivityConflictError if the collaboration conflicts with another one's exclusivity.
+
+    Call it in the transaction that writes the collaboration: it locks the two sellers until
+    the transaction ends and catches the index up with the database first (see
+    sync_exclusivity_index), so that concurrent writes, from this process or another one,
+    can't both pass the check. On a conflict the transaction is rolled back, which releases
+    the locks.
+
+    :return: Warehouse locations of the two sellers, for indexing the collaboration once written.
+    """
+    seller_ids = (collaboration.seller_id, collaboration.partner_seller_id)
+    lock_sellers(db, seller_ids)
+    sync_exclusivity_index(db, seller_ids)
+    locations = seller_locations(db, seller_ids)
+    conflicts = find_exclusivity_conflicts(db, collaboration, exclude_collaboration_id, locations)
+    if conflicts:
+        db.rollback()
+        raise ExclusivityConflictError(conflicts)
+    return locations
+
+
+def index_collaboration(collaboration, locations: Dict[int, SellerLocation]) -> None:
+    """
+    Add or refresh a committed collaboration in the exclusivity index.
+
+    :param collaboration: The collaboration.
+    :param locations: Warehouse locations of its sellers, as returned by check_exclusivity.
+    """
+    exclusivity_index.upsert(collaboration, locations)
+
+
+def reindex_seller_collaborations(db: Session, seller_ids: Iterable[int]) -> None:
+    """
+    Reload the running collaborations of the given sellers into the exclusivity index from
+    the database, e.g. after their warehouse moved. No-op until the index has been loaded.
+
+    :param db: The database session.
+    :param seller_ids: IDs of the sellers.
+    """
+    if not exclusivity_index.loaded:
+        return
+    seller_ids = sorted({seller_id for seller_id in seller_ids if seller_id is not None})
+    for start in range(0, len(seller_ids), SELLER_LOOKUP_CHUNK):
+        chunk = seller_ids[start:start + SELLER_LOOKUP_CHUNK]
+        exclusivity_index.upsert_many(_collaborations_with_locations(db, _involving(chunk), CollaborationModel.expired_at.is_(None)))
+
+
+def reindex_moved_sellers(db: Session, sellers) -> None:
+    """
+    Reindex the running collaborations of those of the given sellers whose warehouse is not
+    where the exclusivity index has it, e.g. of an imported batch of sellers.
+
+    :param db: The database session.
+    :param sellers: Sellers as written, with id, latitude and longitude attributes.
+    """
+    reindex_seller_collaborations(db, [
+        seller.id for seller in sellers if exclusivity_index.seller_moved(seller.id, seller.latitude, seller.longitude)
+    ])
+
+
+def unindex_collaboration(collaboration_id: int) -> None:
+    """
+    Drop a deleted collaboration from the exclusivity index.
+    """
+    exclusivity_index.remove(collaboration_id)
@@ -0,0 +1,146 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.models.b2b_contract import B2BContractModel
+from app.models.collaboration import CollaborationModel
+from app.crud.seller_stats_crud import apply_stats_delta, collaboration_stats_delta, contract_stats_delta, merge_stats_deltas
+from app.crud.outbox_crud import add_outbox_event
+from app.utils.expiry_queue import expiry_queue
+from app.utils.rabbitmq import row_data
+
+COLLABORATION = "collaboration"
+CONTRACT = "contract"
+
+# Expiring entity -> (model, end date column name, stats delta function); the entity is also the event prefix
+EXPIRY_ENTITIES = {
+    COLLABORATION: (CollaborationModel, "collaboration_end_date", collaboration_stats_delta),
+    CONTRACT: (B2BContractModel, "contract_end_date", contract_stats_delta),
+}
+_ENTITY_BY_MODEL = {model: entity for entity, (model, _, _) in EXPIRY_ENTITIES.items()}
+
+
+def expired_at_for(end_date: Optional[datetime], now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    The expired_at value of a row with this end date: the end date once it has passed, else None.
+    """
+    if end_date is not None and end_date <= (now or datetime.utcnow()):
+        return end_date
+    return None
+
+
+def set_expiry(obj, now: Optional[datetime] = None) -> None:
+    """
+    Set expired_at of a collaboration or contract from its end date, before it is written.
+    Rows whose end date passes later are flagged by the expiry scheduler.
+    """
+    _, end_column, _ = EXPIRY_ENTITIES[_ENTITY_BY_MODEL[type(obj)]]
+    obj.expired_at = expired_at_for(getattr(obj, end_column), now)
+
+
+def schedule_expiry(obj) -> None:
+    """
+    Queue (or move) the upcoming expiry of a collaboration or contract after it was committed.
+    """
+    entity = _ENTITY_BY_MODEL[type(obj)]
+    _, end_column, _ = EXPIRY_ENTITIES[entity]
+    expiry_queue.schedule(entity, obj.id, getattr(obj, end_column) if obj.expired_at is None else None)
+
+
+def unschedule_expiry(obj) -> None:
+    """
+    Drop the queued expiry of a deleted collaboration or contract.
+    """
+    expiry_queue.discard(_ENTITY_BY_MODEL[type(obj)], obj.id)
+
+
+def live_criteria(model, include_expired: bool = True) -> Tuple:
+    """
+    Filter leaving out the rows flagged as expired, unless `include_expired` is set.
+    Seller listings without expired rows seek on the same (seller column, id) indexes as the
+    full listings and skip the expired rows they meet.
+    """
+    return () if include_expired else (model.expired_at.is_(None),)
+
+
+def get_pending_expiries(db: Session, until: datetime, limit: int) -> Tuple[List[Tuple[str, int, datetime]], datetime]:
+    """
+    Load the rows that are not flagged as expired and end at or before `until`, earliest
+    first, from the partial end-date indexes.
+
+    :param db: The database session.
+    :param until: End of the window to load.
+    :param limit: Maximum number of rows loaded per entity.
+    :return: Tuple of ((entity, id, end date) rows, horizon). The horizon is `until`, or the
+        last end date loaded for an entity that hit the limit; rows sharing that end date may
+        have been cut off, and are loaded by the next refill once the loaded ones are flagged.
+    """
+    expiries = []
+    horizon = until
+    for entity, (model, end_column, _) in EXPIRY_ENTITIES.items():
+        end_date = getattr(model, end_column)
+        rows = db.execute(
+            select(model.id, end_date)
+            .where(model.expired_at.is_(None), end_date.isnot(None), end_date <= until)
+            .order_by(end_date)
+            .limit(limit)
+        ).all()
+        expiries.extend((entity, row_id, row_end) for row_id, row_end in rows)
+        if len(rows) == limit:
+            horizon = min(horizon, rows[-1][1])
+    return expiries, horizon
+
+
+def expire_rows(db: Session, entity: str, ids: List[int], now: datetime) -> List[int]:
+    """
+    Flag rows whose end date has passed as expired, move them from the sellers' active to
+    expired counters and queue an '<entity>.expired' event for each, in one transaction.
+
+    Rows are re-checked under a lock: rows already flagged, whose end date was moved past
+    `now`, or locked by another scheduler (FOR UPDATE SKIP LOCKED) are left alone, so
+    schedulers in several processes never expire a row twice.
+
+    :param db: The database session.
+    :param entity: 'collaboration' or 'contract'.
+    :param ids: IDs of the rows due for expiry.
+    :param now: The current time.
+    :return: IDs of the rows flagged.
+    """
+    model, end_column, stats_delta = EXPIRY_ENTITIES[entity]
+    end_date = getattr(model, end_column)
+    rows = db.execute(
+        select(model)
+        .where(model.id.in_(ids), model.expired_at.is_(None), end_date.isnot(None), end_date <= now)
+        .order_by(model.id)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+    if not rows:
+        db.rollback()
+        return []
+
+    deltas = []
+    for row in rows:
+        # Counted before and after the flag is set: the row leaves the active counters for the expired ones
+        deltas.append(stats_delta(row, sign=-1, now=now))
+        row.expired_at = getattr(row, end_column)
+        deltas.append(stats_delta(row, now=now))
+    apply_stats_delta(db, merge_stats_deltas(*deltas))
+    db.flush()  # Sets updated_at before the events are built
+    for row in rows:
+        add_outbox_event(db, entity, "expired", row_data(row))
+    expired = [row.id for row in rows]
+    db.commit()
+    return expired
+
+
+def count_pending_expiries(db: Session, until: datetime) -> Dict[str, int]:
+    """
+    Number of rows per entity that should already be flagged as expired but aren't.
+    """
+    counts = {}
+    for entity, (model, end_column, _) in EXPIRY_ENTITIES.items():
+        end_date = getattr(model, end_column)
+        counts[entity] = db.execute(
+            select(func.count()).select_from(model).where(model.expired_at.is_(None), end_date.isnot(None), end_date <= until)
+        ).scalar_one()
+    return counts
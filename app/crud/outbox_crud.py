@@ -0,0 +1,139 @@
+import logging
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List
+from sqlalchemy import delete, event, func, insert, select, update
+from sqlalchemy.orm import Session
+from app.models.outbox import OutboxModel
+from app.utils.rabbitmq import EventMessage, build_event
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_PENDING_KEY = "outbox_pending"  # Session.info flag: the transaction wrote outbox events
+PURGE_CHUNK_SIZE = 10000
+
+_commit_listeners: List[Callable[[], None]] = []
+
+
+def _outbox_row(message: EventMessage, now: datetime) -> Dict:
+    return {
+        "message_id": message.message_id,
+        "routing_key": message.routing_key,
+        "body": message.body.decode(),
+        "created_at": now,
+    }
+
+
+def add_outbox_event(db, entity: str, action: str, data: Dict) -> None:
+    """
+    Queue a change event in the session's current transaction; it is published by the
+    outbox relay once the transaction commits, and discarded if it rolls back.
+    Works with sync and async sessions alike (the row is written at the next flush).
+
+    :param db: The database session.
+    :param entity: 'collaboration', 'contract' or 'seller'.
+    :param action: 'created', 'updated', 'upserted' or 'deleted'.
+    :param data: The row's column values, e.g. from row_data().
+    """
+    db.add(OutboxModel(**_outbox_row(build_event(entity, action, data), datetime.utcnow())))
+    db.info[OUTBOX_PENDING_KEY] = True
+
+
+def add_outbox_events(db: Session, entity: str, action: str, rows: Iterable[Dict]) -> int:
+    """
+    Queue one change event per row with a single multi-row INSERT; see add_outbox_event.
+
+    :return: The number of events queued.
+    """
+    now = datetime.utcnow()
+    outbox_rows = [_outbox_row(build_event(entity, action, data), now) for data in rows]
+    if outbox_rows:
+        db.execute(insert(OutboxModel), outbox_rows)
+        db.info[OUTBOX_PENDING_KEY] = True
+    return len(outbox_rows)
+
+
+def add_outbox_commit_listener(listener: Callable[[], None]) -> None:
+    """
+    Call `listener` (from the committing thread) after every commit that wrote outbox
+    events, so the relay can publish them without waiting for its next poll.
+    """
+    _commit_listeners.append(listener)
+
+
+def remove_outbox_commit_listener(listener: Callable[[], None]) -> None:
+    if listener in _commit_listeners:
+        _commit_listeners.remove(listener)
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_outbox_commit(session):
+    if session.info.pop(OUTBOX_PENDING_KEY, False):
+        for listener in list(_commit_listeners):
+            try:
+                listener()
+            except Exception as e:
+                logger.warning(f"Outbox commit listener failed: {e}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_outbox_flag(session):
+    session.info.pop(OUTBOX_PENDING_KEY, None)
+
+
+def claim_outbox_batch(db: Session, limit: int):
+    """
+    Lock the oldest unpublished events, at most `limit` of them.
+
+    Rows locked by another relay are skipped (FOR UPDATE SKIP LOCKED), so several relays
+    can drain the outbox concurrently without publishing an event twice. The locks are
+    held until the session commits or rolls back.
+
+    :param db: The database session.
+    :param limit: Maximum number of events to claim.
+    :return: Rows with id, message_id, routing_key and body, in outbox order.
+    """
+    statement = (
+        select(OutboxModel.id, OutboxModel.message_id, OutboxModel.routing_key, OutboxModel.body)
+        .where(OutboxModel.published_at.is_(None))
+        .order_by(OutboxModel.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    return db.execute(statement).all()
+
+
+def mark_outbox_published(db: Session, ids: List[int], published_at: datetime) -> None:
+    """
+    Mark claimed events as published and commit, releasing the claim on all of them
+    (events not marked become claimable again).
+    """
+    if ids:
+        db.execute(update(OutboxModel).where(OutboxModel.id.in_(ids)).values(published_at=published_at))
+    db.commit()
+
+
+def purge_published_outbox(db: Session, published_before: datetime) -> int:
+    """
+    Delete events published before `published_before`, in chunks so no single statement
+    holds locks on a large part of the table.
+
+    :return: The number of events deleted.
+    """
+    deleted = 0
+    while True:
+        chunk = select(OutboxModel.id).where(OutboxModel.published_at < published_before).limit(PURGE_CHUNK_SIZE)
+        result = db.execute(delete(OutboxModel).where(OutboxModel.id.in_(chunk.scalar_subquery())))
+        db.commit()
+        deleted += result.rowcount
+        if result.rowcount < PURGE_CHUNK_SIZE:
+            return deleted
+
+
+def get_outbox_backlog(db: Session) -> Dict:
+    """
+    Number of unpublished events and the creation time of the oldest one.
+    """
+    pending, oldest = db.execute(
+        select(func.count(), func.min(OutboxModel.created_at)).where(OutboxModel.published_at.is_(None))
+    ).one()
+    return {"pending": pending, "oldest_pending_at": oldest}
@@ -1,11 +1,50 @@
+from datetime import datetime
+from typing import List
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from app.database import upsert_insert
 from app.models.seller import SellerModel
 from app.schemas.seller_schemas import SellerCreate, SellerUpdate
+from app.utils.geo_utils import try_parse_location, encode_geohash
+from app.utils.knn_index import seller_knn_index, SellerKNNIndex
+from app.utils.rabbitmq import row_data
+from app.crud.outbox_crud import add_outbox_event, add_outbox_events
+from app.crud.exclusivity_crud import SYNC_MARGIN, reindex_moved_sellers
+from app.utils.change_watermark import ChangeWatermark
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Sellers written since the nearest-seller index was loaded, by any process
+_knn_changes = ChangeWatermark(SellerModel.updated_at, SYNC_MARGIN)
+_KNN_COLUMNS = (
+    SellerModel.id,
+    SellerModel.latitude,
+    SellerModel.longitude,
+    SellerModel.is_active,
+    SellerModel.preferred_collaboration_types,
+)
+
+def _location_columns(warehouse_location) -> dict:
+    """
+    Derive the latitude, longitude and geohash columns from a warehouse location.
+    """
+    coordinates = try_parse_location(warehouse_location)
+    if coordinates:
+        return {"latitude": coordinates[0], "longitude": coordinates[1], "geohash": encode_geohash(*coordinates)}
+    return {"latitude": None, "longitude": None, "geohash": None}
+
+
+def _sync_location_index(db_seller: SellerModel):
+    """
+    Recompute the seller's coordinates and geohash from its warehouse location so radius searches stay accurate.
+    
+    :param db_seller: The seller object being written.
+    """
+    for column, value in _location_columns(db_seller.warehouse_location).items():
+        setattr(db_seller, column, value)
+
+
 def create_seller(db: Session, seller: SellerCreate):
     """
     Create a new seller and persist it to the database.
@@ -15,10 +54,14 @@ def create_seller(db: Session, seller: SellerCreate):
     :return: The newly created seller or error message.
     """
     new_seller = SellerModel(**seller.dict())
+    _sync_location_index(new_seller)
     try:
         db.add(new_seller)
+        db.flush()
+        add_outbox_event(db, "seller", "created", row_data(new_seller))
         db.commit()
         db.refresh(new_seller)
+        seller_knn_index.upsert(new_seller)
         logger.info(f"Seller created: {new_seller}")
         return new_seller
     except IntegrityError as e:
@@ -27,6 +70,58 @@ def create_seller(db: Session, seller: SellerCreate):
         raise
 
 
+def upsert_sellers(db: Session, sellers: List[SellerCreate]) -> int:
+    """
+    Insert or update many sellers, matched by email, in one transaction.
+    
+    Uses INSERT ... ON CONFLICT (email) DO UPDATE, sent as multi-row statements. Only the
+    fields present in the input are written: an existing seller keeps the columns the input
+    leaves out, and a new seller gets the table defaults for them. Sellers are grouped by the
+    set of fields they carry, one statement per group. When an email appears more than once
+    in the batch, the last occurrence wins.
+    
+    :param db: The database session.
+    :param sellers: SellerCreate schemas of the sellers to write.
+    :return: Number of sellers inserted or updated.
+    :raises IntegrityError, DataError: If the database rejects a row; nothing is written then.
+    """
+    rows = {}
+    for seller in sellers:
+        row = seller.dict(exclude_unset=True)
+        if "warehouse_location" in row:
+            row.update(_location_columns(row["warehouse_location"]))
+        rows[row["email"]] = row
+    if not rows:
+        return 0
+
+    groups = {}
+    for row in rows.values():
+        groups.setdefault(frozenset(row), []).append(row)
+
+    written = []
+    try:
+        for columns, group in groups.items():
+            insert_stmt = upsert_insert(db, SellerModel)
+            updated_columns = {column: insert_stmt.excluded[column] for column in columns if column != "email"}
+            updated_columns["updated_at"] = datetime.utcnow()
+            upsert_stmt = insert_stmt.on_conflict_do_update(
+                index_elements=[SellerModel.email], set_=updated_columns
+            ).returning(*SellerModel.__table__.columns)
+            written.extend(db.execute(upsert_stmt, group).all())
+        # Inserts and updates can't be told apart here, so imports publish 'seller.upserted'
+        add_outbox_events(db, "seller", "upserted", (seller._asdict() for seller in written))
+        db.commit()
+    except SQLAlchemyError as e:
+        logger.error(f"Error upserting sellers: {e}")
+        db.rollback()
+        raise
+
+    for seller in written:
+        seller_knn_index.upsert(seller)
+    reindex_moved_sellers(db, written)
+    return len(written)
+
+
 def get_seller_by_id(db: Session, seller_id: int):
     """
     Retrieve a seller by its ID.
@@ -51,9 +146,38 @@ def update_seller(db: Session, seller_id: int, seller: SellerUpdate):
     if not db_seller:
         return None
 
-    for key, value in seller.dict(exclude_unset=True).items():
+    updates = seller.dict(exclude_unset=True)
+    for key, value in updates.items():
         setattr(db_seller, key, value)
+    if "warehouse_location" in updates:
+        _sync_location_index(db_seller)
+    db.flush()  # Sets updated_at before the event is built
+    add_outbox_event(db, "seller", "updated", row_data(db_seller))
 
     db.commit()
     db.refresh(db_seller)
+    seller_knn_index.upsert(db_seller)
+    reindex_moved_sellers(db, [db_seller])
     return db_seller
+
+
+def get_seller_knn_index(db: Session) -> SellerKNNIndex:
+    """
+    Return the in-process nearest-seller index, loading it from the database on first use.
+    Afterwards this process's seller writes keep it current, and every call catches it up with
+    those of other processes: one probe of the sellers' updated_at index when nothing changed,
+    else the sellers written since the last call are applied.
+    
+    :param db: The database session.
+    :return: The loaded seller k-nearest-neighbour index.
+    """
+    if not seller_knn_index.loaded:
+        loaded_at = datetime.utcnow()
+        sellers = db.query(*_KNN_COLUMNS).filter(SellerModel.latitude.isnot(None)).yield_per(10000)
+        seller_knn_index.load(sellers)
+        _knn_changes.reset(loaded_at)
+        logger.info(f"Seller nearest-neighbour index loaded with {len(seller_knn_index)} sellers")
+        return seller_knn_index
+    for seller in _knn_changes.changed_rows(db, *_KNN_COLUMNS):
+        seller_knn_index.upsert(seller)
+    return seller_knn_index
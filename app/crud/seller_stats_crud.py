@@ -0,0 +1,264 @@
+import math
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Optional
+from sqlalchemy import and_, case, func, or_, select
+from sqlalchemy.orm import Session
+from app.database import upsert_insert
+from app.models.b2b_contract import B2BContractModel
+from app.models.collaboration import CollaborationModel
+from app.models.seller import SellerModel
+from app.models.seller_stats import SellerStatsModel
+import logging
+
+logger = logging.getLogger(__name__)
+
+COUNTER_COLUMNS = (
+    "collaboration_count",
+    "b2b_collaboration_count",
+    "b2c_collaboration_count",
+    "active_collaboration_count",
+    "expired_collaboration_count",
+    "collaboration_revenue_share_total",
+    "collaboration_revenue_share_count",
+    "contract_count",
+    "active_contract_count",
+    "expired_contract_count",
+    "contract_revenue_share_total",
+    "contract_revenue_share_count",
+)
+
+# Seller id -> {counter column: amount to add}
+StatsDelta = Dict[int, Dict[str, float]]
+
+
+def _status(start_date: Optional[datetime], expired_at: Optional[datetime], now: datetime) -> Optional[str]:
+    # Expired comes from the stored flag, not the end date, so a row is removed from the
+    # counters it was added to even when its end date passed after it was written: those
+    # are moved to the expired counters by the expiry scheduler, not by the clock.
+    # None means not started yet
+    if expired_at is not None:
+        return "expired"
+    if start_date is None or start_date <= now:
+        return "active"
+    return None
+
+
+def _delta_for_sellers(seller_id: int, partner_seller_id: int, counters: Dict[str, float], sign: int) -> StatsDelta:
+    # A row where the seller is its own partner counts once
+    return {seller: {column: sign * value for column, value in counters.items()} for seller in {seller_id, partner_seller_id}}
+
+
+def collaboration_stats_delta(collaboration, sign: int = 1, now: Optional[datetime] = None) -> StatsDelta:
+    """
+    Counter changes caused by adding (sign=1) or removing (sign=-1) a collaboration.
+
+    :param collaboration: The collaboration object, with the values it has (or had) in the database, expired_at included.
+    :param sign: 1 when the collaboration is written, -1 when it is removed or before it is changed.
+    :param now: Reference time for whether the collaboration has started; defaults to the current UTC time.
+    :return: Counter changes per seller.
+    """
+    status = _status(collaboration.collaboration_start_date, collaboration.expired_at, now or datetime.utcnow())
+    collaboration_type = (collaboration.collaboration_type or "").upper()
+    share = collaboration.revenue_sharing_percentage
+    counters = {
+        "collaboration_count": 1,
+        "b2b_collaboration_count": int(collaboration_type == "B2B"),
+        "b2c_collaboration_count": int(collaboration_type == "B2C"),
+        "active_collaboration_count": int(status == "active"),
+        "expired_collaboration_count": int(status == "expired"),
+        "collaboration_revenue_share_total": share or 0.0,
+        "collaboration_revenue_share_count": int(share is not None),
+    }
+    return _delta_for_sellers(collaboration.seller_id, collaboration.partner_seller_id, counters, sign)
+
+
+def contract_stats_delta(contract, sign: int = 1, now: Optional[datetime] = None) -> StatsDelta:
+    """
+    Counter changes caused by adding (sign=1) or removing (sign=-1) a B2B contract.
+    See collaboration_stats_delta.
+    """
+    status = _status(contract.contract_start_date, contract.expired_at, now or datetime.utcnow())
+    share = contract.revenue_sharing_percentage
+    counters = {
+        "contract_count": 1,
+        "active_contract_count": int(status == "active"),
+        "expired_contract_count": int(status == "expired"),
+        "contract_revenue_share_total": share or 0.0,
+        "contract_revenue_share_count": int(share is not None),
+    }
+    return _delta_for_sellers(contract.seller_id, contract.partner_seller_id, counters, sign)
+
+
+def merge_stats_deltas(*deltas: StatsDelta) -> StatsDelta:
+    """
+    Add up counter changes, e.g. the removal of a row's old values and the addition of its new ones.
+    """
+    merged = defaultdict(lambda: defaultdict(float))
+    for delta in deltas:
+        for seller_id, counters in delta.items():
+            for column, value in counters.items():
+                merged[seller_id][column] += value
+    return {seller_id: dict(counters) for seller_id, counters in merged.items()}
+
+
+def _upsert_stats(db: Session, rows, increment: bool) -> None:
+    insert_stmt = upsert_insert(db, SellerStatsModel)
+    table = SellerStatsModel.__table__
+    updated_columns = {
+        column: (table.c[column] + insert_stmt.excluded[column]) if increment else insert_stmt.excluded[column]
+        for column in COUNTER_COLUMNS
+    }
+    updated_columns["updated_at"] = insert_stmt.excluded.updated_at
+    db.execute(insert_stmt.on_conflict_do_update(index_elements=[table.c.seller_id], set_=updated_columns), rows)
+
+
+def apply_stats_delta(db: Session, delta: StatsDelta) -> None:
+    """
+    Add counter changes to the sellers' stats rows, creating missing rows, with one
+    INSERT ... ON CONFLICT DO UPDATE statement. Does not commit, so the change lands in the
+    same transaction as the write that caused it.
+
+    :param db: The database session.
+    :param delta: Counter changes per seller.
+    """
+    now = datetime.utcnow()
+    rows = [
+        {"seller_id": seller_id, "updated_at": now, **{column: counters.get(column, 0) for column in COUNTER_COLUMNS}}
+        for seller_id, counters in delta.items()
+        if any(counters.values())
+    ]
+    if rows:
+        _upsert_stats(db, rows, increment=True)
+
+
+def _stats_row(seller_id: int, stats: Optional[SellerStatsModel]) -> Dict:
+    row = {"seller_id": seller_id, "updated_at": stats.updated_at if stats else None}
+    for column in COUNTER_COLUMNS:
+        row[column] = getattr(stats, column) if stats else 0
+    row["average_revenue_sharing_percentage"] = (
+        row["collaboration_revenue_share_total"] / row["collaboration_revenue_share_count"]
+        if row["collaboration_revenue_share_count"] else None
+    )
+    row["average_contract_revenue_sharing_percentage"] = (
+        row["contract_revenue_share_total"] / row["contract_revenue_share_count"]
+        if row["contract_revenue_share_count"] else None
+    )
+    return row
+
+
+def get_seller_stats(db: Session, seller_id: int) -> Optional[Dict]:
+    """
+    Read a seller's collaboration and contract statistics from the stats table (a primary key lookup).
+
+    :param db: The database session.
+    :param seller_id: ID of the seller.
+    :return: The statistics, all zero for a seller without collaborations or contracts; None if the seller doesn't exist.
+    """
+    stats = db.get(SellerStatsModel, seller_id)
+    if stats is None and db.get(SellerModel, seller_id) is None:
+        return None
+    return _stats_row(seller_id, stats)
+
+
+def _side_aggregates(db: Session, model, columns: Dict[str, object]):
+    # Aggregate per seller column; the partner side skips rows where the seller is its own partner
+    for side, extra in ((model.seller_id, ()), (model.partner_seller_id, (model.partner_seller_id != model.seller_id,))):
+        statement = select(side.label("seller_id"), *(expression.label(name) for name, expression in columns.items()))
+        yield from db.execute(statement.where(*extra).group_by(side)).mappings()
+
+
+def _count_if(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def compute_seller_stats(db: Session, now: Optional[datetime] = None) -> StatsDelta:
+    """
+    Compute every seller's statistics from scratch with GROUP BY aggregates over the
+    collaborations and b2b_contracts tables.
+
+    :param db: The database session.
+    :param now: Reference time for whether a row has started; defaults to the current UTC time.
+    :return: Counters per seller, for sellers with at least one collaboration or contract.
+    """
+    now = now or datetime.utcnow()
+
+    def status_columns(model, start, prefix):
+        # Split on the expired_at flag like the write path (see _status); rows whose end date
+        # passed but aren't flagged yet move when the expiry scheduler flags them
+        return {
+            f"active_{prefix}_count": _count_if(and_(model.expired_at.is_(None), or_(start.is_(None), start <= now))),
+            f"expired_{prefix}_count": _count_if(model.expired_at.isnot(None)),
+        }
+
+    collaboration = CollaborationModel
+    contract = B2BContractModel
+    aggregates = [
+        (collaboration, {
+            "collaboration_count": func.count(),
+            "b2b_collaboration_count": _count_if(func.upper(collaboration.collaboration_type) == "B2B"),
+            "b2c_collaboration_count": _count_if(func.upper(collaboration.collaboration_type) == "B2C"),
+            **status_columns(collaboration, collaboration.collaboration_start_date, "collaboration"),
+            "collaboration_revenue_share_total": func.coalesce(func.sum(collaboration.revenue_sharing_percentage), 0.0),
+            "collaboration_revenue_share_count": func.count(collaboration.revenue_sharing_percentage),
+        }),
+        (contract, {
+            "contract_count": func.count(),
+            **status_columns(contract, contract.contract_start_date, "contract"),
+            "contract_revenue_share_total": func.coalesce(func.sum(contract.revenue_sharing_percentage), 0.0),
+            "contract_revenue_share_count": func.count(contract.revenue_sharing_percentage),
+        }),
+    ]
+
+    stats = defaultdict(lambda: dict.fromkeys(COUNTER_COLUMNS, 0))
+    for model, columns in aggregates:
+        for row in _side_aggregates(db, model, columns):
+            counters = stats[row["seller_id"]]
+            for column in columns:
+                counters[column] += row[column]
+    return dict(stats)
+
+
+def _drifted(stored: SellerStatsModel, counters: Dict[str, float]) -> bool:
+    return any(
+        not math.isclose(getattr(stored, column) or 0, counters[column], rel_tol=1e-9, abs_tol=1e-6)
+        for column in COUNTER_COLUMNS
+    )
+
+
+def reconcile_seller_stats(db: Session, now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Recompute all seller statistics and correct the stored rows that drifted: counters
+    missed by writes outside this service, rounding in the revenue share totals, and
+    collaborations that started since they were last written.
+
+    Only drifted rows are rewritten. A write committed while the aggregates run may be
+    overwritten by the older value; the next reconciliation corrects it.
+
+    :param db: The database session.
+    :param now: Reference time for whether a row has started; defaults to the current UTC time.
+    :return: Number of sellers with statistics, rows corrected and rows removed.
+    """
+    now = now or datetime.utcnow()
+    fresh = compute_seller_stats(db, now)
+    stored = {row.seller_id: row for row in db.query(SellerStatsModel)}
+
+    corrected = [
+        {"seller_id": seller_id, "updated_at": now, **counters}
+        for seller_id, counters in fresh.items()
+        if seller_id not in stored or _drifted(stored[seller_id], counters)
+    ]
+    removed = [seller_id for seller_id in stored if seller_id not in fresh]
+    try:
+        if corrected:
+            _upsert_stats(db, corrected, increment=False)
+        if removed:
+            db.query(SellerStatsModel).filter(SellerStatsModel.seller_id.in_(removed)).delete(synchronize_session=False)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    if corrected or removed:
+        logger.info(f"Seller stats reconciled: {len(corrected)} rows corrected, {len(removed)} removed")
+    return {"sellers": len(fresh), "corrected": len(corrected), "removed": len(removed)}
@@ -1,19 +1,62 @@
 from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from app.config import settings
+from app.utils.pool_metrics import instrument_engine
 
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+POOL_OPTIONS = dict(
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+)
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **POOL_OPTIONS)
+instrument_engine(engine, "sync")
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 BaseModel = declarative_base()
 
+# Async engine, only created when the async database path is enabled
+async_engine = None
+AsyncSessionLocal = None
+
+if settings.USE_ASYNC_DATABASE:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+    async_engine = create_async_engine(settings.ASYNC_DATABASE_URL, **POOL_OPTIONS)
+    instrument_engine(async_engine.sync_engine, "async")
+    # expire_on_commit=False so attributes stay readable after commit without implicit (sync) IO
+    AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# INSERT constructs supporting ON CONFLICT, per dialect
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def upsert_insert(db: Session, model):
+    """
+    An INSERT into `model`'s table for the session's database, with on_conflict_do_update
+    and on_conflict_do_nothing.
+
+    :raises NotImplementedError: If the database has no INSERT ... ON CONFLICT.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect not in _UPSERT_INSERTS:
+        raise NotImplementedError(f"Upserts into {model.__tablename__} are not supported on {dialect}")
+    return _UPSERT_INSERTS[dialect](model)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
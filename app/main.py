@@ -1,9 +1,27 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import json
+from fastapi import APIRouter, FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from app.utils.collaboration_utils import calculate_proximity
-from app.schemas.collaboration_schemas import LocationRequest
+from app.utils.collaboration_utils import calculate_proximity, iter_proximity_chunks
+from app.schemas.collaboration_schemas import LocationRequest, BatchLocationRequest
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import collaboration, category  # Assuming you have separate route files
+from app.routes import collaboration, async_collaboration, category, seller  # Assuming you have separate route files
+from app.config import settings
+from app.utils.pool_metrics import get_pool_statistics
+from app.utils.http_client import close_downstream_clients
+from app.utils.cache import get_cache_statistics
+from app.utils.single_flight import get_single_flight_statistics
+from app.utils.circuit_breaker import CircuitOpenError, get_circuit_breaker_statistics
+from app.utils.partnership_graph import partnership_graph
+from app.utils.exclusivity_index import exclusivity_index
+from app.services.seller_stats_service import reconcile_seller_stats_periodically
+from app.utils.rabbitmq import create_event_broker
+from app.services.outbox_relay import outbox_relay, get_outbox_statistics
+from app.services.catalog_replica_service import catalog_replica_consumer
+from app.crud.catalog_replica_crud import replica_freshness
+from app.services.expiry_scheduler import expiry_scheduler, get_expiry_statistics
+from app.crud.async_collaboration_crud import load_in_memory_indexes
 
 # Initialize FastAPI application with Swagger UI metadata
 app = FastAPI(
@@ -27,8 +45,83 @@ app.add_middleware(
 
 # Register your collaboration routes
 
-app.include_router(collaboration.router, prefix="/collaboration", tags=["collaboration"])
+if settings.USE_ASYNC_DATABASE:
+    app.include_router(async_collaboration.router, prefix="/collaboration", tags=["collaboration"])
+    # Endpoints without an async version keep being served by the sync router
+    async_routes = {(route.path, frozenset(route.methods)) for route in async_collaboration.router.routes}
+    sync_fallback = APIRouter()
+    sync_fallback.routes.extend(
+        route for route in collaboration.router.routes
+        if (route.path, frozenset(route.methods)) not in async_routes
+    )
+    app.include_router(sync_fallback, prefix="/collaboration", tags=["collaboration"])
+else:
+    app.include_router(collaboration.router, prefix="/collaboration", tags=["collaboration"])
 app.include_router(category.router, prefix="/categories", tags=["categories"])  # Add this line
+app.include_router(seller.router, prefix="/sellers", tags=["sellers"])
+
+@app.on_event("startup")
+async def preload_in_memory_indexes():
+    # On the async path, build the indexes in a worker thread before serving rather than
+    # on whichever request first needs them
+    if settings.USE_ASYNC_DATABASE:
+        await load_in_memory_indexes()
+
+@app.on_event("startup")
+async def start_outbox_relay():
+    broker = create_event_broker()
+    if broker is not None:
+        await outbox_relay.start(broker)
+
+@app.on_event("shutdown")
+async def stop_outbox_relay():
+    await outbox_relay.stop()
+
+# The catalog replica consumer, expiry scheduler and seller stats reconciliation are
+# single-instance jobs, off unless enabled in the settings (see app/config.py)
+@app.on_event("startup")
+async def start_catalog_replica():
+    if settings.CATALOG_REPLICA_CONSUMER_ENABLED:
+        await catalog_replica_consumer.start()
+
+@app.on_event("shutdown")
+async def stop_catalog_replica():
+    await catalog_replica_consumer.stop()
+
+@app.on_event("startup")
+async def start_expiry_scheduler():
+    if settings.EXPIRY_SCHEDULER_ENABLED:
+        await expiry_scheduler.start()
+
+@app.on_event("shutdown")
+async def stop_expiry_scheduler():
+    await expiry_scheduler.stop()
+
+@app.on_event("startup")
+async def start_seller_stats_reconciliation():
+    if settings.SELLER_STATS_RECONCILE_INTERVAL > 0:
+        app.state.seller_stats_reconciliation = asyncio.create_task(
+            reconcile_seller_stats_periodically(settings.SELLER_STATS_RECONCILE_INTERVAL)
+        )
+
+@app.on_event("shutdown")
+async def stop_seller_stats_reconciliation():
+    task = getattr(app.state, "seller_stats_reconciliation", None)
+    if task is not None:
+        task.cancel()
+
+@app.on_event("shutdown")
+async def shutdown_downstream_clients():
+    await close_downstream_clients()
+
+@app.exception_handler(CircuitOpenError)
+async def circuit_open_handler(request: Request, exc: CircuitOpenError):
+    # A downstream circuit is open and no cached value could be served
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(1, round(exc.retry_after)))},
+    )
 
 @app.post("/calculate-proximity/")
 def calculate_proximity_endpoint(locations: LocationRequest):
@@ -37,7 +130,107 @@ def calculate_proximity_endpoint(locations: LocationRequest):
         return {"distance": distance}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
-    
+
+
+MAX_PROXIMITY_BATCH_CELLS = 1_000_000  # Largest distance matrix served by a single request
+
+@app.post("/calculate-proximity/batch/")
+def calculate_proximity_batch_endpoint(request: BatchLocationRequest):
+    """
+    Calculate distances from one origin to many destinations, or a full origins x destinations
+    matrix, in a single request.
+
+    The matrix is computed and written out a block of rows at a time, so neither it nor its
+    JSON is ever held whole.
+    """
+    if (request.origin is None) == (request.origins is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of 'origin' or 'origins'.")
+
+    origin_count = 1 if request.origin is not None else len(request.origins)
+    if origin_count * len(request.destinations) > MAX_PROXIMITY_BATCH_CELLS:
+        raise HTTPException(status_code=413, detail=f"Batch too large; at most {MAX_PROXIMITY_BATCH_CELLS} distances per request.")
+
+    try:
+        # Parses every coordinate up front, so bad input is rejected before the response starts
+        blocks = iter_proximity_chunks([request.origin] if request.origin is not None else request.origins, request.destinations)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def generate():
+        # Same body as {"distances": ...}: a flat list for a single origin, one list per origin otherwise
+        yield '{"distances": '
+        if request.origin is not None:
+            yield json.dumps(next(blocks)[1][0].tolist())
+        else:
+            yield "["
+            for start, block in blocks:
+                yield ("," if start else "") + ",".join(json.dumps(row) for row in block.tolist())
+            yield "]"
+        yield "}"
+
+    return StreamingResponse(generate(), media_type="application/json")
+
 @app.get("/", tags=["Health"])
 def read_root():
     return {"message": "Collaboration Service is running"}
+
+@app.get("/health/db-pool", tags=["Health"])
+def read_db_pool_statistics():
+    """
+    Connection pool statistics: live checked-out/overflow counts, checkout wait-time histogram,
+    overflow connections and checkout timeouts since startup.
+    """
+    return {"pools": get_pool_statistics()}
+
+@app.get("/health/cache", tags=["Health"])
+def read_cache_statistics():
+    """
+    Hit/miss counters of the category and brand lookup caches, and how many concurrent
+    lookups were coalesced into a shared upstream call.
+    """
+    return {"caches": get_cache_statistics(), "single_flight": get_single_flight_statistics()}
+
+@app.get("/health/downstream", tags=["Health"])
+def read_downstream_statistics():
+    """
+    Circuit breaker state of each downstream service (closed, open or half_open).
+    """
+    return {"circuit_breakers": get_circuit_breaker_statistics()}
+
+@app.get("/health/partnership-graph", tags=["Health"])
+def read_partnership_graph_statistics():
+    """
+    Size of the in-memory partnership graph and the writes not yet folded into its arrays.
+    """
+    return {"partnership_graph": partnership_graph.stats()}
+
+@app.get("/health/exclusivity", tags=["Health"])
+def read_exclusivity_statistics():
+    """
+    Size of the in-memory geographical exclusivity index and the writes not yet folded into its arrays.
+    """
+    return {"exclusivity_index": exclusivity_index.stats()}
+
+@app.get("/health/events", tags=["Health"])
+def read_event_statistics():
+    """
+    Change event outbox: events waiting to be published and the age of the oldest one,
+    and the relay's batches, failures and throughput.
+    """
+    return {"outbox": get_outbox_statistics()}
+
+@app.get("/health/catalog-replica", tags=["Health"])
+def read_catalog_replica_statistics():
+    """
+    Local category/brand replica: event consumer counters, how far behind each replica is
+    and how many lookups it served versus sent to the owning services.
+    """
+    return {"consumer": catalog_replica_consumer.stats(), "freshness": replica_freshness.stats()}
+
+@app.get("/health/expiry", tags=["Health"])
+def read_expiry_statistics():
+    """
+    Expiry scheduler: queued upcoming expiries, rows flagged so far, and the rows whose end
+    date has passed but that aren't flagged yet.
+    """
+    return {"expiry": get_expiry_statistics()}
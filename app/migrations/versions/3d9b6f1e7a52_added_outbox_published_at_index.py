@@ -0,0 +1,26 @@
+"""Added outbox published_at index for purging published events
+
+Revision ID: 3d9b6f1e7a52
+Revises: e1a7b3c90f24
+Create Date: 2026-10-17 21:48:12.905316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3d9b6f1e7a52'
+down_revision: Union[str, None] = 'e1a7b3c90f24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_outbox_published_at', 'outbox', ['published_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_outbox_published_at', table_name='outbox')
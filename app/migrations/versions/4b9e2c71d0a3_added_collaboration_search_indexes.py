@@ -0,0 +1,36 @@
+"""Added category, product and end-date indexes for collaboration search
+
+Revision ID: 4b9e2c71d0a3
+Revises: dd13558c1c47
+Create Date: 2026-10-17 14:21:09.318274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b9e2c71d0a3'
+down_revision: Union[str, None] = 'dd13558c1c47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_collaborations_category_id_id', 'collaborations',
+                    ['category_id', 'id'], unique=False)
+    op.create_index('ix_collaborations_product_id_id', 'collaborations',
+                    ['product_id', 'id'], unique=False)
+    op.create_index('ix_collaborations_seller_id_end_date_id', 'collaborations',
+                    ['seller_id', 'collaboration_end_date', 'id'], unique=False)
+    op.create_index('ix_collaborations_partner_seller_id_end_date_id', 'collaborations',
+                    ['partner_seller_id', 'collaboration_end_date', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_collaborations_partner_seller_id_end_date_id', table_name='collaborations')
+    op.drop_index('ix_collaborations_seller_id_end_date_id', table_name='collaborations')
+    op.drop_index('ix_collaborations_product_id_id', table_name='collaborations')
+    op.drop_index('ix_collaborations_category_id_id', table_name='collaborations')
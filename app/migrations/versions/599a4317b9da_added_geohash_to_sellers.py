@@ -0,0 +1,77 @@
+"""Added geohash column to sellers for radius searches
+
+Revision ID: 599a4317b9da
+Revises: 7c1a09141f4b
+Create Date: 2026-10-17 09:12:41.305118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '599a4317b9da'
+down_revision: Union[str, None] = '7c1a09141f4b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Copies of the geo_utils helpers as they were when this revision was written, so that
+# later changes to the application can never change what this backfill computes
+def _parse_location(location):
+    try:
+        lat, lon = map(float, location.split(','))
+    except (AttributeError, ValueError):
+        return None
+    if not -90.0 <= lat <= 90.0 or not -180.0 <= lon <= 180.0:
+        return None
+    return lat, lon
+
+
+def _encode_geohash(lat, lon, precision=9):
+    alphabet = "0123456789bcdefghjkmnpqrstuvwxyz"
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bit, ch, even = 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            ch = (ch << 1) | 1
+            rng[0] = mid
+        else:
+            ch = ch << 1
+            rng[1] = mid
+        even = not even
+        bit += 1
+        if bit == 5:
+            chars.append(alphabet[ch])
+            bit, ch = 0, 0
+    return "".join(chars)
+
+
+def upgrade() -> None:
+    op.add_column('sellers', sa.Column('geohash', sa.String(length=12), nullable=True))
+    op.create_index('ix_sellers_geohash', 'sellers', ['geohash'], unique=False,
+                    postgresql_ops={'geohash': 'varchar_pattern_ops'})
+
+    # Backfill geohashes from the existing 'latitude,longitude' strings
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        "SELECT id, warehouse_location FROM sellers WHERE warehouse_location IS NOT NULL"
+    )).fetchall()
+    updates = []
+    for seller_id, warehouse_location in rows:
+        coordinates = _parse_location(warehouse_location)
+        if coordinates:
+            updates.append({'id': seller_id, 'geohash': _encode_geohash(*coordinates)})
+    if updates:
+        bind.execute(sa.text("UPDATE sellers SET geohash = :geohash WHERE id = :id"), updates)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sellers_geohash', table_name='sellers')
+    op.drop_column('sellers', 'geohash')
@@ -0,0 +1,32 @@
+"""Added keyset pagination indexes on collaborations and b2b_contracts
+
+Revision ID: 798f798777ea
+Revises: eff2f7724cfc
+Create Date: 2026-10-17 11:20:05.613207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '798f798777ea'
+down_revision: Union[str, None] = 'eff2f7724cfc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_collaborations_seller_id_id', 'collaborations', ['seller_id', 'id'], unique=False)
+    op.create_index('ix_collaborations_partner_seller_id_id', 'collaborations', ['partner_seller_id', 'id'], unique=False)
+    op.create_index('ix_b2b_contracts_seller_id_id', 'b2b_contracts', ['seller_id', 'id'], unique=False)
+    op.create_index('ix_b2b_contracts_partner_seller_id_id', 'b2b_contracts', ['partner_seller_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_b2b_contracts_partner_seller_id_id', table_name='b2b_contracts')
+    op.drop_index('ix_b2b_contracts_seller_id_id', table_name='b2b_contracts')
+    op.drop_index('ix_collaborations_partner_seller_id_id', table_name='collaborations')
+    op.drop_index('ix_collaborations_seller_id_id', table_name='collaborations')
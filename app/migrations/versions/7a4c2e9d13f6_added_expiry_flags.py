@@ -0,0 +1,51 @@
+"""Added expired_at flags and end-date indexes for the expiry scheduler
+
+Revision ID: 7a4c2e9d13f6
+Revises: 3d9b6f1e7a52
+Create Date: 2026-10-17 22:31:05.482913
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a4c2e9d13f6'
+down_revision: Union[str, None] = '3d9b6f1e7a52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Table -> end date column
+TABLES = {'collaborations': 'collaboration_end_date', 'b2b_contracts': 'contract_end_date'}
+
+
+def upgrade() -> None:
+    now = datetime.utcnow()
+    for table, end_column in TABLES.items():
+        op.add_column(table, sa.Column('expired_at', sa.DateTime(), nullable=True))
+        # Rows that already ended are flagged here, so the scheduler doesn't emit events
+        # or move seller counters for them
+        op.execute(
+            sa.text(f'UPDATE {table} SET expired_at = {end_column} WHERE {end_column} <= :now').bindparams(now=now)
+        )
+        pending = f'expired_at IS NULL AND {end_column} IS NOT NULL'
+        op.create_index(f'ix_{table}_pending_expiry', table, [end_column], unique=False,
+                        postgresql_where=sa.text(pending),
+                        sqlite_where=sa.text(pending))
+        op.create_index(f'ix_{table}_seller_id_id_live', table, ['seller_id', 'id'], unique=False,
+                        postgresql_where=sa.text('expired_at IS NULL'),
+                        sqlite_where=sa.text('expired_at IS NULL'))
+        op.create_index(f'ix_{table}_partner_seller_id_id_live', table, ['partner_seller_id', 'id'], unique=False,
+                        postgresql_where=sa.text('expired_at IS NULL'),
+                        sqlite_where=sa.text('expired_at IS NULL'))
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.drop_index(f'ix_{table}_partner_seller_id_id_live', table_name=table)
+        op.drop_index(f'ix_{table}_seller_id_id_live', table_name=table)
+        op.drop_index(f'ix_{table}_pending_expiry', table_name=table)
+        op.drop_column(table, 'expired_at')
@@ -0,0 +1,116 @@
+"""Added seller_collaboration_stats table
+
+Revision ID: 8f31a6c2e95b
+Revises: 4b9e2c71d0a3
+Create Date: 2026-10-17 15:40:27.581903
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f31a6c2e95b'
+down_revision: Union[str, None] = '4b9e2c71d0a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNTER_COLUMNS = [
+    ('collaboration_count', sa.Integer()),
+    ('b2b_collaboration_count', sa.Integer()),
+    ('b2c_collaboration_count', sa.Integer()),
+    ('active_collaboration_count', sa.Integer()),
+    ('expired_collaboration_count', sa.Integer()),
+    ('collaboration_revenue_share_total', sa.Float()),
+    ('collaboration_revenue_share_count', sa.Integer()),
+    ('contract_count', sa.Integer()),
+    ('active_contract_count', sa.Integer()),
+    ('expired_contract_count', sa.Integer()),
+    ('contract_revenue_share_total', sa.Float()),
+    ('contract_revenue_share_count', sa.Integer()),
+]
+
+# The tables as of this revision, so the backfill doesn't depend on the current models
+stats_table = sa.table('seller_collaboration_stats', sa.column('seller_id'), sa.column('updated_at'),
+                       *[sa.column(name) for name, _ in COUNTER_COLUMNS])
+collaborations = sa.table('collaborations', sa.column('seller_id'), sa.column('partner_seller_id'),
+                          sa.column('collaboration_type'), sa.column('revenue_sharing_percentage'),
+                          sa.column('collaboration_start_date'), sa.column('collaboration_end_date'))
+contracts = sa.table('b2b_contracts', sa.column('seller_id'), sa.column('partner_seller_id'),
+                     sa.column('revenue_sharing_percentage'),
+                     sa.column('contract_start_date'), sa.column('contract_end_date'))
+
+
+def _flag(condition):
+    return sa.case((condition, 1), else_=0)
+
+
+def _per_row_counters(now):
+    # Each table's contribution to every counter, one row per collaboration or contract
+    c, k = collaborations.c, contracts.c
+    zero_contract = {name: sa.literal(0) for name, _ in COUNTER_COLUMNS if 'contract' in name}
+    zero_collaboration = {name: sa.literal(0) for name, _ in COUNTER_COLUMNS if 'contract' not in name}
+    return [
+        (collaborations, {
+            'collaboration_count': sa.literal(1),
+            'b2b_collaboration_count': _flag(sa.func.upper(c.collaboration_type) == 'B2B'),
+            'b2c_collaboration_count': _flag(sa.func.upper(c.collaboration_type) == 'B2C'),
+            'active_collaboration_count': _flag(sa.and_(
+                sa.or_(c.collaboration_end_date.is_(None), c.collaboration_end_date > now),
+                sa.or_(c.collaboration_start_date.is_(None), c.collaboration_start_date <= now),
+            )),
+            'expired_collaboration_count': _flag(sa.and_(c.collaboration_end_date.isnot(None), c.collaboration_end_date <= now)),
+            'collaboration_revenue_share_total': sa.func.coalesce(c.revenue_sharing_percentage, 0.0),
+            'collaboration_revenue_share_count': _flag(c.revenue_sharing_percentage.isnot(None)),
+            **zero_contract,
+        }),
+        (contracts, {
+            **zero_collaboration,
+            'contract_count': sa.literal(1),
+            'active_contract_count': _flag(sa.and_(
+                sa.or_(k.contract_end_date.is_(None), k.contract_end_date > now),
+                sa.or_(k.contract_start_date.is_(None), k.contract_start_date <= now),
+            )),
+            'expired_contract_count': _flag(sa.and_(k.contract_end_date.isnot(None), k.contract_end_date <= now)),
+            'contract_revenue_share_total': sa.func.coalesce(k.revenue_sharing_percentage, 0.0),
+            'contract_revenue_share_count': _flag(k.revenue_sharing_percentage.isnot(None)),
+        }),
+    ]
+
+
+def _stats_backfill(now):
+    """
+    INSERT ... SELECT of every seller's counters, as plain SQL so it also runs in offline (--sql) mode.
+    """
+    names = [name for name, _ in COUNTER_COLUMNS]
+    rows = []
+    for table, counters in _per_row_counters(now):
+        # Both seller columns; a row where the seller is its own partner counts once
+        for side, extra in ((table.c.seller_id, ()), (table.c.partner_seller_id, (table.c.partner_seller_id != table.c.seller_id,))):
+            rows.append(sa.select(side.label('seller_id'), *(counters[name].label(name) for name in names)).where(*extra))
+    per_row = sa.union_all(*rows).subquery()
+    totals = sa.select(
+        per_row.c.seller_id,
+        *(sa.func.sum(per_row.c[name]) for name in names),
+        sa.literal(now, sa.DateTime()),
+    ).group_by(per_row.c.seller_id)
+    return stats_table.insert().from_select(['seller_id', *names, 'updated_at'], totals)
+
+
+def upgrade() -> None:
+    op.create_table('seller_collaboration_stats',
+    sa.Column('seller_id', sa.Integer(), nullable=False),
+    *[sa.Column(name, column_type, server_default='0', nullable=False) for name, column_type in COUNTER_COLUMNS],
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['seller_id'], ['sellers.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('seller_id')
+    )
+    # Fill the table from the existing rows; afterwards it is maintained by the service
+    op.execute(_stats_backfill(datetime.utcnow()))
+
+
+def downgrade() -> None:
+    op.drop_table('seller_collaboration_stats')
@@ -0,0 +1,38 @@
+"""Added outbox table for change events
+
+Revision ID: a5f3c81d2e67
+Revises: c5e0d47a1b92
+Create Date: 2026-10-17 20:38:42.517306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a5f3c81d2e67'
+down_revision: Union[str, None] = 'c5e0d47a1b92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('outbox',
+    sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+    sa.Column('message_id', sa.String(length=32), nullable=False),
+    sa.Column('routing_key', sa.String(length=255), nullable=False),
+    sa.Column('body', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('published_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_outbox_pending', 'outbox', ['id'], unique=False,
+                    postgresql_where=sa.text('published_at IS NULL'),
+                    sqlite_where=sa.text('published_at IS NULL'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_outbox_pending', table_name='outbox')
+    op.drop_table('outbox')
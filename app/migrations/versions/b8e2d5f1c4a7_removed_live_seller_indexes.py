@@ -0,0 +1,37 @@
+"""Removed the partial live-row seller indexes
+
+Revision ID: b8e2d5f1c4a7
+Revises: 7a4c2e9d13f6
+Create Date: 2026-10-17 23:48:12.903417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e2d5f1c4a7'
+down_revision: Union[str, None] = '7a4c2e9d13f6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The (seller column, id) indexes of all rows serve the listings without expired rows as well
+TABLES = ('collaborations', 'b2b_contracts')
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.drop_index(f'ix_{table}_partner_seller_id_id_live', table_name=table)
+        op.drop_index(f'ix_{table}_seller_id_id_live', table_name=table)
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.create_index(f'ix_{table}_seller_id_id_live', table, ['seller_id', 'id'], unique=False,
+                        postgresql_where=sa.text('expired_at IS NULL'),
+                        sqlite_where=sa.text('expired_at IS NULL'))
+        op.create_index(f'ix_{table}_partner_seller_id_id_live', table, ['partner_seller_id', 'id'], unique=False,
+                        postgresql_where=sa.text('expired_at IS NULL'),
+                        sqlite_where=sa.text('expired_at IS NULL'))
@@ -0,0 +1,25 @@
+"""Added the seller updated_at index
+
+Revision ID: c3f9a1d7e2b6
+Revises: b8e2d5f1c4a7
+Create Date: 2026-10-18 10:21:37.512094
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f9a1d7e2b6'
+down_revision: Union[str, None] = 'b8e2d5f1c4a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_sellers_updated_at', 'sellers', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sellers_updated_at', table_name='sellers')
@@ -0,0 +1,30 @@
+"""Added seller/partner + updated_at indexes on collaborations for ETag probes
+
+Revision ID: c5e0d47a1b92
+Revises: 8f31a6c2e95b
+Create Date: 2026-10-17 16:52:13.064718
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e0d47a1b92'
+down_revision: Union[str, None] = '8f31a6c2e95b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_collaborations_seller_id_updated_at', 'collaborations',
+                    ['seller_id', 'updated_at'], unique=False)
+    op.create_index('ix_collaborations_partner_seller_id_updated_at', 'collaborations',
+                    ['partner_seller_id', 'updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_collaborations_partner_seller_id_updated_at', table_name='collaborations')
+    op.drop_index('ix_collaborations_seller_id_updated_at', table_name='collaborations')
@@ -0,0 +1,26 @@
+"""Added logistics_sharing column to collaborations
+
+Revision ID: cb06a428c8d6
+Revises: 798f798777ea
+Create Date: 2026-10-17 11:34:52.108364
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cb06a428c8d6'
+down_revision: Union[str, None] = '798f798777ea'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('collaborations', sa.Column('logistics_sharing', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+
+def downgrade() -> None:
+    op.drop_column('collaborations', 'logistics_sharing')
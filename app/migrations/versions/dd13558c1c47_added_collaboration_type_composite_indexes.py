@@ -0,0 +1,30 @@
+"""Added seller/partner + collaboration_type composite indexes on collaborations
+
+Revision ID: dd13558c1c47
+Revises: cb06a428c8d6
+Create Date: 2026-10-17 12:02:44.925611
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'dd13558c1c47'
+down_revision: Union[str, None] = 'cb06a428c8d6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_collaborations_seller_id_type_id', 'collaborations',
+                    ['seller_id', 'collaboration_type', 'id'], unique=False)
+    op.create_index('ix_collaborations_partner_seller_id_type_id', 'collaborations',
+                    ['partner_seller_id', 'collaboration_type', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_collaborations_partner_seller_id_type_id', table_name='collaborations')
+    op.drop_index('ix_collaborations_seller_id_type_id', table_name='collaborations')
@@ -0,0 +1,59 @@
+"""Added local category/brand replica: brands table, replica columns and sync state
+
+Revision ID: e1a7b3c90f24
+Revises: a5f3c81d2e67
+Create Date: 2026-10-17 21:06:41.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1a7b3c90f24'
+down_revision: Union[str, None] = 'a5f3c81d2e67'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('brands',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('description', sa.String(length=500), nullable=True),
+    sa.Column('logo_url', sa.String(length=255), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('replicated_at', sa.DateTime(), nullable=True),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_brands_id'), 'brands', ['id'], unique=False)
+    op.create_index(op.f('ix_brands_name'), 'brands', ['name'], unique=False)
+    op.create_table('catalog_replica_state',
+    sa.Column('entity', sa.String(length=32), nullable=False),
+    sa.Column('bootstrapped_at', sa.DateTime(), nullable=True),
+    sa.Column('synced_at', sa.DateTime(), nullable=True),
+    sa.Column('last_event_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('entity')
+    )
+    op.add_column('categories', sa.Column('replicated_at', sa.DateTime(), nullable=True))
+    op.add_column('categories', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+    # Names are unique in the category-service; on the replica a rename can arrive before the delete it depends on
+    op.drop_index('ix_categories_name', table_name='categories')
+    op.create_index(op.f('ix_categories_name'), 'categories', ['name'], unique=False)
+    op.create_index('ix_category_brand_category_id', 'category_brand', ['category_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_category_brand_category_id', table_name='category_brand')
+    op.drop_index(op.f('ix_categories_name'), table_name='categories')
+    op.create_index('ix_categories_name', 'categories', ['name'], unique=True)
+    op.drop_column('categories', 'deleted_at')
+    op.drop_column('categories', 'replicated_at')
+    op.drop_table('catalog_replica_state')
+    op.drop_index(op.f('ix_brands_name'), table_name='brands')
+    op.drop_index(op.f('ix_brands_id'), table_name='brands')
+    op.drop_table('brands')
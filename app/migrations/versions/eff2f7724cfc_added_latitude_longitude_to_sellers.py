@@ -0,0 +1,57 @@
+"""Added latitude and longitude columns to sellers
+
+Revision ID: eff2f7724cfc
+Revises: 599a4317b9da
+Create Date: 2026-10-17 10:03:17.482930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'eff2f7724cfc'
+down_revision: Union[str, None] = '599a4317b9da'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _parse_location(location):
+    # geo_utils.try_parse_location inlined, so the migration doesn't depend on app code
+    try:
+        lat, lon = map(float, location.split(','))
+    except (AttributeError, ValueError):
+        return None
+    if not -90.0 <= lat <= 90.0 or not -180.0 <= lon <= 180.0:
+        return None
+    return lat, lon
+
+
+def upgrade() -> None:
+    op.add_column('sellers', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('sellers', sa.Column('longitude', sa.Float(), nullable=True))
+
+    # Backfill coordinates from the existing 'latitude,longitude' strings
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        "SELECT id, warehouse_location FROM sellers WHERE warehouse_location IS NOT NULL"
+    )).fetchall()
+    updates = []
+    for seller_id, warehouse_location in rows:
+        coordinates = _parse_location(warehouse_location)
+        if coordinates:
+            updates.append({'id': seller_id, 'latitude': coordinates[0], 'longitude': coordinates[1]})
+    if updates:
+        bind.execute(sa.text(
+            "UPDATE sellers SET latitude = :latitude, longitude = :longitude WHERE id = :id"
+        ), updates)
+
+    op.create_index('ix_sellers_latitude_longitude', 'sellers', ['latitude', 'longitude'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sellers_latitude_longitude', table_name='sellers')
+    op.drop_column('sellers', 'longitude')
+    op.drop_column('sellers', 'latitude')
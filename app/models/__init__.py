@@ -4,11 +4,19 @@ from app.models.seller import SellerModel
 from app.models.category import CategoryModel
 from app.models.product import ProductModel
 from app.models.b2b_contract import B2BContractModel
+from app.models.seller_stats import SellerStatsModel
+from app.models.brand import BrandModel
+from app.models.catalog_replica import CatalogReplicaStateModel
+from app.models.outbox import OutboxModel
 
 __all__ = ["CollaborationModel", 
            "SellerModel",
            "CategoryModel",
            "ProductModel",
-           "B2BContractModel"
+           "B2BContractModel",
+           "SellerStatsModel",
+           "BrandModel",
+           "CatalogReplicaStateModel",
+           "OutboxModel"
            
            ]
\ No newline at end of file
@@ -1,10 +1,22 @@
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from app.database import BaseModel
 from datetime import datetime
 
 class B2BContractModel(BaseModel):
     __tablename__ = "b2b_contracts"
+    __table_args__ = (
+        # Keyset pagination of a seller's rows seeks on id within each seller column
+        Index("ix_b2b_contracts_seller_id_id", "seller_id", "id"),
+        Index("ix_b2b_contracts_partner_seller_id_id", "partner_seller_id", "id"),
+        # Expiry scheduler: only end dates still to be acted on are indexed, so the index stays small
+        Index(
+            "ix_b2b_contracts_pending_expiry",
+            "contract_end_date",
+            postgresql_where=text("expired_at IS NULL AND contract_end_date IS NOT NULL"),
+            sqlite_where=text("expired_at IS NULL AND contract_end_date IS NOT NULL"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     seller_id = Column(Integer, ForeignKey("sellers.id"), nullable=False)  # Reference to the seller initiating the contract
@@ -15,6 +27,7 @@ class B2BContractModel(BaseModel):
     bulk_order_threshold = Column(Integer, nullable=True)  # Minimum order size in bulk for this contract
     contract_start_date = Column(DateTime, default=datetime.utcnow)  # Start date of the contract
     contract_end_date = Column(DateTime, nullable=True)  # Optional end date of the contract
+    expired_at = Column(DateTime, nullable=True)  # The end date, once it has passed; NULL while the contract runs
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -6,11 +6,13 @@ class BrandModel(BaseModel):
     __tablename__ = 'brands'
 
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String(255), nullable=False, unique=True)  # Brand name
+    name = Column(String(255), nullable=False, index=True)  # Brand name, unique in the brand-service
     description = Column(String(500), nullable=True)  # Brand description
     logo_url = Column(String(255), nullable=True)  # Optional logo for the brand
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    replicated_at = Column(DateTime, nullable=True)  # Time of the event or snapshot this row was last written from
+    deleted_at = Column(DateTime, nullable=True)  # Set when the brand was deleted in the brand-service
 
     def __repr__(self):
         return f'<Brand {self.name}>'
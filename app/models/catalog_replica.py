@@ -0,0 +1,17 @@
+from sqlalchemy import Column, String, DateTime
+from app.database import BaseModel
+
+class CatalogReplicaStateModel(BaseModel):
+    """
+    Sync state of the local replica of one catalog entity ('categories' or 'brands'),
+    kept current from the category/brand change events.
+    """
+    __tablename__ = "catalog_replica_state"
+
+    entity = Column(String(32), primary_key=True)
+    bootstrapped_at = Column(DateTime, nullable=True)  # Time of the last full snapshot from the owning service
+    synced_at = Column(DateTime, nullable=True)  # Last time the replica was known to be caught up with the events
+    last_event_at = Column(DateTime, nullable=True)  # Time of the most recent event applied
+
+    def __repr__(self):
+        return f"<CatalogReplicaState {self.entity} - synced at {self.synced_at}>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, DateTime, Index
 from sqlalchemy.orm import relationship
 from app.database import BaseModel
 from sqlalchemy import Table, Column, Integer, ForeignKey
@@ -7,16 +7,19 @@ from sqlalchemy import Table, Column, Integer, ForeignKey
 
 category_brand_association = Table('category_brand', BaseModel.metadata,
     Column('category_id', Integer, ForeignKey('categories.id')),
-    Column('brand_id', Integer, nullable=True)
+    Column('brand_id', Integer, nullable=True),
+    Index('ix_category_brand_category_id', 'category_id'),
 )
 
 class CategoryModel(BaseModel):
     __tablename__ = "categories"
 
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String(255), nullable=False, unique=True, index=True)
+    name = Column(String(255), nullable=False, index=True)  # Unique in the category-service; not enforced on the replica
     description = Column(String(500), nullable=True)
     brand_id = Column(Integer, nullable=True)  # Stores the brand ID fetched from collaboration-service
+    replicated_at = Column(DateTime, nullable=True)  # Time of the event or snapshot this row was last written from
+    deleted_at = Column(DateTime, nullable=True)  # Set when the category was deleted in the category-service
     # Relationships
     products = relationship("ProductModel", back_populates="category")  # Link to products
     collaborations = relationship("CollaborationModel", back_populates="category")  # Link to collaborations
@@ -1,10 +1,33 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Text, Float
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Text, Float, Index, text
 from sqlalchemy.orm import relationship
 from app.database import BaseModel
 from datetime import datetime
 
 class CollaborationModel(BaseModel):
     __tablename__ = "collaborations"
+    __table_args__ = (
+        # Keyset pagination of a seller's rows seeks on id within each seller column
+        Index("ix_collaborations_seller_id_id", "seller_id", "id"),
+        Index("ix_collaborations_partner_seller_id_id", "partner_seller_id", "id"),
+        # Per-type seller listings (each side of the seller-or-partner UNION ALL)
+        Index("ix_collaborations_seller_id_type_id", "seller_id", "collaboration_type", "id"),
+        Index("ix_collaborations_partner_seller_id_type_id", "partner_seller_id", "collaboration_type", "id"),
+        # Collaboration search: category/product filters and end-date ordering per seller side
+        Index("ix_collaborations_category_id_id", "category_id", "id"),
+        Index("ix_collaborations_product_id_id", "product_id", "id"),
+        Index("ix_collaborations_seller_id_end_date_id", "seller_id", "collaboration_end_date", "id"),
+        Index("ix_collaborations_partner_seller_id_end_date_id", "partner_seller_id", "collaboration_end_date", "id"),
+        # Index-only change probes (count, max updated_at) behind the listings' ETags
+        Index("ix_collaborations_seller_id_updated_at", "seller_id", "updated_at"),
+        Index("ix_collaborations_partner_seller_id_updated_at", "partner_seller_id", "updated_at"),
+        # Expiry scheduler: only end dates still to be acted on are indexed, so the index stays small
+        Index(
+            "ix_collaborations_pending_expiry",
+            "collaboration_end_date",
+            postgresql_where=text("expired_at IS NULL AND collaboration_end_date IS NOT NULL"),
+            sqlite_where=text("expired_at IS NULL AND collaboration_end_date IS NOT NULL"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     seller_id = Column(Integer, ForeignKey("sellers.id"), nullable=False)
@@ -13,12 +36,14 @@ class CollaborationModel(BaseModel):
     product_id = Column(Integer, ForeignKey("products.id"), nullable=True)  # Collaborating on specific product (Optional)
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)  # Collaborating on category level (Optional)
     geographical_exclusivity = Column(Boolean, default=False)
+    logistics_sharing = Column(Boolean, nullable=False, default=False, server_default="false")  # Whether the sellers share logistics resources
     bulk_order_threshold = Column(Integer, nullable=True)
     revenue_sharing_percentage = Column(Float, nullable=True)
     contract_terms = Column(Text, nullable=True)
     agreement_details = Column(Text, nullable=False)
     collaboration_start_date = Column(DateTime, default=datetime.utcnow)
     collaboration_end_date = Column(DateTime, nullable=True)
+    expired_at = Column(DateTime, nullable=True)  # The end date, once it has passed; NULL while the collaboration runs
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     brand_id = Column(Integer, nullable=True)  # Stores the brand ID fetched from collaboration-service
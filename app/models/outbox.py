@@ -0,0 +1,31 @@
+from sqlalchemy import Column, BigInteger, Integer, String, Text, DateTime, Index
+from app.database import BaseModel
+from datetime import datetime
+
+class OutboxModel(BaseModel):
+    """
+    Change events written in the same transaction as the change itself and published to
+    the broker afterwards by the outbox relay, so a committed change always gets its event.
+    """
+    __tablename__ = "outbox"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)  # Publishing order
+    message_id = Column(String(32), nullable=False)  # Also the AMQP message id, for de-duplication by consumers
+    routing_key = Column(String(255), nullable=False)  # e.g. 'collaboration.created'
+    body = Column(Text, nullable=False)  # JSON-encoded event
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    published_at = Column(DateTime, nullable=True)  # Set once the broker confirmed the event; NULL while pending
+
+    __table_args__ = (
+        # Only pending events are indexed for the relay's claim query, so the index stays small
+        Index(
+            "ix_outbox_pending",
+            "id",
+            postgresql_where=published_at.is_(None),
+            sqlite_where=published_at.is_(None),
+        ),
+        Index("ix_outbox_published_at", "published_at"),  # Purging of published events
+    )
+
+    def __repr__(self):
+        return f"<Outbox {self.id} {self.routing_key}>"
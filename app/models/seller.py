@@ -1,10 +1,17 @@
-from sqlalchemy import Column, Integer, String, Boolean, Float, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, Float, DateTime, Index
 from app.database import BaseModel
 from datetime import datetime
 from sqlalchemy.orm import relationship
 
 class SellerModel(BaseModel):
     __tablename__ = "sellers"
+    __table_args__ = (
+        # Pattern ops so that prefix (LIKE 'abc%') lookups can use the index regardless of collation
+        Index("ix_sellers_geohash", "geohash", postgresql_ops={"geohash": "varchar_pattern_ops"}),
+        Index("ix_sellers_latitude_longitude", "latitude", "longitude"),
+        # Finds the sellers written since a watermark, for the in-memory indexes to catch up with other processes
+        Index("ix_sellers_updated_at", "updated_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)  # Seller's name (Company or Individual)
@@ -13,6 +20,9 @@ class SellerModel(BaseModel):
     business_license = Column(String(100), nullable=True)  # Business license (for B2B)
     address = Column(String(255), nullable=True)  # Seller's main business address
     warehouse_location = Column(String(255), nullable=True)  # Primary warehouse location
+    latitude = Column(Float, nullable=True)  # Parsed from warehouse_location
+    longitude = Column(Float, nullable=True)  # Parsed from warehouse_location
+    geohash = Column(String(12), nullable=True)  # Geohash of warehouse_location, used for radius searches
     preferred_collaboration_types = Column(String(50), nullable=True)  # Preferences: B2B, B2C, Both
     seller_rating = Column(Float, default=0.0)  # Average rating of the seller
     is_active = Column(Boolean, default=True)  # Status of seller's account
@@ -22,8 +32,8 @@ class SellerModel(BaseModel):
     # Relationships
     collaborations = relationship("CollaborationModel", foreign_keys="CollaborationModel.seller_id", back_populates="seller")
     partnership_collaborations = relationship("CollaborationModel", foreign_keys="CollaborationModel.partner_seller_id", back_populates="partner_seller")
-    b2b_contracts = relationship("B2BContractModel", back_populates="seller")
-    partner_b2b_contracts = relationship("B2BContractModel", back_populates="partner_seller")
+    b2b_contracts = relationship("B2BContractModel", foreign_keys="B2BContractModel.seller_id", back_populates="seller")
+    partner_b2b_contracts = relationship("B2BContractModel", foreign_keys="B2BContractModel.partner_seller_id", back_populates="partner_seller")
 
     def __repr__(self):
         return f'<Seller {self.name} (ID: {self.id})>'
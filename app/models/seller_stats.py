@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
+from app.database import BaseModel
+from datetime import datetime
+
+class SellerStatsModel(BaseModel):
+    """
+    Per-seller collaboration and contract counters, maintained incrementally by the
+    collaboration and contract writes and corrected by a periodic reconciliation.
+    A seller's row covers rows where it is either the seller or the partner.
+    """
+    __tablename__ = "seller_collaboration_stats"
+
+    seller_id = Column(Integer, ForeignKey("sellers.id", ondelete="CASCADE"), primary_key=True)
+    collaboration_count = Column(Integer, nullable=False, default=0, server_default="0")
+    b2b_collaboration_count = Column(Integer, nullable=False, default=0, server_default="0")
+    b2c_collaboration_count = Column(Integer, nullable=False, default=0, server_default="0")
+    active_collaboration_count = Column(Integer, nullable=False, default=0, server_default="0")  # As of the last write or reconciliation
+    expired_collaboration_count = Column(Integer, nullable=False, default=0, server_default="0")
+    collaboration_revenue_share_total = Column(Float, nullable=False, default=0.0, server_default="0")  # Sum of revenue_sharing_percentage
+    collaboration_revenue_share_count = Column(Integer, nullable=False, default=0, server_default="0")  # Collaborations that set it
+    contract_count = Column(Integer, nullable=False, default=0, server_default="0")
+    active_contract_count = Column(Integer, nullable=False, default=0, server_default="0")
+    expired_contract_count = Column(Integer, nullable=False, default=0, server_default="0")
+    contract_revenue_share_total = Column(Float, nullable=False, default=0.0, server_default="0")
+    contract_revenue_share_count = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<SellerStats {self.seller_id} - {self.collaboration_count} collaborations, {self.contract_count} contracts>"
@@ -0,0 +1,354 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.schemas.collaboration_schemas import (
+    CollaborationCreate, 
+    CollaborationUpdate, 
+    Collaboration, 
+    CollaborationPage,
+    BulkCollaborationResult,
+    CollaborationSearchPage,
+    SharedInventoryAgreement
+)
+from app.schemas.seller_schemas import Seller
+from app.crud import async_collaboration_crud
+from app.database import get_async_db
+from app.utils.collaboration_utils import DEFAULT_NEARBY_RADIUS_KM
+from app.services.enrichment_service import expand_collaborations_async
+from app.routes.collaboration_common import (
+    SearchParams,
+    SellerPageParams,
+    bad_request_on_value_error,
+    bulk_result,
+    check_bulk_size,
+    collaboration_not_modified,
+    conflict_on_exclusivity,
+    listing_not_modified,
+    search_params,
+    seller_page_params,
+    server_error,
+    set_collaboration_etag,
+)
+
+router = APIRouter()
+
+# Async counterparts of app.routes.collaboration, mounted instead of them when
+# settings.USE_ASYNC_DATABASE is enabled so requests don't hold a threadpool worker.
+
+# -------------------- BASIC COLLABORATION ENDPOINTS -------------------- #
+
+@router.post("/", response_model=Collaboration)
+async def create_collaboration(collaboration: CollaborationCreate, db: AsyncSession = Depends(get_async_db)):
+    """
+    Create a new collaboration between two sellers. 
+    This can be B2B or B2C collaboration.
+    
+    - **collaboration_type**: B2B or B2C
+    - **geographical_exclusivity**: Ensures sellers can't collaborate with others in the same region
+    
+    Rejected with a 409 if it conflicts with the geographical exclusivity of a running collaboration.
+    
+    :param collaboration: The collaboration details (seller IDs, agreement details).
+    :param db: The database session.
+    :return: The newly created collaboration.
+    """
+    with server_error("Error creating collaboration"), conflict_on_exclusivity():
+        return await async_collaboration_crud.create_collaboration(db, collaboration)
+
+
+@router.post("/bulk", response_model=BulkCollaborationResult)
+async def create_collaborations_bulk(
+    collaborations: List[CollaborationCreate],
+    partial: bool = Query(False, description="Create the valid items and report the invalid ones instead of rejecting the batch"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Create many collaborations in a single transaction, e.g. when onboarding a B2B network.
+    
+    The whole batch is validated first. By default any invalid item rejects the batch with
+    a 422 listing every error; with `partial=true` the valid items are created and the
+    invalid ones are reported by their position in the request.
+    
+    :param collaborations: The collaborations to create.
+    :param partial: Whether to create the valid items when some are invalid.
+    :param db: The database session.
+    :return: The created collaborations and the per-item errors.
+    """
+    check_bulk_size(collaborations)
+    with server_error("Error creating collaborations"):
+        created, errors = await async_collaboration_crud.create_collaborations_bulk(db, collaborations, partial)
+    return bulk_result(created, errors, partial)
+
+
+@router.get("/search", response_model=CollaborationSearchPage)
+async def search_collaborations(search: SearchParams = Depends(search_params), db: AsyncSession = Depends(get_async_db)):
+    """
+    Search collaborations with any combination of filters, one sort key and keyset pagination.
+    Each request runs exactly one SQL statement. Takes the same parameters as the sync route.
+    
+    :param search: The filters, sort key, page size, cursor and related objects to embed.
+    :param db: The database session.
+    :return: A page of matching collaborations and the cursor for the next page.
+    """
+    with bad_request_on_value_error():
+        collaborations, next_cursor = await async_collaboration_crud.search_collaborations(
+            db, search.seller_id, search.criteria, search.sort, search.descending, search.limit, search.cursor
+        )
+
+    if search.expand_fields:
+        collaborations = await expand_collaborations_async(collaborations, search.expand_fields, db)
+    return {"items": collaborations, "next_cursor": next_cursor}
+
+
+@router.get("/{collaboration_id}", response_model=Collaboration)
+async def get_collaboration(collaboration_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    """
+    Retrieve a collaboration by its ID.
+    
+    The response carries an ETag derived from updated_at. When the request's If-None-Match
+    still matches, an empty 304 is returned after looking up only the version columns.
+    
+    :param collaboration_id: The ID of the collaboration to retrieve.
+    :param request: The request, for its If-None-Match header.
+    :param response: The response, to set the ETag on.
+    :param db: The database session.
+    :return: The collaboration details if found.
+    """
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match:
+        version = await async_collaboration_crud.get_collaboration_version(db, collaboration_id)
+        unchanged = collaboration_not_modified(if_none_match, version)
+        if unchanged is not None:
+            return unchanged
+
+    collaboration = await async_collaboration_crud.get_collaboration_by_id(db, collaboration_id)
+    if not collaboration:
+        raise HTTPException(status_code=404, detail="Collaboration not found")
+    set_collaboration_etag(response, collaboration)
+    return collaboration
+
+
+@router.get("/seller/{seller_id}", response_model=CollaborationPage)
+async def get_collaborations_by_seller(
+    seller_id: int, 
+    request: Request,
+    response: Response,
+    collaboration_type: str = Query(None, description="Filter by B2B or B2C collaboration"), 
+    page: SellerPageParams = Depends(seller_page_params),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Retrieve collaborations for a specific seller, one page at a time. 
+    Can filter by collaboration type (B2B/B2C).
+    
+    Responses without expand carry an ETag derived from the count and latest updated_at of
+    the seller's collaborations; a matching If-None-Match gets an empty 304 after that
+    index-only probe, without loading the page.
+    
+    :param seller_id: The seller's ID whose collaborations are to be retrieved.
+    :param collaboration_type: Filter by 'B2B' or 'B2C'.
+    :param page: Page size, cursor, whether to include expired collaborations and related objects to embed.
+    :param request: The request, for its If-None-Match header.
+    :param response: The response, to set the ETag on.
+    :param db: The database session.
+    :return: A page of collaborations related to the seller and the cursor for the next page.
+    """
+    limit, after, include_expired, expand_fields = page
+    # Expanded items embed brand/category data the probe can't see, so they aren't conditional
+    if not expand_fields:
+        unchanged = listing_not_modified(
+            request, response, await async_collaboration_crud.get_seller_collaborations_version(db, seller_id),
+            "seller-collaborations", seller_id, collaboration_type, limit, after, include_expired,
+        )
+        if unchanged is not None:
+            return unchanged
+
+    # If a collaboration_type is provided, filter the collaborations in the same query
+    if collaboration_type:
+        collaborations, next_cursor = await async_collaboration_crud.get_collaborations_by_type(
+            db, seller_id, collaboration_type, limit, after, include_expired
+        )
+    else:
+        collaborations, next_cursor = await async_collaboration_crud.get_collaborations_by_seller(db, seller_id, limit, after, include_expired)
+    if not collaborations and after is None:
+        raise HTTPException(status_code=404, detail=f"No collaborations found for seller ID {seller_id}")
+    
+    if expand_fields:
+        collaborations = await expand_collaborations_async(collaborations, expand_fields, db)
+    return {"items": collaborations, "next_cursor": next_cursor}
+
+
+@router.put("/{collaboration_id}", response_model=Collaboration)
+async def update_collaboration(collaboration_id: int, collaboration: CollaborationUpdate, db: AsyncSession = Depends(get_async_db)):
+    """
+    Update an existing collaboration by its ID.
+    
+    :param collaboration_id: The ID of the collaboration to update.
+    :param collaboration: The updated collaboration details.
+    :param db: The database session.
+    :return: The updated collaboration.
+    """
+    with conflict_on_exclusivity():
+        updated_collaboration = await async_collaboration_crud.update_collaboration(db, collaboration_id, collaboration)
+    if not updated_collaboration:
+        raise HTTPException(status_code=404, detail="Collaboration not found")
+    return updated_collaboration
+
+
+@router.delete("/{collaboration_id}", response_model=Collaboration)
+async def delete_collaboration(collaboration_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Delete a collaboration by its ID.
+    
+    :param collaboration_id: The ID of the collaboration to delete.
+    :param db: The database session.
+    :return: The deleted collaboration object.
+    """
+    deleted_collaboration = await async_collaboration_crud.delete_collaboration(db, collaboration_id)
+    if not deleted_collaboration:
+        raise HTTPException(status_code=404, detail="Collaboration not found")
+    return deleted_collaboration
+
+
+# -------------------- NEW ADVANCED ENDPOINTS -------------------- #
+
+@router.post("/shared-inventory/{collaboration_id}", response_model=Collaboration)
+async def create_shared_inventory_agreement(
+    collaboration_id: int, 
+    agreement: SharedInventoryAgreement, 
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Create a shared inventory agreement between two sellers who have a collaboration.
+    
+    :param collaboration_id: The ID of the collaboration.
+    :param agreement: SharedInventoryAgreement schema containing the agreement details.
+    :param db: The database session.
+    :return: The collaboration with updated agreement details.
+    """
+    updated_collaboration = await async_collaboration_crud.create_shared_inventory_agreement(db, collaboration_id, agreement)
+    if not updated_collaboration:
+        raise HTTPException(status_code=404, detail="Collaboration not found or unable to create agreement.")
+    return updated_collaboration
+
+
+@router.get("/find-nearby-sellers/{seller_id}", response_model=List[Seller])
+async def find_nearby_sellers(
+    seller_id: int, 
+    location: str, 
+    radius_km: float = Query(DEFAULT_NEARBY_RADIUS_KM, gt=0, le=20000, description="Search radius in kilometers"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Find nearby sellers based on location proximity. Returns a list of nearby sellers
+    who are available for collaboration.
+    
+    :param seller_id: The ID of the seller requesting nearby sellers.
+    :param location: The location in 'latitude,longitude' format to match sellers to.
+    :param radius_km: Search radius in kilometers.
+    :param db: The database session.
+    :return: A list of nearby sellers within the radius, nearest first.
+    """
+    try:
+        nearby_sellers = await async_collaboration_crud.find_nearby_sellers(db, seller_id, location, radius_km)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not nearby_sellers:
+        raise HTTPException(status_code=404, detail="No nearby sellers found.")
+    return nearby_sellers
+
+
+@router.get("/nearest-sellers/{seller_id}", response_model=List[Seller])
+async def find_nearest_sellers(
+    seller_id: int,
+    k: int = Query(20, ge=1, le=500, description="Number of sellers to return"),
+    collaboration_type: Optional[str] = Query(None, description="Only sellers preferring B2B or B2C"),
+    active_only: bool = Query(True, description="Only active sellers"),
+    max_distance_km: Optional[float] = Query(None, gt=0, description="Optional cut-off distance in kilometers"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Rank the k closest potential partners for a seller by warehouse distance.
+    
+    :param seller_id: The ID of the seller requesting partners.
+    :param k: Number of sellers to return.
+    :param collaboration_type: Filter by preferred collaboration type ('B2B' or 'B2C').
+    :param active_only: Whether to only include active sellers.
+    :param max_distance_km: Optional cut-off distance.
+    :param db: The database session.
+    :return: A list of sellers, nearest first.
+    """
+    nearest_sellers = await async_collaboration_crud.find_nearest_sellers(
+        db, seller_id, k, collaboration_type, active_only, max_distance_km
+    )
+    if nearest_sellers is None:
+        raise HTTPException(status_code=404, detail=f"Seller with ID {seller_id} not found or has no warehouse location.")
+    return nearest_sellers
+
+
+@router.get("/contracts/{seller_id}", response_model=CollaborationPage)
+async def get_contracts_by_seller(
+    seller_id: int,
+    request: Request,
+    response: Response,
+    page: SellerPageParams = Depends(seller_page_params),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Retrieve B2B contracts for a specific seller, one page at a time.
+    Supports If-None-Match like the seller collaboration listing.
+    
+    :param seller_id: The seller's ID whose contracts are to be retrieved.
+    :param page: Page size, cursor, whether to include expired contracts and related objects to embed.
+    :param request: The request, for its If-None-Match header.
+    :param response: The response, to set the ETag on.
+    :param db: The database session.
+    :return: A page of contracts related to the seller and the cursor for the next page.
+    """
+    limit, after, include_expired, expand_fields = page
+    if not expand_fields:
+        unchanged = listing_not_modified(
+            request, response, await async_collaboration_crud.get_seller_collaborations_version(db, seller_id),
+            "seller-contracts", seller_id, limit, after, include_expired,
+        )
+        if unchanged is not None:
+            return unchanged
+
+    contracts, next_cursor = await async_collaboration_crud.get_contracts_by_seller(db, seller_id, limit, after, include_expired)
+    if not contracts and after is None:
+        raise HTTPException(status_code=404, detail=f"No contracts found for seller ID {seller_id}")
+    if expand_fields:
+        contracts = await expand_collaborations_async(contracts, expand_fields, db)
+    return {"items": contracts, "next_cursor": next_cursor}
+
+
+@router.put("/contracts/{contract_id}", response_model=Collaboration)
+async def update_b2b_contract(contract_id: int, contract_update: CollaborationUpdate, db: AsyncSession = Depends(get_async_db)):
+    """
+    Update an existing B2B contract by its ID.
+    
+    :param contract_id: The ID of the contract to update.
+    :param contract_update: The updated contract details.
+    :param db: The database session.
+    :return: The updated contract.
+    """
+    with conflict_on_exclusivity():
+        updated_contract = await async_collaboration_crud.update_b2b_contract(db, contract_id, contract_update)
+    if not updated_contract:
+        raise HTTPException(status_code=404, detail="Contract not found")
+    return updated_contract
+
+
+@router.delete("/contracts/{contract_id}", response_model=Collaboration)
+async def delete_b2b_contract(contract_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Delete a B2B contract by its ID.
+    
+    :param contract_id: The ID of the contract to delete.
+    :param db: The database session.
+    :return: The deleted contract object.
+    """
+    deleted_contract = await async_collaboration_crud.delete_b2b_contract(db, contract_id)
+    if not deleted_contract:
+        raise HTTPException(status_code=404, detail="Contract not found")
+    return deleted_contract
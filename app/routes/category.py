@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from app.schemas.category_schemas import CategoryCreate, Category
 from app.crud import category_crud
+from app.utils.circuit_breaker import CircuitOpenError
 
 router = APIRouter()
 
@@ -15,6 +16,8 @@ def create_category_endpoint(category: CategoryCreate):
     logger.info(f"Received request to create category: {category}")
     try:
         return category_crud.create_category(category.dict())
+    except CircuitOpenError:
+        raise  # Answered with 503 by the application's handler
     except Exception as e:
         logger.error(f"Error creating category: {str(e)}")
         raise HTTPException(status_code=500, detail="Error creating category")
@@ -27,6 +30,8 @@ def get_all_categories_endpoint():
     """
     try:
         return category_crud.get_all_categories()
+    except CircuitOpenError:
+        raise  # Answered with 503 by the application's handler
     except Exception as e:
         raise HTTPException(status_code=500, detail="Error retrieving categories")
 
@@ -38,6 +43,8 @@ def get_category_by_id_endpoint(category_id: int):
     """
     try:
         return category_crud.get_category_by_id(category_id)
+    except CircuitOpenError:
+        raise  # Answered with 503 by the application's handler
     except Exception as e:
         raise HTTPException(status_code=404, detail="Category not found")
 
@@ -49,5 +56,7 @@ def delete_category_endpoint(category_id: int):
     """
     try:
         return category_crud.delete_category(category_id)
+    except CircuitOpenError:
+        raise  # Answered with 503 by the application's handler
     except Exception as e:
         raise HTTPException(status_code=500, detail="Error deleting category")
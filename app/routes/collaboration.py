@@ -1,15 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 from app.schemas.collaboration_schemas import (
     CollaborationCreate, 
     CollaborationUpdate, 
     Collaboration, 
+    CollaborationPage,
+    BulkCollaborationResult,
+    CollaborationSearchPage,
+    ExclusivityCheckResult,
+    PartnerRecommendation,
+    PartnershipPath,
     SharedInventoryAgreement
 )
-from app.crud import collaboration_crud
-from app.database import get_db
-from app.utils.collaboration_utils import calculate_proximity
+from app.schemas.seller_schemas import Seller
+from app.crud import collaboration_crud, b2b_contract_crud
+from app.database import get_db, SessionLocal
+from app.utils.collaboration_utils import calculate_proximity, DEFAULT_NEARBY_RADIUS_KM
+from app.crud.exclusivity_crud import describe_conflict, find_exclusivity_conflicts
+from app.utils.export import iter_ndjson
+from app.utils.partnership_graph import DEFAULT_MAX_HOPS
+from app.services.enrichment_service import expand_collaborations
+from app.routes.collaboration_common import (
+    SearchParams,
+    SellerPageParams,
+    bad_request_on_value_error,
+    bulk_result,
+    check_bulk_size,
+    collaboration_not_modified,
+    conflict_on_exclusivity,
+    listing_not_modified,
+    search_params,
+    seller_page_params,
+    server_error,
+    set_collaboration_etag,
+)
 
 router = APIRouter()
 
@@ -24,55 +51,162 @@ def create_collaboration(collaboration: CollaborationCreate, db: Session = Depen
     - **collaboration_type**: B2B or B2C
     - **geographical_exclusivity**: Ensures sellers can't collaborate with others in the same region
     
+    Rejected with a 409 if it conflicts with the geographical exclusivity of a running collaboration.
+    
     :param collaboration: The collaboration details (seller IDs, agreement details).
     :param db: The database session.
     :return: The newly created collaboration.
     """
-    try:
+    with server_error("Error creating collaboration"), conflict_on_exclusivity():
         return collaboration_crud.create_collaboration(db, collaboration)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail="Error creating collaboration")
+
+
+@router.post("/bulk", response_model=BulkCollaborationResult)
+def create_collaborations_bulk(
+    collaborations: List[CollaborationCreate],
+    partial: bool = Query(False, description="Create the valid items and report the invalid ones instead of rejecting the batch"),
+    db: Session = Depends(get_db)
+):
+    """
+    Create many collaborations in a single transaction, e.g. when onboarding a B2B network.
+    
+    The whole batch is validated first. By default any invalid item rejects the batch with
+    a 422 listing every error; with `partial=true` the valid items are created and the
+    invalid ones are reported by their position in the request.
+    
+    :param collaborations: The collaborations to create.
+    :param partial: Whether to create the valid items when some are invalid.
+    :param db: The database session.
+    :return: The created collaborations and the per-item errors.
+    """
+    check_bulk_size(collaborations)
+    with server_error("Error creating collaborations"):
+        created, errors = collaboration_crud.create_collaborations_bulk(db, collaborations, partial)
+    return bulk_result(created, errors, partial)
+
+
+@router.post("/exclusivity/check", response_model=ExclusivityCheckResult)
+def check_collaboration_exclusivity(collaboration: CollaborationCreate, db: Session = Depends(get_db)):
+    """
+    Check whether a proposed collaboration would be accepted as far as geographical
+    exclusivity goes, without creating it.
+    
+    An exclusive collaboration binds both sellers while it runs: neither may collaborate with
+    another seller whose warehouse is within the exclusivity radius of its exclusive partner's.
+    A proposed exclusive collaboration likewise conflicts with the sellers' running
+    collaborations with partners inside that radius.
+    
+    :param collaboration: The proposed collaboration.
+    :param db: The database session.
+    :return: Whether it is allowed, and the collaborations it conflicts with.
+    """
+    conflicts = find_exclusivity_conflicts(db, collaboration)
+    return {
+        "allowed": not conflicts,
+        "conflicts": [{**conflict._asdict(), "detail": describe_conflict(conflict)} for conflict in conflicts],
+    }
+
+
+@router.get("/search", response_model=CollaborationSearchPage)
+def search_collaborations(search: SearchParams = Depends(search_params), db: Session = Depends(get_db)):
+    """
+    Search collaborations with any combination of filters, one sort key and keyset pagination.
+    Each request runs exactly one SQL statement.
+    
+    Filters: seller_id (as seller or partner), collaboration_type, category_id, product_id,
+    a date_from/date_to window the collaboration must overlap and status ('active' or 'expired').
+    The sort key is '-' prefixed for descending order; ties are broken by id.
+    
+    :param search: The filters, sort key, page size, cursor and related objects to embed.
+    :param db: The database session.
+    :return: A page of matching collaborations and the cursor for the next page.
+    """
+    with bad_request_on_value_error():
+        collaborations, next_cursor = collaboration_crud.search_collaborations(
+            db, search.seller_id, search.criteria, search.sort, search.descending, search.limit, search.cursor
+        )
+
+    if search.expand_fields:
+        collaborations = expand_collaborations(collaborations, search.expand_fields, db)
+    return {"items": collaborations, "next_cursor": next_cursor}
 
 
 @router.get("/{collaboration_id}", response_model=Collaboration)
-def get_collaboration(collaboration_id: int, db: Session = Depends(get_db)):
+def get_collaboration(collaboration_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
     """
     Retrieve a collaboration by its ID.
     
+    The response carries an ETag derived from updated_at. When the request's If-None-Match
+    still matches, an empty 304 is returned after looking up only the version columns.
+    
     :param collaboration_id: The ID of the collaboration to retrieve.
+    :param request: The request, for its If-None-Match header.
+    :param response: The response, to set the ETag on.
     :param db: The database session.
     :return: The collaboration details if found.
     """
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match:
+        version = collaboration_crud.get_collaboration_version(db, collaboration_id)
+        unchanged = collaboration_not_modified(if_none_match, version)
+        if unchanged is not None:
+            return unchanged
+
     collaboration = collaboration_crud.get_collaboration_by_id(db, collaboration_id)
     if not collaboration:
         raise HTTPException(status_code=404, detail="Collaboration not found")
+    set_collaboration_etag(response, collaboration)
     return collaboration
 
 
-@router.get("/seller/{seller_id}", response_model=List[Collaboration])
+@router.get("/seller/{seller_id}", response_model=CollaborationPage)
 def get_collaborations_by_seller(
     seller_id: int, 
+    request: Request,
+    response: Response,
     collaboration_type: str = Query(None, description="Filter by B2B or B2C collaboration"), 
+    page: SellerPageParams = Depends(seller_page_params),
     db: Session = Depends(get_db)
 ):
     """
-    Retrieve all collaborations for a specific seller. 
+    Retrieve collaborations for a specific seller, one page at a time. 
     Can filter by collaboration type (B2B/B2C).
     
+    Responses without expand carry an ETag derived from the count and latest updated_at of
+    the seller's collaborations; a matching If-None-Match gets an empty 304 after that
+    index-only probe, without loading the page.
+    
     :param seller_id: The seller's ID whose collaborations are to be retrieved.
     :param collaboration_type: Filter by 'B2B' or 'B2C'.
+    :param page: Page size, cursor, whether to include expired collaborations and related objects to embed.
+    :param request: The request, for its If-None-Match header.
+    :param response: The response, to set the ETag on.
     :param db: The database session.
-    :return: A list of collaborations related to the seller.
+    :return: A page of collaborations related to the seller and the cursor for the next page.
     """
-    collaborations = collaboration_crud.get_collaborations_by_seller(db, seller_id)
-    if not collaborations:
-        raise HTTPException(status_code=404, detail=f"No collaborations found for seller ID {seller_id}")
-    
-    # If a collaboration_type is provided, filter the collaborations
+    limit, after, include_expired, expand_fields = page
+    # Expanded items embed brand/category data the probe can't see, so they aren't conditional
+    if not expand_fields:
+        unchanged = listing_not_modified(
+            request, response, collaboration_crud.get_seller_collaborations_version(db, seller_id),
+            "seller-collaborations", seller_id, collaboration_type, limit, after, include_expired,
+        )
+        if unchanged is not None:
+            return unchanged
+
+    # If a collaboration_type is provided, filter the collaborations in the same query
     if collaboration_type:
-        collaborations = collaboration_crud.get_collaborations_by_type(db, seller_id, collaboration_type)
+        collaborations, next_cursor = collaboration_crud.get_collaborations_by_type(
+            db, seller_id, collaboration_type, limit, after, include_expired
+        )
+    else:
+        collaborations, next_cursor = collaboration_crud.get_collaborations_by_seller(db, seller_id, limit, after, include_expired)
+    if not collaborations and after is None:
+        raise HTTPException(status_code=404, detail=f"No collaborations found for seller ID {seller_id}")
     
-    return collaborations
+    if expand_fields:
+        collaborations = expand_collaborations(collaborations, expand_fields, db)
+    return {"items": collaborations, "next_cursor": next_cursor}
 
 
 @router.put("/{collaboration_id}", response_model=Collaboration)
@@ -85,7 +219,8 @@ def update_collaboration(collaboration_id: int, collaboration: CollaborationUpda
     :param db: The database session.
     :return: The updated collaboration.
     """
-    updated_collaboration = collaboration_crud.update_collaboration(db, collaboration_id, collaboration)
+    with conflict_on_exclusivity():
+        updated_collaboration = collaboration_crud.update_collaboration(db, collaboration_id, collaboration)
     if not updated_collaboration:
         raise HTTPException(status_code=404, detail="Collaboration not found")
     return updated_collaboration
@@ -128,10 +263,11 @@ def create_shared_inventory_agreement(
     return updated_collaboration
 
 
-@router.get("/find-nearby-sellers/{seller_id}", response_model=List[Collaboration])
+@router.get("/find-nearby-sellers/{seller_id}", response_model=List[Seller])
 def find_nearby_sellers(
     seller_id: int, 
     location: str, 
+    radius_km: float = Query(DEFAULT_NEARBY_RADIUS_KM, gt=0, le=20000, description="Search radius in kilometers"),
     db: Session = Depends(get_db)
 ):
     """
@@ -140,28 +276,81 @@ def find_nearby_sellers(
     
     :param seller_id: The ID of the seller requesting nearby sellers.
     :param location: The location in 'latitude,longitude' format to match sellers to.
+    :param radius_km: Search radius in kilometers.
     :param db: The database session.
-    :return: A list of nearby sellers within a certain radius.
+    :return: A list of nearby sellers within the radius, nearest first.
     """
-    nearby_sellers = collaboration_crud.find_nearby_sellers(db, seller_id, location)
+    try:
+        nearby_sellers = collaboration_crud.find_nearby_sellers(db, seller_id, location, radius_km)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not nearby_sellers:
         raise HTTPException(status_code=404, detail="No nearby sellers found.")
     return nearby_sellers
 
 
-@router.get("/contracts/{seller_id}", response_model=List[Collaboration])
-def get_contracts_by_seller(seller_id: int, db: Session = Depends(get_db)):
+@router.get("/nearest-sellers/{seller_id}", response_model=List[Seller])
+def find_nearest_sellers(
+    seller_id: int,
+    k: int = Query(20, ge=1, le=500, description="Number of sellers to return"),
+    collaboration_type: Optional[str] = Query(None, description="Only sellers preferring B2B or B2C"),
+    active_only: bool = Query(True, description="Only active sellers"),
+    max_distance_km: Optional[float] = Query(None, gt=0, description="Optional cut-off distance in kilometers"),
+    db: Session = Depends(get_db)
+):
     """
-    Retrieve all B2B contracts for a specific seller.
+    Rank the k closest potential partners for a seller by warehouse distance.
+    
+    :param seller_id: The ID of the seller requesting partners.
+    :param k: Number of sellers to return.
+    :param collaboration_type: Filter by preferred collaboration type ('B2B' or 'B2C').
+    :param active_only: Whether to only include active sellers.
+    :param max_distance_km: Optional cut-off distance.
+    :param db: The database session.
+    :return: A list of sellers, nearest first.
+    """
+    nearest_sellers = collaboration_crud.find_nearest_sellers(
+        db, seller_id, k, collaboration_type, active_only, max_distance_km
+    )
+    if nearest_sellers is None:
+        raise HTTPException(status_code=404, detail=f"Seller with ID {seller_id} not found or has no warehouse location.")
+    return nearest_sellers
+
+
+@router.get("/contracts/{seller_id}", response_model=CollaborationPage)
+def get_contracts_by_seller(
+    seller_id: int,
+    request: Request,
+    response: Response,
+    page: SellerPageParams = Depends(seller_page_params),
+    db: Session = Depends(get_db)
+):
+    """
+    Retrieve B2B contracts for a specific seller, one page at a time.
+    Supports If-None-Match like the seller collaboration listing.
     
     :param seller_id: The seller's ID whose contracts are to be retrieved.
+    :param page: Page size, cursor, whether to include expired contracts and related objects to embed.
+    :param request: The request, for its If-None-Match header.
+    :param response: The response, to set the ETag on.
     :param db: The database session.
-    :return: A list of contracts related to the seller.
+    :return: A page of contracts related to the seller and the cursor for the next page.
     """
-    contracts = collaboration_crud.get_contracts_by_seller(db, seller_id)
-    if not contracts:
+    limit, after, include_expired, expand_fields = page
+    if not expand_fields:
+        unchanged = listing_not_modified(
+            request, response, collaboration_crud.get_seller_collaborations_version(db, seller_id),
+            "seller-contracts", seller_id, limit, after, include_expired,
+        )
+        if unchanged is not None:
+            return unchanged
+
+    contracts, next_cursor = collaboration_crud.get_contracts_by_seller(db, seller_id, limit, after, include_expired)
+    if not contracts and after is None:
         raise HTTPException(status_code=404, detail=f"No contracts found for seller ID {seller_id}")
-    return contracts
+    if expand_fields:
+        contracts = expand_collaborations(contracts, expand_fields, db)
+    return {"items": contracts, "next_cursor": next_cursor}
 
 
 @router.put("/contracts/{contract_id}", response_model=Collaboration)
@@ -174,7 +363,8 @@ def update_b2b_contract(contract_id: int, contract_update: CollaborationUpdate,
     :param db: The database session.
     :return: The updated contract.
     """
-    updated_contract = collaboration_crud.update_b2b_contract(db, contract_id, contract_update)
+    with conflict_on_exclusivity():
+        updated_contract = collaboration_crud.update_b2b_contract(db, contract_id, contract_update)
     if not updated_contract:
         raise HTTPException(status_code=404, detail="Contract not found")
     return updated_contract
@@ -193,3 +383,118 @@ def delete_b2b_contract(contract_id: int, db: Session = Depends(get_db)):
     if not deleted_contract:
         raise HTTPException(status_code=404, detail="Contract not found")
     return deleted_contract
+
+
+# -------------------- PARTNERSHIP GRAPH ENDPOINTS -------------------- #
+
+@router.get("/graph/recommendations/{seller_id}", response_model=List[PartnerRecommendation])
+def recommend_partners(
+    seller_id: int,
+    collaboration_type: Optional[str] = Query(None, description="Only follow B2B or B2C collaborations"),
+    limit: int = Query(10, ge=1, le=100, description="Number of recommendations"),
+    db: Session = Depends(get_db)
+):
+    """
+    Recommend partners of a seller's partners ("partners of my partners") that the seller
+    doesn't collaborate with yet, ranked by the number of mutual partners.
+    Served from the in-memory partnership graph.
+    
+    :param seller_id: The ID of the seller requesting recommendations.
+    :param collaboration_type: Filter by collaboration type ('B2B' or 'B2C').
+    :param limit: Maximum number of recommendations.
+    :param db: The database session (used to load the graph on first use).
+    :return: A list of recommended sellers with their mutual partner counts.
+    """
+    try:
+        recommendations = collaboration_crud.get_partnership_graph(db).recommend(seller_id, collaboration_type, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return [{"seller_id": partner_id, "mutual_partners": mutual} for partner_id, mutual in recommendations]
+
+
+@router.get("/graph/path", response_model=PartnershipPath)
+def find_partnership_path(
+    source_seller_id: int = Query(..., description="First seller of the path"),
+    target_seller_id: int = Query(..., description="Last seller of the path"),
+    collaboration_type: Optional[str] = Query(None, description="Only follow B2B or B2C collaborations"),
+    max_hops: int = Query(DEFAULT_MAX_HOPS, ge=1, le=12, description="Longest path to look for, in collaborations"),
+    db: Session = Depends(get_db)
+):
+    """
+    Find a shortest chain of collaborations connecting two sellers.
+    Served from the in-memory partnership graph.
+    
+    :param source_seller_id: The seller the path starts from.
+    :param target_seller_id: The seller the path leads to.
+    :param collaboration_type: Filter by collaboration type ('B2B' or 'B2C').
+    :param max_hops: Maximum path length.
+    :param db: The database session (used to load the graph on first use).
+    :return: The seller IDs along the path.
+    """
+    try:
+        path = collaboration_crud.get_partnership_graph(db).shortest_path(
+            source_seller_id, target_seller_id, collaboration_type, max_hops
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"No path between sellers {source_seller_id} and {target_seller_id} within {max_hops} hops")
+    return {"seller_ids": path, "hops": len(path) - 1}
+
+
+# -------------------- EXPORT ENDPOINTS -------------------- #
+
+def _ndjson_export(stream_function, **filters) -> StreamingResponse:
+    # The generator outlives the endpoint call, so it owns its session rather than using get_db
+    def generate():
+        db = SessionLocal()
+        try:
+            yield from iter_ndjson(stream_function(db, **filters))
+        finally:
+            db.close()
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+@router.get("/export/collaborations")
+def export_collaborations(
+    seller_id: Optional[int] = Query(None, description="Only collaborations of this seller (as seller or partner)"),
+    created_from: Optional[datetime] = Query(None, description="Only collaborations created at or after this time"),
+    created_to: Optional[datetime] = Query(None, description="Only collaborations created before this time"),
+):
+    """
+    Export collaborations as newline-delimited JSON, one collaboration per line.
+    
+    Rows are streamed from a server-side cursor as they are read, so memory use does not
+    grow with the number of collaborations exported.
+    
+    :param seller_id: Restrict the export to one seller.
+    :param created_from: Start of the creation time window.
+    :param created_to: End (exclusive) of the creation time window.
+    :return: A streaming NDJSON response.
+    """
+    return _ndjson_export(
+        collaboration_crud.stream_collaborations, seller_id=seller_id, created_from=created_from, created_to=created_to
+    )
+
+
+@router.get("/export/contracts")
+def export_contracts(
+    seller_id: Optional[int] = Query(None, description="Only contracts of this seller (as seller or partner)"),
+    created_from: Optional[datetime] = Query(None, description="Only contracts created at or after this time"),
+    created_to: Optional[datetime] = Query(None, description="Only contracts created before this time"),
+):
+    """
+    Export B2B contracts as newline-delimited JSON, one contract per line.
+    
+    Rows are streamed from a server-side cursor as they are read, so memory use does not
+    grow with the number of contracts exported.
+    
+    :param seller_id: Restrict the export to one seller.
+    :param created_from: Start of the creation time window.
+    :param created_to: End (exclusive) of the creation time window.
+    :return: A streaming NDJSON response.
+    """
+    return _ndjson_export(
+        b2b_contract_crud.stream_contracts, seller_id=seller_id, created_from=created_from, created_to=created_to
+    )
@@ -0,0 +1,165 @@
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Set
+from fastapi import HTTPException, Query, Request, Response
+from sqlalchemy.exc import SQLAlchemyError
+from app.crud.collaboration_crud import MAX_BULK_COLLABORATIONS, collaboration_filter_criteria
+from app.crud.exclusivity_crud import ExclusivityConflictError
+from app.services.enrichment_service import parse_expand
+from app.utils.etag import make_etag, etag_matches, not_modified, set_etag
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+# Request parsing, conditional requests and error mapping shared by the sync routes in
+# app.routes.collaboration and their async counterparts in app.routes.async_collaboration,
+# so the two routers only differ in how they call the CRUD layer.
+
+logger = logging.getLogger(__name__)
+
+
+class SellerPageParams(NamedTuple):
+    limit: int
+    after: Optional[int]
+    include_expired: bool
+    expand_fields: Set[str]
+
+
+class SearchParams(NamedTuple):
+    seller_id: Optional[int]
+    criteria: tuple
+    sort: str
+    descending: bool
+    limit: int
+    cursor: Optional[str]
+    expand_fields: Set[str]
+
+
+def parse_expand_param(expand: Optional[str]) -> Set[str]:
+    """
+    Parse the `expand` query parameter, rejecting unknown fields with a 400.
+    """
+    try:
+        return parse_expand(expand)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def seller_page_params(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    after: Optional[int] = Query(None, description="Cursor from the previous page's next_cursor"),
+    include_expired: bool = Query(True, description="Whether to include rows whose end date has passed"),
+    expand: Optional[str] = Query(None, description="Comma-separated related objects to include: brand, category"),
+) -> SellerPageParams:
+    """
+    Query parameters of the seller collaboration and contract listings.
+    """
+    return SellerPageParams(limit, after, include_expired, parse_expand_param(expand))
+
+
+def search_params(
+    seller_id: Optional[int] = Query(None, description="Only collaborations of this seller (as seller or partner)"),
+    collaboration_type: Optional[str] = Query(None, description="Filter by B2B or B2C collaboration"),
+    category_id: Optional[int] = Query(None, description="Filter by category"),
+    product_id: Optional[int] = Query(None, description="Filter by product"),
+    date_from: Optional[datetime] = Query(None, description="Only collaborations still running at or after this time"),
+    date_to: Optional[datetime] = Query(None, description="Only collaborations started at or before this time"),
+    status: Optional[str] = Query(None, description="'active' or 'expired'"),
+    sort: str = Query("id", description="id, created_at, start_date or end_date; prefix with '-' for descending"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
+    expand: Optional[str] = Query(None, description="Comma-separated related objects to include: brand, category"),
+) -> SearchParams:
+    """
+    Query parameters of the collaboration search, with the filters already turned into criteria.
+    """
+    expand_fields = parse_expand_param(expand)
+    try:
+        criteria = collaboration_filter_criteria(collaboration_type, category_id, product_id, date_from, date_to, status)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return SearchParams(seller_id, criteria, sort.lstrip("-"), sort.startswith("-"), limit, cursor, expand_fields)
+
+
+@contextmanager
+def bad_request_on_value_error():
+    """
+    Turn a ValueError raised for invalid input (e.g. a malformed cursor) into a 400.
+    """
+    try:
+        yield
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@contextmanager
+def conflict_on_exclusivity():
+    """
+    Turn an ExclusivityConflictError into a 409 describing the conflicting collaborations.
+    """
+    try:
+        yield
+    except ExclusivityConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@contextmanager
+def server_error(detail: str):
+    """
+    Log a database failure of a write with its traceback and answer it with a 500 carrying
+    a generic message. Anything else propagates to the server's own error handling.
+    """
+    try:
+        yield
+    except SQLAlchemyError:
+        logger.exception(detail)
+        raise HTTPException(status_code=500, detail=detail)
+
+
+def check_bulk_size(collaborations: List) -> None:
+    if len(collaborations) > MAX_BULK_COLLABORATIONS:
+        raise HTTPException(status_code=413, detail=f"Batch too large; at most {MAX_BULK_COLLABORATIONS} collaborations per request.")
+
+
+def bulk_result(created: List, errors: Dict[int, str], partial: bool) -> Dict:
+    """
+    Response of a bulk creation: a 422 listing every error unless partial results were requested.
+    """
+    errors = [{"index": index, "detail": detail} for index, detail in sorted(errors.items())]
+    if errors and not partial:
+        raise HTTPException(status_code=422, detail=errors)
+    return {"created": created, "errors": errors}
+
+
+def collaboration_not_modified(if_none_match: str, version) -> Optional[Response]:
+    """
+    Answer a conditional read of one collaboration from its version columns alone.
+
+    :param if_none_match: The request's If-None-Match header.
+    :param version: Row of (id, updated_at), or None if the collaboration doesn't exist.
+    :return: An empty 304 if the client's copy is current, else None (load and send the row).
+    """
+    if version is None:
+        raise HTTPException(status_code=404, detail="Collaboration not found")
+    etag = make_etag("collaboration", *version)
+    return not_modified(etag) if etag_matches(if_none_match, etag) else None
+
+
+def set_collaboration_etag(response: Response, collaboration) -> None:
+    set_etag(response, make_etag("collaboration", collaboration.id, collaboration.updated_at))
+
+
+def listing_not_modified(request: Request, response: Response, version, *key) -> Optional[Response]:
+    """
+    Answer a conditional seller listing from the index-only version probe.
+
+    :param request: The request, for its If-None-Match header.
+    :param response: The response, to set the ETag on when the listing is sent.
+    :param version: Tuple of (row count, latest updated_at) of the seller's rows.
+    :param key: The listing name and every query parameter that shapes the response.
+    :return: An empty 304 if the client's copy is current, else None.
+    """
+    etag = make_etag(*key, *version)
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    return None
@@ -0,0 +1,62 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.database import get_db
+from app.schemas.seller_schemas import SellerImportReport, SellerCollaborationStats
+from app.crud import seller_stats_crud
+from app.utils.seller_import import (
+    DEFAULT_IMPORT_BATCH_SIZE,
+    detect_import_format,
+    import_sellers,
+    iter_request_body,
+    iter_text_lines,
+)
+
+router = APIRouter()
+
+
+@router.post("/import", response_model=SellerImportReport)
+def import_sellers_endpoint(
+    request: Request,
+    format: Optional[str] = Query(None, description="'csv' or 'ndjson'; defaults to the request's Content-Type"),
+    batch_size: int = Query(DEFAULT_IMPORT_BATCH_SIZE, ge=1, le=50000, description="Rows written per transaction"),
+    db: Session = Depends(get_db)
+):
+    """
+    Bulk import sellers from a CSV (with header row) or NDJSON request body.
+    
+    The body is read and parsed incrementally and upserted by email in batches, so files of
+    any size can be sent in one request. Invalid rows are skipped and reported.
+    
+    :param request: The request whose body holds the file.
+    :param format: The file format.
+    :param batch_size: Number of rows written per transaction.
+    :param db: The database session.
+    :return: Counts of processed, imported and rejected rows, and the first rejected rows.
+    """
+    import_format = format or detect_import_format(request.headers.get("content-type"))
+    if import_format is None:
+        raise HTTPException(status_code=400, detail="Cannot tell the file format; pass format=csv or format=ndjson.")
+
+    try:
+        return import_sellers(db, iter_text_lines(iter_request_body(request)), import_format, batch_size)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/{seller_id}/stats", response_model=SellerCollaborationStats)
+def get_seller_stats(seller_id: int, db: Session = Depends(get_db)):
+    """
+    Collaboration and contract statistics of a seller: counts by type, active vs. expired,
+    and average revenue sharing percentages.
+    
+    Read from the incrementally maintained stats table in a single primary key lookup.
+    
+    :param seller_id: The ID of the seller.
+    :param db: The database session.
+    :return: The seller's statistics.
+    """
+    stats = seller_stats_crud.get_seller_stats(db, seller_id)
+    if stats is None:
+        raise HTTPException(status_code=404, detail=f"Seller with ID {seller_id} not found")
+    return stats
@@ -35,6 +35,7 @@ class B2BContract(B2BContractBase):
     Schema for retrieving a B2B contract with additional fields like ID and timestamps.
     """
     id: int
+    expired_at: Optional[datetime] = Field(None, description="Set once the end date has passed")
     created_at: datetime
     updated_at: datetime
 
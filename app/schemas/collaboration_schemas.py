@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional, List, Union
+from typing import Optional, List, Union, Dict, Any
 from datetime import datetime
 
 
@@ -48,14 +48,74 @@ class Collaboration(CollaborationBase):
     bulk_order_threshold: Optional[int] = None  # Minimum bulk order threshold for B2B
     revenue_sharing_percentage: Optional[float] = None  # Revenue-sharing percentage
     logistics_sharing: bool  # Whether the sellers share logistics resources
+    category_id: Optional[int] = None  # Category the collaboration covers, if any
+    product_id: Optional[int] = None  # Product the collaboration covers, if any
+    brand_id: Optional[int] = None  # Brand (brand-service ID) the collaboration covers, if any
     collaboration_start_date: Optional[datetime] = None  # Collaboration start date
     collaboration_end_date: Optional[datetime] = None  # Collaboration end date
+    expired_at: Optional[datetime] = None  # Set once the end date has passed
     created_at: datetime  # When the collaboration was created
+    brand_details: Optional[Dict[str, Any]] = None  # Brand from the brand-service, only with ?expand=brand
+    category_details: Optional[Dict[str, Any]] = None  # Category from the category-service, only with ?expand=category
 
     class Config:
         orm_mode = True
 
 
+# One keyset page of collaborations; pass next_cursor as `after` to fetch the following page
+class CollaborationPage(BaseModel):
+    items: List[Collaboration]
+    next_cursor: Optional[int] = None  # None when this is the last page
+
+
+# A seller suggested as a partner because it already works with the requester's partners
+class PartnerRecommendation(BaseModel):
+    seller_id: int
+    mutual_partners: int  # Partners of the requesting seller that also collaborate with this seller
+
+
+# A shortest chain of collaborations linking two sellers
+class PartnershipPath(BaseModel):
+    seller_ids: List[int]  # From the source seller to the target seller
+    hops: int
+
+
+# One page of a collaboration search; pass next_cursor as `cursor` to fetch the following page
+class CollaborationSearchPage(BaseModel):
+    items: List[Collaboration]
+    next_cursor: Optional[str] = None  # Opaque; None when this is the last page
+
+
+# Why one item of a bulk creation request was rejected
+class BulkCollaborationError(BaseModel):
+    index: int  # Position of the item in the request
+    detail: str
+
+
+# Outcome of a bulk creation request; created items keep the request order
+class BulkCollaborationResult(BaseModel):
+    created: List[Collaboration]
+    errors: List[BulkCollaborationError] = []
+
+
+# A running collaboration a proposed one would conflict with over geographical exclusivity
+class ExclusivityConflict(BaseModel):
+    collaboration_id: int  # The existing collaboration
+    seller_id: int  # Seller of the proposal bound by it
+    partner_seller_id: int  # That seller's partner in the existing collaboration
+    distance_km: float  # From that partner to the proposed partner
+    exclusive: bool  # False when only the proposed collaboration is exclusive
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    detail: str
+
+
+# Outcome of checking a proposed collaboration before creating it
+class ExclusivityCheckResult(BaseModel):
+    allowed: bool
+    conflicts: List[ExclusivityConflict] = []
+
+
 # Schema for shared inventory agreement between sellers (optional)
 class SharedInventoryAgreement(BaseModel):
     products: List[int]  # List of product IDs being shared
@@ -98,6 +158,16 @@ class LocationRequest(BaseModel):
         orm_mode = True
 
 
+# Request model to calculate distances from one origin (or many origins) to many destinations
+class BatchLocationRequest(BaseModel):
+    origin: Optional[str] = None  # Single origin, returns a flat list of distances
+    origins: Optional[List[str]] = None  # Many origins, returns a distance matrix (one row per origin)
+    destinations: List[str]  # Destination coordinates as 'latitude,longitude'
+
+    class Config:
+        orm_mode = True
+
+
 # Seller Schema for additional enhancements (can be integrated with SellerService or Collaboration)
 class SellerBase(BaseModel):
     id: int
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field, BeforeValidator
 from typing_extensions import Annotated
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 PhoneNumber = Annotated[
@@ -21,7 +21,25 @@ class SellerBase(BaseModel):
     is_active: Optional[bool] = True
 
 class SellerCreate(SellerBase):
-    pass
+    # Sized like the sellers columns, so an oversized value fails validation for its row
+    # instead of failing the INSERT of a whole import batch
+    name: str = Field(max_length=255)
+    email: EmailStr = Field(max_length=255)
+    business_license: Optional[str] = Field(None, max_length=100)
+    address: Optional[str] = Field(None, max_length=255)
+    warehouse_location: Optional[str] = Field(None, max_length=255)
+    preferred_collaboration_types: Optional[str] = Field(None, max_length=50)
+
+class SellerUpdate(BaseModel):
+    name: Optional[str] = None
+    email: Optional[EmailStr] = None
+    phone_number: Optional[PhoneNumber] = None
+    business_license: Optional[str] = None
+    address: Optional[str] = None
+    warehouse_location: Optional[str] = None
+    preferred_collaboration_types: Optional[str] = None
+    seller_rating: Optional[float] = None
+    is_active: Optional[bool] = None
 
 class SellerBase(BaseModel):
     name: str
@@ -41,3 +59,29 @@ class Seller(SellerBase):
 
     class Config:
         orm_mode = True
+
+class SellerImportRejection(BaseModel):
+    row: int  # CSV line number or NDJSON line number of the rejected row
+    detail: str
+
+class SellerImportReport(BaseModel):
+    processed: int
+    imported: int
+    rejected: int
+    rejections: List[SellerImportRejection] = []  # First rejected rows only; see `rejected` for the total
+    elapsed_seconds: float
+    rows_per_second: float
+
+class SellerCollaborationStats(BaseModel):
+    seller_id: int
+    collaboration_count: int
+    b2b_collaboration_count: int
+    b2c_collaboration_count: int
+    active_collaboration_count: int  # Active/expired split as of the last write, expiry or reconciliation
+    expired_collaboration_count: int
+    average_revenue_sharing_percentage: Optional[float] = None  # None when no collaboration sets it
+    contract_count: int
+    active_contract_count: int
+    expired_contract_count: int
+    average_contract_revenue_sharing_percentage: Optional[float] = None
+    updated_at: Optional[datetime] = None
@@ -0,0 +1,54 @@
+"""
+Bulk import sellers from a CSV or NDJSON file.
+
+Usage:
+    python -m app.scripts.import_sellers sellers.csv [--format csv|ndjson] [--batch-size 5000] [--workers 4]
+
+The file is read line by line and upserted by email in batches; progress is printed to
+stderr after every batch and the final report is printed to stdout as JSON. Row validation
+is CPU-bound, so --workers validates batches in parallel processes on multi-core hosts.
+"""
+import argparse
+import json
+import sys
+from app.database import SessionLocal
+from app.utils.seller_import import DEFAULT_IMPORT_BATCH_SIZE, IMPORT_FORMATS, detect_import_format, import_sellers
+
+
+def print_progress(report):
+    print(
+        f"{report['processed']} rows processed, {report['imported']} imported, "
+        f"{report['rejected']} rejected ({report['rows_per_second']} rows/s)",
+        file=sys.stderr,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import sellers from a CSV or NDJSON file.")
+    parser.add_argument("path", help="File to import; '-' reads standard input")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="File format; defaults to the file extension")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_IMPORT_BATCH_SIZE, help="Rows written per transaction")
+    parser.add_argument("--workers", type=int, default=1, help="Processes validating rows in parallel")
+    args = parser.parse_args(argv)
+
+    import_format = args.format or detect_import_format(args.path)
+    if import_format is None:
+        parser.error("cannot tell the file format from the file name; pass --format")
+
+    db = SessionLocal()
+    try:
+        if args.path == "-":
+            report = import_sellers(db, sys.stdin, import_format, args.batch_size, print_progress, args.workers)
+        else:
+            with open(args.path, newline="", encoding="utf-8") as lines:
+                report = import_sellers(db, lines, import_format, args.batch_size, print_progress, args.workers)
+    finally:
+        db.close()
+
+    json.dump(report, sys.stdout, indent=2)
+    print()
+    return 1 if report["rejected"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,23 @@
+"""
+Recompute the per-seller collaboration stats and correct rows that drifted.
+
+Usage:
+    python -m app.scripts.reconcile_seller_stats
+
+The service instance configured with SELLER_STATS_RECONCILE_INTERVAL also runs this
+periodically; the script is for running it on demand (e.g. after a data migration) or from
+cron when the in-process job is disabled, as it is by default. The report is printed to stdout as JSON.
+"""
+import json
+import sys
+from app.services.seller_stats_service import reconcile_seller_stats_once
+
+
+def main():
+    json.dump(reconcile_seller_stats_once(), sys.stdout, indent=2)
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
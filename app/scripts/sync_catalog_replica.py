@@ -0,0 +1,29 @@
+"""
+Refresh the local category/brand replica from full listings of the category and brand services.
+
+Usage:
+    python -m app.scripts.sync_catalog_replica [categories|brands ...]
+
+The instance running the event consumer (CATALOG_REPLICA_CONSUMER_ENABLED) bootstraps the
+replica by itself once subscribed, and repeats it every CATALOG_REPLICA_RESYNC_INTERVAL seconds; the script is for filling it on
+demand (e.g. before enabling the replica on a new environment). The report is printed to
+stdout as JSON.
+"""
+import json
+import sys
+from app.services.catalog_replica_service import SNAPSHOT_SOURCES, sync_catalog_replica_once
+
+
+def main(argv=None):
+    entities = (argv if argv is not None else sys.argv[1:]) or list(SNAPSHOT_SOURCES)
+    unknown = [entity for entity in entities if entity not in SNAPSHOT_SOURCES]
+    if unknown:
+        print(f"Unknown entities: {', '.join(unknown)}; expected {', '.join(SNAPSHOT_SOURCES)}", file=sys.stderr)
+        return 2
+    json.dump({entity: sync_catalog_replica_once(entity) for entity in entities}, sys.stdout, indent=2)
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, Set, Tuple
+from app.config import settings
+from app.database import SessionLocal
+from app.crud.catalog_replica_crud import (
+    BRANDS,
+    CATEGORIES,
+    apply_catalog_event,
+    mark_catalog_synced,
+    parse_timestamp,
+    sync_catalog_snapshot,
+)
+from app.utils.http_client import brand_service_client, category_service_client
+
+logger = logging.getLogger(__name__)
+
+# Routing key prefix of the owning services' events -> replicated entity
+EVENT_ENTITIES = {"category": CATEGORIES, "brand": BRANDS}
+# Listing endpoint of each owning service, as used by category_crud/brand_crud
+SNAPSHOT_SOURCES = {CATEGORIES: (category_service_client, "/"), BRANDS: (brand_service_client, "")}
+PREFETCH_COUNT = 100
+MAX_RECONNECT_DELAY = 60  # Seconds
+FAILED_EVENT_DELAY = 1  # Seconds before a failed event goes back to the queue
+
+
+def parse_catalog_event(routing_key: str, body: bytes) -> Tuple[str, str, Dict, datetime]:
+    """
+    Decode a category or brand change event. The envelope is the one our own events use:
+    {"event": "category.updated", "occurred_at": "<ISO 8601>", "data": {...}}; the routing
+    key stands in for a missing "event" and the delivery time for a missing "occurred_at".
+
+    :return: Replicated entity, action, entity data and when the change happened.
+    :raises ValueError: If the message cannot be understood.
+    """
+    try:
+        message = json.loads(body)
+    except ValueError as e:
+        raise ValueError(f"Invalid JSON: {e}") from e
+    if not isinstance(message, dict) or not isinstance(message.get("data"), dict):
+        raise ValueError("Expected a JSON object with a 'data' object")
+    prefix, _, action = (message.get("event") or routing_key).partition(".")
+    if prefix not in EVENT_ENTITIES:
+        raise ValueError(f"Unexpected event '{prefix}.{action}'")
+    version = parse_timestamp(message.get("occurred_at")) or datetime.utcnow()
+    return EVENT_ENTITIES[prefix], action, message["data"], version
+
+
+def apply_catalog_event_once(entity: str, action: str, data: Dict, version: datetime) -> None:
+    """
+    Apply one change event to the replica in its own session.
+    """
+    db = SessionLocal()
+    try:
+        apply_catalog_event(db, entity, action, data, version)
+    finally:
+        db.close()
+
+
+def sync_catalog_replica_once(entity: str) -> Dict[str, int]:
+    """
+    Replace the replica of `entity` with a full listing from its owning service.
+    """
+    client, path = SNAPSHOT_SOURCES[entity]
+    version = datetime.utcnow()  # Taken before the listing, so later events still win over it
+    response = client.get(path)
+    response.raise_for_status()
+    items = response.json()
+    if not isinstance(items, list):
+        raise ValueError(f"Expected a list of {entity} from the {client.name} service")
+
+    db = SessionLocal()
+    try:
+        return sync_catalog_snapshot(db, entity, items, version)
+    finally:
+        db.close()
+
+
+def mark_catalog_synced_once(entities: Iterable[str], synced_at: datetime) -> None:
+    db = SessionLocal()
+    try:
+        mark_catalog_synced(db, entities, synced_at)
+    finally:
+        db.close()
+
+
+class CatalogReplicaConsumer:
+    """
+    Keeps the local categories, brands and category_brand tables current from the
+    category/brand change events.
+
+    A durable queue is bound to both services' topic exchanges. After subscribing, each
+    entity is bootstrapped from a full listing of its owning service (and re-listed every
+    `resync_interval` seconds to repair anything the events missed). Every
+    `heartbeat_interval` seconds, when the queue is drained and no event is being applied,
+    the replicas are marked as synced; reads trust them for CATALOG_REPLICA_MAX_STALENESS
+    seconds after that, so a lost connection makes them fall back to HTTP lookups.
+    """
+
+    def __init__(
+        self,
+        url: str = settings.RABBITMQ_URL,
+        queue_name: str = settings.CATALOG_REPLICA_QUEUE,
+        heartbeat_interval: float = settings.CATALOG_REPLICA_HEARTBEAT_INTERVAL,
+        resync_interval: float = settings.CATALOG_REPLICA_RESYNC_INTERVAL,
+    ):
+        self.url = url
+        self.queue_name = queue_name
+        self.heartbeat_interval = heartbeat_interval
+        self.resync_interval = resync_interval
+        self._task = None
+        self._retry_delay = 0.0
+        self._in_flight = 0
+        self.connected = False
+        self.events_applied = 0
+        self.events_rejected = 0
+        self.events_failed = 0
+        self.snapshots = 0
+        self.last_error = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._consume()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Catalog replica consumer failed: {e}")
+            self.connected = False
+            self._retry_delay = min(max(self._retry_delay * 2, 1), MAX_RECONNECT_DELAY)
+            await asyncio.sleep(self._retry_delay)
+
+    async def _consume(self) -> None:
+        import aio_pika
+
+        connection = await aio_pika.connect(self.url)
+        async with connection:
+            channel = await connection.channel()
+            await channel.set_qos(prefetch_count=PREFETCH_COUNT)
+            queue = await channel.declare_queue(self.queue_name, durable=True)
+            for exchange_name, pattern in ((settings.CATEGORY_EVENT_EXCHANGE, "category.*"), (settings.BRAND_EVENT_EXCHANGE, "brand.*")):
+                exchange = await channel.declare_exchange(exchange_name, aio_pika.ExchangeType.TOPIC, durable=True)
+                await queue.bind(exchange, pattern)
+            await queue.consume(self._on_message)
+            self.connected = True
+            self._retry_delay = 0.0
+            logger.info(f"Catalog replica consumer subscribed to {self.queue_name}")
+
+            loop = asyncio.get_running_loop()
+            # Snapshots are listed after subscribing, so changes made while they are read are not missed
+            unsynced: Set[str] = set(SNAPSHOT_SOURCES)
+            last_resync = loop.time()
+            while not connection.is_closed:
+                if self.resync_interval > 0 and loop.time() - last_resync >= self.resync_interval:
+                    unsynced, last_resync = set(SNAPSHOT_SOURCES), loop.time()
+                if unsynced:
+                    unsynced = await self._snapshot(unsynced)
+
+                checked_at = datetime.utcnow()
+                declared = await channel.declare_queue(self.queue_name, durable=True)
+                if declared.declaration_result.message_count == 0 and self._in_flight == 0:
+                    await asyncio.to_thread(mark_catalog_synced_once, SNAPSHOT_SOURCES, checked_at)
+                await asyncio.sleep(self.heartbeat_interval)
+
+    async def _snapshot(self, entities: Set[str]) -> Set[str]:
+        # Returns the entities whose snapshot failed; they are retried on the next heartbeat
+        failed = set()
+        for entity in entities:
+            try:
+                await asyncio.to_thread(sync_catalog_replica_once, entity)
+                self.snapshots += 1
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Snapshot of {entity} for the catalog replica failed: {e}")
+                failed.add(entity)
+        return failed
+
+    async def _on_message(self, message) -> None:
+        self._in_flight += 1
+        try:
+            async with message.process(requeue=True):
+                try:
+                    event = parse_catalog_event(message.routing_key, message.body)
+                    await asyncio.to_thread(apply_catalog_event_once, *event)
+                except ValueError as e:
+                    # Malformed events are acknowledged and skipped; redelivering them cannot help
+                    self.events_rejected += 1
+                    logger.warning(f"Skipped catalog event {message.message_id}: {e}")
+                    return
+                except Exception:
+                    await asyncio.sleep(FAILED_EVENT_DELAY)  # Don't spin on redeliveries while the database is down
+                    raise
+                self.events_applied += 1
+        except Exception as e:
+            self.events_failed += 1
+            self.last_error = str(e)
+            logger.error(f"Applying catalog event {message.message_id} failed, requeued: {e}")
+        finally:
+            self._in_flight -= 1
+
+    def stats(self) -> Dict:
+        return {
+            "running": self._task is not None,
+            "connected": self.connected,
+            "events_applied": self.events_applied,
+            "events_rejected": self.events_rejected,
+            "events_failed": self.events_failed,
+            "snapshots": self.snapshots,
+            "last_error": self.last_error,
+        }
+
+
+catalog_replica_consumer = CatalogReplicaConsumer()
@@ -2,7 +2,7 @@ from sqlalchemy.orm import Session
 from app.models.seller import SellerModel
 from app.models.collaboration import CollaborationModel
 from app.schemas.collaboration_schemas import SharedInventoryAgreement, CreateCollaborationRequest
-from app.utils.collaboration_utils import calculate_proximity, suggest_seller_collaborations
+from app.utils.collaboration_utils import calculate_proximity, suggest_seller_collaborations, DEFAULT_NEARBY_RADIUS_KM
 from fastapi import HTTPException
 
 
@@ -43,20 +43,21 @@ def create_collaboration(request: CreateCollaborationRequest, db: Session, colla
     return new_collaboration
 
 
-def find_nearby_sellers(seller_id: int, location: str, db: Session):
+def find_nearby_sellers(seller_id: int, location: str, db: Session, radius_km: float = DEFAULT_NEARBY_RADIUS_KM):
     """
     Find nearby sellers based on location proximity and availability of stock.
     
     :param seller_id: The ID of the seller requesting nearby sellers.
     :param location: The location to match sellers to.
     :param db: Database session.
+    :param radius_km: Search radius in kilometers.
     :return: List of nearby sellers.
     """
     seller = get_seller_by_id(db, seller_id)
     if not seller:
         raise HTTPException(status_code=404, detail=f"Seller with ID {seller_id} does not exist.")
     
-    return suggest_seller_collaborations(location, db)
+    return suggest_seller_collaborations(location, db, radius_km)
 
 
 def create_shared_inventory_agreement(seller_id: int, partner_seller_id: int, agreement_details: SharedInventoryAgreement, db: Session):
@@ -0,0 +1,74 @@
+import asyncio
+from typing import List, Optional, Set
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.crud import brand_crud, category_crud
+from app.schemas.collaboration_schemas import Collaboration
+
+EXPANDABLE_FIELDS = ("brand", "category")
+
+
+def parse_expand(expand: Optional[str]) -> Set[str]:
+    """
+    Parse the `expand` query parameter, e.g. 'brand,category'.
+
+    :param expand: Comma-separated list of fields to expand, or None.
+    :return: The set of fields to expand.
+    :raises ValueError: If an unknown field is requested.
+    """
+    if not expand:
+        return set()
+    fields = {field.strip() for field in expand.split(",") if field.strip()}
+    unknown = fields.difference(EXPANDABLE_FIELDS)
+    if unknown:
+        raise ValueError(f"Cannot expand {', '.join(sorted(unknown))}; expandable fields are {', '.join(EXPANDABLE_FIELDS)}")
+    return fields
+
+
+def _attach(collaborations, fields: Set[str], brands, categories) -> List[Collaboration]:
+    expanded = []
+    for collaboration in collaborations:
+        item = Collaboration.model_validate(collaboration, from_attributes=True)
+        if "brand" in fields and item.brand_id is not None:
+            item.brand_details = brands.get(item.brand_id)
+        if "category" in fields and item.category_id is not None:
+            item.category_details = categories.get(item.category_id)
+        expanded.append(item)
+    return expanded
+
+
+def expand_collaborations(collaborations, fields: Set[str], db: Optional[Session] = None) -> List[Collaboration]:
+    """
+    Attach brand and/or category objects to a page of collaborations.
+
+    The distinct brand and category IDs on the page are resolved with one batched lookup per
+    downstream service, instead of one call per collaboration.
+
+    :param collaborations: Collaboration models of one page.
+    :param fields: Fields to expand, as returned by parse_expand().
+    :param db: The request's session, for the catalog replica reads.
+    :return: Collaboration schemas with the requested fields filled in where found.
+    """
+    brands = brand_crud.get_brands_by_ids((c.brand_id for c in collaborations), db) if "brand" in fields else {}
+    categories = category_crud.get_categories_by_ids((c.category_id for c in collaborations), db) if "category" in fields else {}
+    return _attach(collaborations, fields, brands, categories)
+
+
+async def expand_collaborations_async(collaborations, fields: Set[str], db: Optional[AsyncSession] = None) -> List[Collaboration]:
+    """
+    Async counterpart of expand_collaborations(). The replica reads run one after the other
+    on the request's session (a session can't run two statements at once); the lookups of
+    what the replica couldn't answer are sent to both services concurrently.
+    """
+    async def no_lookup():
+        return {}
+
+    brand_ids = [c.brand_id for c in collaborations] if "brand" in fields else []
+    category_ids = [c.category_id for c in collaborations] if "category" in fields else []
+    replicated_brands = await brand_crud.brands.aread_many(brand_ids, db) if brand_ids else {}
+    replicated_categories = await category_crud.categories.aread_many(category_ids, db) if category_ids else {}
+    brands, categories = await asyncio.gather(
+        brand_crud.brands.aload_missing(brand_ids, replicated_brands) if brand_ids else no_lookup(),
+        category_crud.categories.aload_missing(category_ids, replicated_categories) if category_ids else no_lookup(),
+    )
+    return _attach(collaborations, fields, brands, categories)
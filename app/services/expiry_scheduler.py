@@ -0,0 +1,196 @@
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from app.config import settings
+from app.database import SessionLocal
+from app.crud.expiry_crud import count_pending_expiries, expire_rows, get_pending_expiries
+from app.utils.expiry_queue import ExpiryQueue, expiry_queue
+
+logger = logging.getLogger(__name__)
+
+MIN_REFILL_INTERVAL = 1.0  # Seconds between refills triggered by reaching the horizon
+
+
+def refill_expiry_queue_once(queue: ExpiryQueue, now: datetime, window: float, limit: int) -> int:
+    """
+    Load the pending expiries of the next `window` seconds (and any overdue ones) into the
+    queue, in its own session.
+
+    :return: The number of expiries that were not queued yet.
+    """
+    db = SessionLocal()
+    try:
+        expiries, horizon = get_pending_expiries(db, now + timedelta(seconds=window), limit)
+    finally:
+        db.close()
+    return queue.refill(expiries, horizon)
+
+
+def expire_due_once(due: Dict[str, List[int]], now: datetime) -> Dict[str, int]:
+    """
+    Flag the given rows as expired, one transaction per entity, in its own session.
+
+    :return: Dictionary of entity to number of rows flagged.
+    """
+    db = SessionLocal()
+    try:
+        return {entity: len(expire_rows(db, entity, ids, now)) for entity, ids in due.items()}
+    finally:
+        db.close()
+
+
+class ExpiryScheduler:
+    """
+    Flags collaborations and contracts as expired when their end date passes.
+
+    Upcoming expiries are kept in an in-process min-heap (ExpiryQueue) that only covers the
+    next `window` seconds. It is refilled from the partial end-date indexes every
+    `refill_interval` seconds, and as soon as the time reaches the end of the loaded window;
+    writes in this process add their rows directly. The scheduler sleeps until the earliest
+    end date (or an earlier one scheduled meanwhile), then flags the due rows in batches of
+    `batch_size`, each flagged row moving from the sellers' active to expired counters and
+    emitting an '<entity>.expired' event through the outbox.
+
+    Rows written by other services are picked up by the next refill, so they are flagged at
+    most `refill_interval` seconds late. Schedulers in several processes may load the same
+    rows; the expiry transaction re-checks and locks them, so each row is flagged once.
+    """
+
+    def __init__(
+        self,
+        queue: ExpiryQueue = expiry_queue,
+        window: float = settings.EXPIRY_WINDOW,
+        refill_interval: float = settings.EXPIRY_REFILL_INTERVAL,
+        refill_limit: int = settings.EXPIRY_REFILL_LIMIT,
+        batch_size: int = settings.EXPIRY_BATCH_SIZE,
+        max_retry_delay: float = settings.EVENT_MAX_RETRY_DELAY,
+    ):
+        self.queue = queue
+        self.window = window
+        self.refill_interval = refill_interval
+        self.refill_limit = refill_limit
+        self.batch_size = batch_size
+        self.max_retry_delay = max_retry_delay
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._expired: Counter = Counter()
+        self._refills = 0
+        self._failures = 0
+        self.last_refill_at: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._stopping
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self.queue.set_listener(self.notify)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """
+        Stop after the batch in flight, waiting at most `timeout` seconds.
+        """
+        if self._task is None:
+            return
+        self._stopping = True
+        self.queue.set_listener(None)
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Expiry scheduler stopped mid-batch; the rows are flagged after restart")
+        finally:
+            self._task = None
+
+    def notify(self) -> None:
+        """
+        Wake the scheduler; called from the thread that scheduled an earlier expiry.
+        """
+        if self._loop is None or self._stopping:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        except RuntimeError:
+            pass  # The event loop is closed
+
+    def _seconds_to_next_run(self, next_refill: float, last_refill: float) -> float:
+        now = datetime.utcnow()
+        timeout = next_refill - self._loop.time()
+        horizon = self.queue.horizon
+        if horizon is not None:
+            timeout = min(timeout, max((horizon - now).total_seconds(), last_refill + MIN_REFILL_INTERVAL - self._loop.time()))
+        next_due = self.queue.next_due()
+        if next_due is not None:
+            timeout = min(timeout, (next_due - now).total_seconds())
+        return max(timeout, 0.0)
+
+    async def _run(self) -> None:
+        retry_delay = 0.0
+        next_refill = last_refill = self._loop.time()
+        while not self._stopping:
+            self._wakeup.clear()
+            now = datetime.utcnow()
+            try:
+                horizon = self.queue.horizon
+                horizon_reached = horizon is None or (now >= horizon and self._loop.time() - last_refill >= MIN_REFILL_INTERVAL)
+                if self._loop.time() >= next_refill or horizon_reached:
+                    last_refill = self._loop.time()
+                    next_refill = last_refill + self.refill_interval
+                    await asyncio.to_thread(refill_expiry_queue_once, self.queue, now, self.window, self.refill_limit)
+                    self._refills += 1
+                    self.last_refill_at = now
+
+                due = self.queue.pop_due(now, self.batch_size)
+                if due:
+                    self._expired.update(await asyncio.to_thread(expire_due_once, due, now))
+                retry_delay = 0.0
+            except Exception as e:
+                self._failures += 1
+                self.last_error = str(e)
+                logger.error(f"Expiring collaborations and contracts failed: {e}")
+                self.queue.reset()  # Rows taken off the heap but not flagged are loaded again by the next refill
+                retry_delay = min(max(retry_delay * 2, 1), self.max_retry_delay)
+                await asyncio.sleep(retry_delay)
+                continue
+
+            if due:
+                continue  # More rows may be due
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self._seconds_to_next_run(next_refill, last_refill))
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> Dict:
+        return {
+            "running": self.running,
+            "window": self.window,
+            "queue": self.queue.stats(),
+            "expired": dict(self._expired),
+            "refills": self._refills,
+            "last_refill_at": self.last_refill_at,
+            "failures": self._failures,
+            "last_error": self.last_error,
+        }
+
+
+expiry_scheduler = ExpiryScheduler()
+
+
+def get_expiry_statistics() -> Dict:
+    """
+    Scheduler counters plus the rows whose end date has passed but that aren't flagged yet.
+    """
+    db = SessionLocal()
+    try:
+        overdue = count_pending_expiries(db, datetime.utcnow())
+    finally:
+        db.close()
+    return {"scheduler": expiry_scheduler.stats(), "overdue": overdue}
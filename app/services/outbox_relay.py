@@ -0,0 +1,236 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Deque, Dict, Optional, Tuple
+from app.config import settings
+from app.database import SessionLocal
+from app.crud.outbox_crud import (
+    add_outbox_commit_listener,
+    claim_outbox_batch,
+    get_outbox_backlog,
+    mark_outbox_published,
+    purge_published_outbox,
+    remove_outbox_commit_listener,
+)
+from app.utils.rabbitmq import EventMessage
+
+logger = logging.getLogger(__name__)
+
+THROUGHPUT_WINDOW = 60  # Seconds over which events_per_second is measured
+
+
+class OutboxRelayError(Exception):
+    pass
+
+
+def purge_published_outbox_once(retention: float) -> int:
+    """
+    Delete events published more than `retention` seconds ago, in its own session.
+    """
+    db = SessionLocal()
+    try:
+        return purge_published_outbox(db, datetime.utcnow() - timedelta(seconds=retention))
+    finally:
+        db.close()
+
+
+class OutboxRelay:
+    """
+    Publishes the events written to the outbox table.
+
+    Each batch is claimed with SELECT ... FOR UPDATE SKIP LOCKED, published with the
+    broker's confirms awaited for the whole batch, and marked published in the same
+    transaction. An event is therefore published at least once even if the process dies
+    mid-batch, and relays in other processes never claim the same rows; consumers should
+    de-duplicate on the message id and not rely on ordering across relays.
+
+    Full batches are relayed back to back. When the outbox is drained the relay sleeps
+    until a commit in this process writes new events, or at most `poll_interval` seconds
+    (for events written by other processes). While the broker fails it backs off
+    exponentially; the events stay in the outbox meanwhile.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = settings.OUTBOX_BATCH_SIZE,
+        poll_interval: float = settings.OUTBOX_POLL_INTERVAL,
+        max_retry_delay: float = settings.EVENT_MAX_RETRY_DELAY,
+        retention: float = settings.OUTBOX_RETENTION,
+        purge_interval: float = settings.OUTBOX_PURGE_INTERVAL,
+    ):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_retry_delay = max_retry_delay
+        self.retention = retention
+        self.purge_interval = purge_interval
+        self._broker = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._started_at = 0.0
+        self._window: Deque[Tuple[float, int]] = deque()  # (monotonic time, events published) per batch
+        self._published = 0
+        self._batches = 0
+        self._failed_batches = 0
+        self._purged = 0
+        self._seconds = {"claim": 0.0, "publish": 0.0, "mark": 0.0}
+        self.last_error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._stopping
+
+    async def start(self, broker) -> None:
+        """
+        Start relaying on the running event loop.
+
+        :param broker: An object with async publish_batch(messages) and close() methods.
+        """
+        self._broker = broker
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._started_at = time.monotonic()
+        add_outbox_commit_listener(self.notify)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """
+        Stop after the batch in flight (waiting at most `timeout` seconds) and close the
+        broker. Unpublished events stay in the outbox for the next start.
+        """
+        if self._task is None:
+            return
+        self._stopping = True
+        remove_outbox_commit_listener(self.notify)
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Outbox relay stopped mid-batch; the batch is published again after restart")
+        finally:
+            self._task = None
+            await self._broker.close()
+
+    def notify(self) -> None:
+        """
+        Wake the relay; called from the thread that committed new outbox events.
+        """
+        if self._loop is None or self._stopping:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        except RuntimeError:
+            pass  # The event loop is closed
+
+    async def _wait_for_events(self) -> None:
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self) -> None:
+        retry_delay = 0.0
+        last_purge = self._loop.time()
+        while not self._stopping:
+            self._wakeup.clear()
+            try:
+                claimed = await self.relay_batch()
+                retry_delay = 0.0
+            except Exception as e:
+                self._failed_batches += 1
+                self.last_error = str(e)
+                logger.error(f"Relaying outbox events failed: {e}")
+                retry_delay = min(max(retry_delay * 2, 0.1), self.max_retry_delay)
+                await asyncio.sleep(retry_delay)
+                continue
+
+            if self.purge_interval > 0 and self._loop.time() - last_purge >= self.purge_interval:
+                last_purge = self._loop.time()
+                try:
+                    self._purged += await asyncio.to_thread(purge_published_outbox_once, self.retention)
+                except Exception as e:
+                    logger.error(f"Purging published outbox events failed: {e}")
+
+            if claimed < self.batch_size:
+                await self._wait_for_events()
+
+    async def relay_batch(self) -> int:
+        """
+        Claim, publish and mark one batch of events.
+
+        :return: The number of events claimed; less than the batch size means the outbox is drained.
+        :raises OutboxRelayError: If the broker did not confirm some events (the rest are marked published).
+        """
+        db = SessionLocal()
+        try:
+            started = time.perf_counter()
+            rows = await asyncio.to_thread(claim_outbox_batch, db, self.batch_size)
+            if not rows:
+                return 0
+            claimed = time.perf_counter()
+
+            messages = [EventMessage(row.routing_key, row.body.encode(), row.message_id) for row in rows]
+            failed = {message.message_id for message in await self._broker.publish_batch(messages)}
+            published = time.perf_counter()
+
+            sent = [row.id for row in rows if row.message_id not in failed]
+            await asyncio.to_thread(mark_outbox_published, db, sent, datetime.utcnow())
+            self._record(len(sent), claimed - started, published - claimed, time.perf_counter() - published)
+            if failed:
+                raise OutboxRelayError(f"{len(failed)} of {len(rows)} events were not confirmed by the broker")
+            return len(rows)
+        finally:
+            await asyncio.to_thread(db.close)  # Also releases the claim on rows that weren't marked
+
+    def _prune_window(self, now: float) -> None:
+        while self._window and self._window[0][0] < now - THROUGHPUT_WINDOW:
+            self._window.popleft()
+
+    def _record(self, published: int, claim_seconds: float, publish_seconds: float, mark_seconds: float) -> None:
+        now = time.monotonic()
+        self._window.append((now, published))
+        self._prune_window(now)
+        self._published += published
+        self._batches += 1
+        self._seconds["claim"] += claim_seconds
+        self._seconds["publish"] += publish_seconds
+        self._seconds["mark"] += mark_seconds
+
+    def stats(self) -> Dict:
+        now = time.monotonic()
+        self._prune_window(now)
+        window = min(THROUGHPUT_WINDOW, now - self._started_at) if self._started_at else 0
+        return {
+            "running": self.running,
+            "broker": type(self._broker).__name__ if self._broker is not None else None,
+            "batch_size": self.batch_size,
+            "published": self._published,
+            "batches": self._batches,
+            "failed_batches": self._failed_batches,
+            "average_batch_size": round(self._published / self._batches, 1) if self._batches else 0.0,
+            "events_per_second": round(sum(count for _, count in self._window) / window, 1) if window > 0 else 0.0,
+            "seconds": {step: round(seconds, 3) for step, seconds in self._seconds.items()},  # Time spent per step since start
+            "purged": self._purged,
+            "last_error": self.last_error,
+        }
+
+
+outbox_relay = OutboxRelay()
+
+
+def get_outbox_statistics() -> Dict:
+    """
+    Relay counters plus the outbox backlog: pending events and how old the oldest one is.
+    """
+    db = SessionLocal()
+    try:
+        backlog = get_outbox_backlog(db)
+    finally:
+        db.close()
+    oldest = backlog["oldest_pending_at"]
+    backlog["lag_seconds"] = round((datetime.utcnow() - oldest).total_seconds(), 3) if oldest is not None else 0.0
+    return {"relay": outbox_relay.stats(), "backlog": backlog}
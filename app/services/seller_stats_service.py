@@ -0,0 +1,31 @@
+import asyncio
+import logging
+from typing import Dict
+from app.database import SessionLocal
+from app.crud.seller_stats_crud import reconcile_seller_stats
+
+logger = logging.getLogger(__name__)
+
+
+def reconcile_seller_stats_once() -> Dict[str, int]:
+    """
+    Run one reconciliation of the per-seller stats table in its own session.
+    """
+    db = SessionLocal()
+    try:
+        return reconcile_seller_stats(db)
+    finally:
+        db.close()
+
+
+async def reconcile_seller_stats_periodically(interval: float):
+    """
+    Reconcile the per-seller stats table every `interval` seconds until cancelled.
+    The aggregation runs in a worker thread so the event loop keeps serving requests.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(reconcile_seller_stats_once)
+        except Exception as e:
+            logger.error(f"Seller stats reconciliation failed: {e}")
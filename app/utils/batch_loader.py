@@ -0,0 +1,136 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Iterable, List
+import httpx
+import requests
+from app.config import settings
+from app.utils.cache import TTLCache, MISSING
+from app.utils.http_client import DownstreamClient
+from app.utils.circuit_breaker import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+# Statuses meaning the downstream service does not understand batch lookups
+BATCH_UNSUPPORTED_STATUSES = {400, 404, 405, 422, 501}
+
+_fallback_executor = ThreadPoolExecutor(max_workers=settings.DOWNSTREAM_FALLBACK_CONCURRENCY, thread_name_prefix="batch-loader")
+
+
+class BatchLoader:
+    """
+    DataLoader-style resolution of many entity IDs from a downstream service.
+
+    Cached entities are served locally; the remaining distinct IDs are fetched with one
+    `GET /?ids=1,2,3` request. If the service has no batch API, the loader remembers that and
+    falls back to fetching each distinct ID once, in parallel, through the single-ID lookup
+    (which is itself cached and coalesced, and serves stale entries while the circuit is open).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        client: DownstreamClient,
+        cache: TTLCache,
+        fetch_one: Callable[[int], Any],
+        fetch_one_async: Callable[[int], Awaitable[Any]],
+        batch_supported: bool = True,
+    ):
+        self.name = name
+        self.client = client
+        self.cache = cache
+        self.fetch_one = fetch_one
+        self.fetch_one_async = fetch_one_async
+        self.batch_supported = batch_supported
+
+    def _split_cached(self, ids: Iterable[int]):
+        found, missing = {}, []
+        for entity_id in sorted({entity_id for entity_id in ids if entity_id is not None}):
+            cached = self.cache.get(entity_id)
+            if cached is MISSING:
+                missing.append(entity_id)
+            else:
+                found[entity_id] = cached
+        return found, missing
+
+    def _store_batch(self, entities: List[Dict], requested: List[int]) -> Dict[int, Any]:
+        wanted = set(requested)
+        loaded = {}
+        for entity in entities:
+            entity_id = entity.get("id")
+            if entity_id in wanted:
+                self.cache.set(entity_id, entity)
+                loaded[entity_id] = entity
+        return loaded
+
+    def _batch_params(self, ids: List[int]) -> Dict[str, str]:
+        return {"ids": ",".join(map(str, ids))}
+
+    def load_many(self, ids: Iterable[int]) -> Dict[int, Any]:
+        """
+        Resolve entity IDs to entities. IDs that cannot be resolved are left out.
+
+        :param ids: Entity IDs, duplicates and None allowed.
+        :return: Mapping of ID to entity.
+        """
+        found, missing = self._split_cached(ids)
+        if not missing:
+            return found
+
+        if self.batch_supported:
+            try:
+                response = self.client.get("/", params=self._batch_params(missing))
+                response.raise_for_status()
+                found.update(self._store_batch(response.json(), missing))
+                return found
+            except requests.exceptions.HTTPError as e:
+                if e.response is not None and e.response.status_code in BATCH_UNSUPPORTED_STATUSES:
+                    logger.info(f"{self.name} service has no batch lookup, falling back to single fetches")
+                    self.batch_supported = False
+                else:
+                    logger.warning(f"Batch lookup of {self.name} failed: {e}")
+            except (requests.exceptions.RequestException, CircuitOpenError) as e:
+                logger.warning(f"Batch lookup of {self.name} failed: {e}")
+
+        def fetch(entity_id):
+            try:
+                return entity_id, self.fetch_one(entity_id)
+            except Exception as e:
+                logger.warning(f"Lookup of {self.name} {entity_id} failed: {e}")
+                return entity_id, MISSING
+
+        for entity_id, entity in _fallback_executor.map(fetch, missing):
+            if entity is not MISSING:
+                found[entity_id] = entity
+        return found
+
+    async def aload_many(self, ids: Iterable[int]) -> Dict[int, Any]:
+        """
+        Async counterpart of load_many().
+        """
+        found, missing = self._split_cached(ids)
+        if not missing:
+            return found
+
+        if self.batch_supported:
+            try:
+                response = await self.client.aget("/", params=self._batch_params(missing))
+                response.raise_for_status()
+                found.update(self._store_batch(response.json(), missing))
+                return found
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code in BATCH_UNSUPPORTED_STATUSES:
+                    logger.info(f"{self.name} service has no batch lookup, falling back to single fetches")
+                    self.batch_supported = False
+                else:
+                    logger.warning(f"Batch lookup of {self.name} failed: {e}")
+            except (httpx.HTTPError, CircuitOpenError) as e:
+                logger.warning(f"Batch lookup of {self.name} failed: {e}")
+
+        results = await asyncio.gather(*[self.fetch_one_async(entity_id) for entity_id in missing], return_exceptions=True)
+        for entity_id, entity in zip(missing, results):
+            if isinstance(entity, Exception):
+                logger.warning(f"Lookup of {self.name} {entity_id} failed: {entity}")
+            else:
+                found[entity_id] = entity
+        return found
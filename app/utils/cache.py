@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable
+from app.config import settings
+
+MISSING = object()  # Returned by TTLCache.get on a miss, since None is a cacheable value
+
+ALL_KEY = "all"  # Key under which full listings are cached
+
+
+class TTLCache:
+    """
+    Thread-safe bounded cache with per-entry time-to-live and least-recently-used eviction.
+
+    Expired entries count as misses but are only dropped when overwritten, invalidated or
+    evicted, so the most recent known value stays available until then.
+    """
+
+    def __init__(self, name: str, ttl: float = settings.CACHE_TTL_SECONDS, maxsize: int = settings.CACHE_MAX_ENTRIES):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale_hits = 0
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Return the cached value for a key, or MISSING if absent or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def get_stale(self, key: Hashable) -> Any:
+        """
+        Return the cached value for a key even if it has expired, or MISSING if absent.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            self.stale_hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *keys: Hashable) -> None:
+        with self._lock:
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "cache": self.name,
+                "entries": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "stale_hits": self.stale_hits,
+            }
+
+
+category_cache = TTLCache("categories")
+brand_cache = TTLCache("brands")
+
+
+def get_cache_statistics():
+    """
+    Return hit/miss statistics for every downstream lookup cache.
+    """
+    return [category_cache.stats(), brand_cache.stats()]
@@ -0,0 +1,65 @@
+import threading
+from datetime import datetime, timedelta
+from typing import List, Optional
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+
+class ChangeWatermark:
+    """
+    How far an in-process copy of a table (e.g. an in-memory index) has caught up with the
+    rows written to it, by their updated_at, including the writes of other processes.
+
+    The rows looked at are those stamped at or after the newest updated_at applied, less
+    `margin` for clock skew between processes and for transactions committing a while after
+    their rows were stamped; a write committed later than that is missed until the copy is
+    rebuilt. A (count, max(updated_at)) probe of that window, which the updated_at index
+    answers, tells whether anything changed since the last look, so an idle table costs one
+    cheap query. Rows in the window are returned again until the window moves past them,
+    so they must be applied idempotently.
+    """
+
+    def __init__(self, updated_at, margin: timedelta):
+        """
+        :param updated_at: The table's updated_at column, e.g. SellerModel.updated_at.
+        :param margin: How far before the newest updated_at seen to keep looking.
+        """
+        self.updated_at = updated_at
+        self.margin = margin
+        self._lock = threading.Lock()
+        self.reset(None)
+
+    def reset(self, start: Optional[datetime]) -> None:
+        """
+        Start over from `start`, e.g. the time a full load of the copy began; None stops
+        looking until the next reset.
+        """
+        with self._lock:
+            self._latest = start
+            self._probe = None
+
+    def changed_rows(self, db: Session, *columns) -> List:
+        """
+        The rows written since the last call (and those still inside the margin, when something changed).
+
+        :param db: The database session.
+        :param columns: Columns to select of the changed rows.
+        :return: The changed rows; empty if the table didn't change or the watermark isn't started.
+        """
+        with self._lock:
+            latest, last_probe = self._latest, self._probe
+        if latest is None:
+            return []
+        window = self.updated_at >= latest - self.margin
+        probe = tuple(db.execute(select(func.count(), func.max(self.updated_at)).where(window)).one())
+        if probe == last_probe:
+            return []
+        rows = db.execute(select(*columns).where(window)).all()
+        with self._lock:
+            if self._latest != latest:
+                return rows  # Reset meanwhile
+            if probe[1] is not None and probe[1] > latest:
+                self._latest, self._probe = probe[1], None  # The window moves; it is probed afresh next time
+            else:
+                self._probe = probe
+        return rows
@@ -0,0 +1,134 @@
+import threading
+import time
+from typing import Dict, Hashable, List
+from app.config import settings
+from app.utils.cache import TTLCache, MISSING
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling a downstream service whose circuit is open.
+    """
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} service unavailable (circuit open)")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one downstream service.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls fail fast with
+    CircuitOpenError. Once `reset_timeout` seconds have passed, a single probe call is let
+    through (half-open): its success closes the circuit, its failure re-opens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout: float = settings.CIRCUIT_BREAKER_RESET_TIMEOUT,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self.failures = 0
+        self.rejections = 0
+        self.times_opened = 0
+
+    def before_call(self):
+        """
+        Admit a call or raise CircuitOpenError. Every admitted call must be followed by
+        record_success(), record_failure() or abandon().
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if self.state == OPEN and remaining <= 0:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            self.rejections += 1
+            raise CircuitOpenError(self.name, max(remaining, 0.0))
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+            self.state = CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            probe_failed = self._probe_in_flight
+            self._probe_in_flight = False
+            if probe_failed or (self.state == CLOSED and self.consecutive_failures >= self.failure_threshold):
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self.times_opened += 1
+
+    def abandon(self):
+        """
+        Release an admitted call that ended without an outcome (e.g. it was cancelled).
+        """
+        with self._lock:
+            self._probe_in_flight = False
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout_seconds": self.reset_timeout,
+                "failures": self.failures,
+                "rejections": self.rejections,
+                "times_opened": self.times_opened,
+            }
+
+
+circuit_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """
+    Return the circuit breaker for a downstream service, creating it on first use.
+    """
+    breaker = circuit_breakers.get(name)
+    if breaker is None:
+        breaker = circuit_breakers.setdefault(name, CircuitBreaker(name))
+    return breaker
+
+
+def get_circuit_breaker_statistics() -> List[Dict]:
+    """
+    Return the state of every downstream circuit breaker.
+    """
+    return [breaker.stats() for breaker in circuit_breakers.values()]
+
+
+def stale_or_raise(cache: TTLCache, key: Hashable, error: CircuitOpenError):
+    """
+    Return the last known (possibly expired) value for `key` while a circuit is open, if
+    settings.DOWNSTREAM_SERVE_STALE allows it; otherwise re-raise `error`.
+    """
+    if settings.DOWNSTREAM_SERVE_STALE:
+        value = cache.get_stale(key)
+        if value is not MISSING:
+            return value
+    raise error
@@ -1,5 +1,17 @@
-import math
+from typing import Iterator, List, Sequence, Tuple, Union
+import numpy as np
+from sqlalchemy import and_, or_
 from app.models.seller import SellerModel
+from app.utils.geo_utils import (
+    parse_location,
+    haversine_km,
+    iter_haversine_km_blocks,
+    geohash_cells_covering,
+    bounding_box,
+)
+
+DEFAULT_NEARBY_RADIUS_KM = 50.0
+PROXIMITY_CHUNK_ELEMENTS = 262144  # Cells per block (~2 MB per float64 temporary)
 
 
 def calculate_proximity(location1: str, location2: str) -> float:
@@ -10,36 +22,110 @@ def calculate_proximity(location1: str, location2: str) -> float:
     :param location2: Coordinates of the second location as 'latitude,longitude'.
     :return: Distance in kilometers.
     """
-    try:
-        lat1, lon1 = map(float, location1.split(','))
-        lat2, lon2 = map(float, location2.split(','))
-    except ValueError:
-        raise ValueError("Invalid format for location. Please provide coordinates as 'latitude,longitude'.")
+    lat1, lon1 = parse_location(location1)
+    lat2, lon2 = parse_location(location2)
+
+    return haversine_km(lat1, lon1, lat2, lon2)
+
+
+def _locations_to_radians(locations: Sequence[str]) -> np.ndarray:
+    """
+    Parse 'latitude,longitude' strings into an (N, 2) array of radians.
+    """
+    coordinates = np.empty((len(locations), 2), dtype=np.float64)
+    for index, location in enumerate(locations):
+        coordinates[index] = parse_location(location)
+    return np.radians(coordinates)
+
+
+def iter_proximity_chunks(
+    origins: Sequence[str],
+    destinations: Sequence[str],
+    max_chunk_elements: int = PROXIMITY_CHUNK_ELEMENTS,
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Lazily compute the origins x destinations distance matrix in row blocks.
+    Useful for consumers that can process rows as they arrive instead of holding the whole matrix.
+    
+    :param origins: Origin coordinates as 'latitude,longitude'.
+    :param destinations: Destination coordinates as 'latitude,longitude'.
+    :param max_chunk_elements: Upper bound on matrix cells computed per block.
+    :return: Iterator of (first_row_index, distances_in_km) pairs.
+    """
+    return iter_haversine_km_blocks(
+        _locations_to_radians(origins), _locations_to_radians(destinations), max_chunk_elements
+    )
+
+
+def calculate_proximity_many(
+    origins: Union[str, Sequence[str]],
+    destinations: Sequence[str],
+    max_chunk_elements: int = PROXIMITY_CHUNK_ELEMENTS,
+) -> np.ndarray:
+    """
+    Vectorized Haversine distances from one origin to N destinations, or an N x M distance matrix.
+    
+    :param origins: A single 'latitude,longitude' string, or a list of them.
+    :param destinations: Destination coordinates as 'latitude,longitude'.
+    :param max_chunk_elements: Upper bound on matrix cells computed per block.
+    :return: Distances in kilometers; shape (M,) for a single origin, (N, M) otherwise.
+    """
+    single_origin = isinstance(origins, str)
+    origin_list: List[str] = [origins] if single_origin else list(origins)
+
+    distances = np.empty((len(origin_list), len(destinations)), dtype=np.float64)
+    for start, block in iter_proximity_chunks(origin_list, destinations, max_chunk_elements):
+        distances[start:start + block.shape[0]] = block
+
+    return distances[0] if single_origin else distances
 
-    R = 6371.0  # Earth radius in kilometers
 
-    dlat = math.radians(lat2 - lat1)
-    dlon = math.radians(lon2 - lon1)
+def _bounding_box_filter(lat: float, lon: float, radius_km: float):
+    """
+    Build an SQL filter on the seller latitude/longitude columns for the box around a search circle,
+    splitting the longitude range when the box crosses the antimeridian.
+    """
+    min_lat, min_lon, max_lat, max_lon = bounding_box(lat, lon, radius_km)
+    latitude_filter = SellerModel.latitude.between(min_lat, max_lat)
 
-    a = math.sin(dlat / 2)**2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon / 2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    if min_lon < -180.0:
+        longitude_filter = or_(SellerModel.longitude >= min_lon + 360.0, SellerModel.longitude <= max_lon)
+    elif max_lon > 180.0:
+        longitude_filter = or_(SellerModel.longitude >= min_lon, SellerModel.longitude <= max_lon - 360.0)
+    else:
+        longitude_filter = SellerModel.longitude.between(min_lon, max_lon)
 
-    return R * c
+    return and_(latitude_filter, longitude_filter)
 
 
-def suggest_seller_collaborations(seller_location: str, db):
+def suggest_seller_collaborations(seller_location: str, db, radius_km: float = DEFAULT_NEARBY_RADIUS_KM):
     """
     Suggest seller collaborations based on proximity, demand trends, and categories.
+
+    The database only returns sellers that fall both in one of the geohash cells covering the
+    search radius and inside its lat/lon bounding box; the exact Haversine distance is then
+    checked on that small candidate set.
     
     :param seller_location: Coordinates of the seller.
     :param db: The database session.
-    :return: A list of potential seller partners.
+    :param radius_km: Search radius in kilometers.
+    :return: A list of potential seller partners, nearest first.
     """
-    sellers = db.query(SellerModel).all()
-    
-    nearby_sellers = [
-        seller for seller in sellers
-        if calculate_proximity(seller_location, seller.location) <= 50  # Example proximity filter: 50 km
-    ]
+    lat, lon = parse_location(seller_location)
+    cells = geohash_cells_covering(lat, lon, radius_km)
+    if not cells:
+        return []
+
+    candidates = db.query(SellerModel).filter(
+        or_(*[SellerModel.geohash.startswith(cell) for cell in cells]),
+        _bounding_box_filter(lat, lon, radius_km),
+    ).all()
+
+    nearby_sellers = []
+    for seller in candidates:
+        distance = haversine_km(lat, lon, seller.latitude, seller.longitude)
+        if distance <= radius_km:
+            nearby_sellers.append((distance, seller))
 
-    return nearby_sellers
+    nearby_sellers.sort(key=lambda item: item[0])
+    return [seller for _, seller in nearby_sellers]
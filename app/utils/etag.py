@@ -0,0 +1,43 @@
+import hashlib
+from typing import Optional
+from fastapi import Response
+
+# Clients may keep responses but must revalidate them with If-None-Match before reuse
+ETAG_CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    """
+    Build a weak ETag from the values that identify a version of a resource, such as its
+    id and updated_at, plus any query parameters that shape the response.
+    """
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Evaluate an If-None-Match header against the current ETag (weak comparison, RFC 9110).
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith("W/") else candidate) == opaque:
+            return True
+    return False
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = ETAG_CACHE_CONTROL
+
+
+def not_modified(etag: str) -> Response:
+    """
+    Empty 304 response telling the client its cached copy is still current.
+    """
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": ETAG_CACHE_CONTROL})
@@ -0,0 +1,509 @@
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+import numpy as np
+from app.utils.geo_utils import encode_geohash, geohash_cells_covering, geohash_prefix_range, geohash_to_int, haversine_km, haversine_km_matrix
+
+EPOCH = datetime(1970, 1, 1)
+NO_START = int(np.iinfo(np.int64).min)  # Open-ended date ranges
+NO_END = int(np.iinfo(np.int64).max)
+SMALL_SLICE = 64  # Sellers with at most this many collaborations are scanned without the geohash ranges
+COMPACT_PENDING_RATIO = 0.25  # Fold pending writes into the arrays once they exceed this share of sides
+MIN_COMPACT_PENDING = 1024
+
+
+class SellerLocation(NamedTuple):
+    latitude: float
+    longitude: float
+    geohash: Optional[str] = None  # Computed from the coordinates when missing
+
+
+class RegionConflict(NamedTuple):
+    collaboration_id: int  # The existing collaboration
+    seller_id: int  # Party of the proposal that is bound by the existing collaboration
+    partner_seller_id: int  # That seller's partner in the existing collaboration
+    distance_km: float  # Between that partner and the proposal's other party
+    exclusive: bool  # Whether the existing collaboration is exclusive; if not, the proposal's exclusivity conflicts with it
+    start_date: Optional[datetime]
+    end_date: Optional[datetime]
+
+
+class _Side(NamedTuple):
+    # One party's view of a collaboration: where its partner is and when the collaboration runs
+    collaboration_id: int
+    seller_id: int
+    partner_seller_id: int
+    geohash: int
+    latitude: float  # Radians
+    longitude: float  # Radians
+    start: int  # Microseconds since the epoch
+    end: int
+    exclusive: bool
+
+
+def _micros(value: Optional[datetime], missing: int) -> int:
+    return missing if value is None else (value - EPOCH) // timedelta(microseconds=1)
+
+
+def _datetime(micros: int) -> Optional[datetime]:
+    return None if micros in (NO_START, NO_END) else EPOCH + timedelta(microseconds=int(micros))
+
+
+def _sides(collaboration, locations: Dict[int, SellerLocation]) -> List[_Side]:
+    seller_id, partner_seller_id = collaboration.seller_id, collaboration.partner_seller_id
+    if seller_id == partner_seller_id:
+        return []
+    start = _micros(collaboration.collaboration_start_date, NO_START)
+    end = _micros(collaboration.collaboration_end_date, NO_END)
+    sides = []
+    for holder, partner in ((seller_id, partner_seller_id), (partner_seller_id, seller_id)):
+        location = locations.get(partner)
+        if location is None:
+            continue  # A seller without a warehouse location is in no region
+        geohash = location.geohash or encode_geohash(location.latitude, location.longitude)
+        sides.append(_Side(
+            collaboration.id, holder, partner, geohash_to_int(geohash),
+            float(np.radians(location.latitude)), float(np.radians(location.longitude)),
+            start, end, bool(collaboration.geographical_exclusivity),
+        ))
+    return sides
+
+
+class ExclusivityIndex:
+    """
+    In-process index of where the partners of each seller's running collaborations are, for
+    geographical exclusivity checks.
+
+    A collaboration between sellers A and B with geographical_exclusivity binds both parties
+    while it runs: A may not collaborate with another seller within the exclusivity radius of
+    B, and B may not collaborate with another seller within the radius of A. Every collaboration
+    is stored once per party, as (party, partner location, date range, exclusive flag).
+
+    The sides are held CSR-style in numpy arrays sorted by party and then by the geohash of
+    the partner's location: the sides of seller i occupy slots indptr[i]:indptr[i + 1]. A
+    radius query binary-searches the seller's slots for the few geohash prefixes covering the
+    circle, so it costs about the same for a seller with thousands of partners as for one
+    with ten. Writes after the initial load go to a small per-seller overlay, spliced into the
+    seller's slots once it outgrows a linear scan, and removals are masked by collaboration id;
+    once those pile up, the arrays are rebuilt with ended collaborations dropped.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._loaded_at: Optional[datetime] = None
+        self._synced_at: Dict[int, datetime] = {}
+        self._versions: Dict[int, datetime] = {}  # Collaboration id -> updated_at of the row last applied
+        self._unlocated: set = set()  # Parties to collaborations without a warehouse location, so without partner sides
+        self._build([])
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def __len__(self) -> int:
+        return len(self._ids) - self._removed_in_base + self._pending_count
+
+    def load(self, collaborations: Iterable[Tuple[object, Dict[int, SellerLocation]]], loaded_at: Optional[datetime] = None) -> None:
+        """
+        Replace the index contents with the given collaborations.
+
+        :param collaborations: Iterable of (collaboration, locations) pairs. The collaboration
+            has id, seller_id, partner_seller_id, collaboration_start_date,
+            collaboration_end_date and geographical_exclusivity attributes, and optionally
+            updated_at (see outdated()); locations maps its sellers' ids to their warehouse location.
+        :param loaded_at: When the collaborations were read; every seller counts as synced up to then.
+        """
+        with self._lock:
+            sides, self._versions, self._unlocated = [], {}, set()
+            for collaboration, locations in collaborations:
+                sides.extend(_sides(collaboration, locations))
+                self._record_version(collaboration)
+                self._record_unlocated(collaboration, locations)
+            self._build(sides)
+            self._loaded = True
+            self._loaded_at = loaded_at
+            self._synced_at = {}
+
+    def invalidate(self) -> None:
+        """
+        Drop the contents, e.g. after many sellers moved; the next check loads the index again.
+        """
+        with self._lock:
+            self._build([])
+            self._loaded = False
+            self._loaded_at = None
+            self._synced_at = {}
+            self._versions = {}
+            self._unlocated = set()
+
+    def synced_at(self, seller_id: int) -> Optional[datetime]:
+        """
+        Newest updated_at of the seller's collaborations read from the database so far (see mark_synced()).
+        """
+        with self._lock:
+            return self._synced_at.get(seller_id, self._loaded_at)
+
+    def mark_synced(self, seller_id: int, updated_at: Optional[datetime]) -> None:
+        """
+        Record that the seller's collaborations were read from the database up to `updated_at`.
+        """
+        with self._lock:
+            synced_at = self._synced_at.get(seller_id, self._loaded_at)
+            if updated_at is not None and (synced_at is None or updated_at > synced_at):
+                self._synced_at[seller_id] = updated_at
+
+    def outdated(self, versions: Iterable[Tuple[int, Optional[datetime]]]) -> List[int]:
+        """
+        IDs of the collaborations whose row the index has not applied at the given updated_at,
+        i.e. that need reading back in full.
+
+        :param versions: Iterable of (collaboration id, updated_at) pairs.
+        """
+        with self._lock:
+            return [collaboration_id for collaboration_id, updated_at in versions if updated_at is None or self._versions.get(collaboration_id) != updated_at]
+
+    def seller_moved(self, seller_id: int, latitude: Optional[float], longitude: Optional[float]) -> bool:
+        """
+        Whether a seller's warehouse differs from where the index has it as a partner. A seller
+        the index has no location for counts as moved once it has one if it is party to a
+        collaboration, whose partner then gains a side.
+        """
+        with self._lock:
+            known = self._partner_locations.get(seller_id)
+            unlocated = seller_id in self._unlocated
+        if latitude is None or longitude is None:
+            return known is not None
+        if known is None:
+            return unlocated
+        return known != (float(np.radians(latitude)), float(np.radians(longitude)))
+
+    def _build(self, sides: List[_Side]) -> None:
+        columns = list(zip(*sides)) if sides else [()] * len(_Side._fields)
+        ids, sellers, partners, geohashes, latitudes, longitudes, starts, ends, exclusive = columns
+        self._build_arrays(
+            np.asarray(ids, np.int64), np.asarray(sellers, np.int64), np.asarray(partners, np.int64),
+            np.asarray(geohashes, np.int64), np.column_stack([np.asarray(latitudes, np.float64), np.asarray(longitudes, np.float64)]),
+            np.asarray(starts, np.int64), np.asarray(ends, np.int64), np.asarray(exclusive, bool),
+        )
+
+    def _build_arrays(self, ids, sellers, partners, geohashes, coordinates, starts, ends, exclusive) -> None:
+        order = np.lexsort((geohashes, sellers))
+        self._ids = ids[order]
+        self._sellers = sellers[order]
+        self._partners = partners[order]
+        self._geohashes = geohashes[order]
+        self._coordinates = coordinates[order].reshape(-1, 2)
+        self._starts = starts[order]
+        self._ends = ends[order]
+        self._exclusive = exclusive[order]
+        self._index_nodes()
+
+        unique_ids, side_counts = np.unique(self._ids, return_counts=True)
+        self._base_side_counts: Dict[int, int] = dict(zip(unique_ids.tolist(), side_counts.tolist()))  # Collaboration id -> slots
+        partner_ids, first = np.unique(self._partners, return_index=True)
+        self._partner_locations: Dict[int, Tuple[float, float]] = dict(zip(partner_ids.tolist(), map(tuple, self._coordinates[first].tolist())))
+        self._removed: set = set()  # Collaboration ids masked out of the arrays
+        self._removed_array: Optional[np.ndarray] = np.empty(0, np.int64)  # Built from _removed when next needed
+        self._removed_in_base = 0
+        self._pending: Dict[int, List[_Side]] = defaultdict(list)  # Seller id -> sides written since the build
+        self._pending_sellers: Dict[int, Tuple[int, ...]] = {}  # Collaboration id -> sellers holding its pending sides
+        self._pending_count = 0
+
+    def upsert(self, collaboration, locations: Dict[int, SellerLocation]) -> None:
+        """
+        Insert or refresh a collaboration after it has been written. Expired collaborations
+        are removed. No-op until the index has been loaded, since the load picks it up.
+
+        :param collaboration: The persisted collaboration (see load()).
+        :param locations: Warehouse locations of its sellers by seller id.
+        """
+        self.upsert_many([(collaboration, locations)])
+
+    def upsert_many(self, collaborations: Iterable[Tuple[object, Dict[int, SellerLocation]]]) -> None:
+        """
+        upsert() many collaborations, e.g. as read back from the database. Collaborations the
+        index already holds unchanged are left alone. No-op until the index has been loaded.
+
+        :param collaborations: Iterable of (collaboration, locations) pairs (see load()).
+        """
+        collaborations = list(collaborations)
+        with self._lock:
+            if not self._loaded:
+                return
+            for collaboration, locations in collaborations:
+                sides = [] if getattr(collaboration, "expired_at", None) is not None else _sides(collaboration, locations)
+                holders = (collaboration.seller_id, collaboration.partner_seller_id)
+                if set(sides) != self._current_sides(collaboration.id, holders):
+                    self._discard(collaboration.id)
+                    self._add(sides)
+                self._record_version(collaboration)
+                self._record_unlocated(collaboration, locations)
+            self._fold_overlays()
+            self._maybe_compact()
+
+    def remove(self, collaboration_id: int) -> None:
+        """
+        Drop a deleted collaboration.
+        """
+        self.remove_many([collaboration_id])
+
+    def remove_many(self, collaboration_ids: Iterable[int]) -> None:
+        """
+        Drop deleted collaborations, e.g. found gone from the database.
+        """
+        with self._lock:
+            if self._loaded:
+                collaboration_ids = list(collaboration_ids)
+                for collaboration_id in collaboration_ids:
+                    self._versions.pop(collaboration_id, None)
+                self._discard(*collaboration_ids)
+                self._maybe_compact()
+
+    def _record_version(self, collaboration) -> None:
+        updated_at = getattr(collaboration, "updated_at", None)
+        if updated_at is not None:
+            self._versions[collaboration.id] = updated_at
+
+    def _record_unlocated(self, collaboration, locations: Dict[int, SellerLocation]) -> None:
+        for seller_id in (collaboration.seller_id, collaboration.partner_seller_id):
+            if seller_id in locations:
+                self._unlocated.discard(seller_id)
+            else:
+                self._unlocated.add(seller_id)
+
+    def _side_at(self, position: int) -> _Side:
+        return _Side(
+            int(self._ids[position]), int(self._sellers[position]), int(self._partners[position]), int(self._geohashes[position]),
+            float(self._coordinates[position, 0]), float(self._coordinates[position, 1]),
+            int(self._starts[position]), int(self._ends[position]), bool(self._exclusive[position]),
+        )
+
+    def _slots(self, seller_id: int) -> Tuple[int, int]:
+        # The seller's slots; an empty range where they would go if it has none
+        node = int(np.searchsorted(self._nodes, seller_id))
+        if node == len(self._nodes) or self._nodes[node] != seller_id:
+            return int(self._indptr[node]), int(self._indptr[node])
+        return int(self._indptr[node]), int(self._indptr[node + 1])
+
+    def _current_sides(self, collaboration_id: int, holders: Iterable[int]) -> set:
+        # The sides of a collaboration the index holds for the given parties
+        sides = set()
+        if collaboration_id in self._base_side_counts and collaboration_id not in self._removed:
+            for holder in set(holders):
+                start, stop = self._slots(holder)
+                positions = np.flatnonzero(self._ids[start:stop] == collaboration_id) + start
+                sides.update(self._side_at(position) for position in positions.tolist())
+        for holder in self._pending_sellers.get(collaboration_id, ()):
+            sides.update(side for side in self._pending[holder] if side.collaboration_id == collaboration_id)
+        return sides
+
+    def _add(self, sides: List[_Side]) -> None:
+        for side in sides:
+            self._pending[side.seller_id].append(side)
+            self._partner_locations[side.partner_seller_id] = (side.latitude, side.longitude)
+        if sides:
+            self._pending_sellers[sides[0].collaboration_id] = tuple(side.seller_id for side in sides)
+            self._pending_count += len(sides)
+
+    def _discard(self, *collaboration_ids: int) -> None:
+        for collaboration_id in collaboration_ids:
+            if collaboration_id in self._base_side_counts and collaboration_id not in self._removed:
+                self._removed.add(collaboration_id)
+                self._removed_array = None
+                self._removed_in_base += self._base_side_counts[collaboration_id]
+            for seller_id in self._pending_sellers.pop(collaboration_id, ()):
+                sides = self._pending[seller_id]
+                kept = [side for side in sides if side.collaboration_id != collaboration_id]
+                self._pending_count -= len(sides) - len(kept)
+                self._pending[seller_id] = kept
+
+    def _removed_ids(self) -> np.ndarray:
+        if self._removed_array is None:
+            self._removed_array = np.fromiter(self._removed, np.int64, len(self._removed))
+        return self._removed_array
+
+    def _fold_overlays(self) -> None:
+        # Sellers whose overlay outgrew a linear scan get it spliced into their slots of the arrays
+        for seller_id in [seller_id for seller_id, sides in self._pending.items() if len(sides) > SMALL_SLICE]:
+            self._fold(seller_id)
+
+    def _fold(self, seller_id: int) -> None:
+        sides = self._pending.pop(seller_id)
+        self._pending_count -= len(sides)
+        start, stop = self._slots(seller_id)
+
+        # Masked slots are dead: drop the seller's, and those the partners hold of the
+        # collaborations being folded, so that these can be unmasked
+        dead = [start + offset for offset in np.flatnonzero(np.isin(self._ids[start:stop], self._removed_ids())).tolist()] if self._removed else []
+        for side in sides:
+            if side.collaboration_id in self._removed:
+                first, last = self._slots(side.partner_seller_id)
+                dead.extend((np.flatnonzero(self._ids[first:last] == side.collaboration_id) + first).tolist())
+        dead = np.unique(np.asarray(dead, np.int64))
+        for collaboration_id in self._ids[dead].tolist():
+            self._removed_in_base -= 1
+            self._base_side_counts[collaboration_id] -= 1
+            if not self._base_side_counts[collaboration_id]:
+                del self._base_side_counts[collaboration_id]
+                self._removed.discard(collaboration_id)
+                self._removed_array = None
+
+        for side in sides:
+            holders = tuple(holder for holder in self._pending_sellers.pop(side.collaboration_id, ()) if holder != seller_id)
+            if holders:
+                self._pending_sellers[side.collaboration_id] = holders
+            self._base_side_counts[side.collaboration_id] = self._base_side_counts.get(side.collaboration_id, 0) + 1
+
+        keep = np.ones(len(self._ids), bool)
+        keep[dead] = False
+        shift = int(np.count_nonzero(dead < start))
+        start, stop = start - shift, start - shift + int(np.count_nonzero(keep[start:stop]))
+        columns = list(zip(*sides))
+        ids, sellers, partners, geohashes, latitudes, longitudes, starts, ends, exclusive = columns
+        added = (
+            np.asarray(ids, np.int64), np.asarray(sellers, np.int64), np.asarray(partners, np.int64), np.asarray(geohashes, np.int64),
+            np.column_stack([np.asarray(latitudes, np.float64), np.asarray(longitudes, np.float64)]),
+            np.asarray(starts, np.int64), np.asarray(ends, np.int64), np.asarray(exclusive, bool),
+        )
+        names = ("_ids", "_sellers", "_partners", "_geohashes", "_coordinates", "_starts", "_ends", "_exclusive")
+        arrays = [getattr(self, name)[keep] for name in names]
+        segments = [np.concatenate([array[start:stop], values]) for array, values in zip(arrays, added)]
+        order = np.argsort(segments[3], kind="stable")  # By partner geohash within the seller's slots
+        for name, array, segment in zip(names, arrays, segments):
+            setattr(self, name, np.concatenate([array[:start], segment[order], array[stop:]]))
+        self._index_nodes()
+
+    def _index_nodes(self) -> None:
+        # CSR offsets of each seller's slots in the sorted arrays
+        boundaries = np.flatnonzero(self._sellers[1:] != self._sellers[:-1]) + 1
+        self._nodes = self._sellers[np.concatenate([[0], boundaries])] if len(self._sellers) else np.empty(0, np.int64)
+        self._indptr = np.concatenate([[0], boundaries, [len(self._sellers)]]).astype(np.int64) if len(self._sellers) else np.zeros(1, np.int64)
+
+    def _maybe_compact(self) -> None:
+        changes = self._pending_count + self._removed_in_base
+        if changes > max(MIN_COMPACT_PENDING, COMPACT_PENDING_RATIO * len(self._ids)):
+            self._compact()
+
+    def _compact(self) -> None:
+        now = _micros(datetime.utcnow(), 0)
+        keep = self._ends > now
+        if self._removed:
+            keep &= ~np.isin(self._ids, self._removed_ids())
+        pending = [side for sides in self._pending.values() for side in sides if side.end > now]
+        columns = list(zip(*pending)) if pending else [()] * len(_Side._fields)
+        ids, sellers, partners, geohashes, latitudes, longitudes, starts, ends, exclusive = columns
+        self._build_arrays(
+            np.concatenate([self._ids[keep], np.asarray(ids, np.int64)]),
+            np.concatenate([self._sellers[keep], np.asarray(sellers, np.int64)]),
+            np.concatenate([self._partners[keep], np.asarray(partners, np.int64)]),
+            np.concatenate([self._geohashes[keep], np.asarray(geohashes, np.int64)]),
+            np.concatenate([self._coordinates[keep], np.column_stack([np.asarray(latitudes, np.float64), np.asarray(longitudes, np.float64)])]),
+            np.concatenate([self._starts[keep], np.asarray(starts, np.int64)]),
+            np.concatenate([self._ends[keep], np.asarray(ends, np.int64)]),
+            np.concatenate([self._exclusive[keep], np.asarray(exclusive, bool)]),
+        )
+
+    def _candidate_positions(self, seller_id: int, location: SellerLocation, radius_km: float) -> np.ndarray:
+        # Slots of the seller's sides whose partner may lie within the radius of `location`
+        node = int(np.searchsorted(self._nodes, seller_id))
+        if node == len(self._nodes) or self._nodes[node] != seller_id:
+            return np.empty(0, np.int64)
+        start, stop = int(self._indptr[node]), int(self._indptr[node + 1])
+        if stop - start <= SMALL_SLICE:
+            return np.arange(start, stop)
+        ranges = np.asarray(
+            [geohash_prefix_range(prefix) for prefix in geohash_cells_covering(location.latitude, location.longitude, radius_km)],
+            np.int64,
+        )
+        if not len(ranges):
+            return np.arange(start, stop)
+        bounds = np.searchsorted(self._geohashes[start:stop], ranges.ravel()).reshape(-1, 2) + start
+        return np.concatenate([np.arange(first, last) for first, last in bounds])
+
+    def conflicts(
+        self,
+        seller_id: int,
+        partner_seller_id: int,
+        locations: Dict[int, SellerLocation],
+        start_date: Optional[datetime],
+        end_date: Optional[datetime],
+        exclusive: bool,
+        radius_km: float,
+        exclude_collaboration_id: Optional[int] = None,
+        now: Optional[datetime] = None,
+    ) -> List[RegionConflict]:
+        """
+        Find the collaborations a proposed collaboration between two sellers would conflict with.
+
+        For each party, the running collaborations with a partner (other than the proposed
+        one) within `radius_km` of the proposed partner conflict if they overlap the proposed
+        dates and either of the two is exclusive. Only the time from `now` on is checked.
+
+        :param seller_id: ID of the proposing seller.
+        :param partner_seller_id: ID of the proposed partner.
+        :param locations: Warehouse locations of both sellers by seller id; sellers without one are in no region.
+        :param start_date: Proposed start; None means open-ended.
+        :param end_date: Proposed end; None means open-ended.
+        :param exclusive: Whether the proposed collaboration is geographically exclusive.
+        :param radius_km: Radius of an exclusive region around a partner's warehouse.
+        :param exclude_collaboration_id: Collaboration to ignore, e.g. the one being updated.
+        :param now: Reference time; defaults to the current UTC time.
+        :return: The conflicts, by collaboration id.
+        """
+        start = max(_micros(start_date, NO_START), _micros(now or datetime.utcnow(), 0))
+        end = _micros(end_date, NO_END)
+        if start >= end or seller_id == partner_seller_id:
+            return []
+
+        results = []
+        with self._lock:
+            for holder, other in ((seller_id, partner_seller_id), (partner_seller_id, seller_id)):
+                location = locations.get(other)
+                if location is None:
+                    continue
+                positions = self._candidate_positions(holder, location, radius_km)
+                if len(positions):
+                    keep = (self._partners[positions] != other) & (self._starts[positions] < end) & (self._ends[positions] > start)
+                    if not exclusive:
+                        keep &= self._exclusive[positions]
+                    if exclude_collaboration_id is not None:
+                        keep &= self._ids[positions] != exclude_collaboration_id
+                    if self._removed:
+                        keep &= ~np.isin(self._ids[positions], self._removed_ids())
+                    positions = positions[keep]
+                if len(positions):
+                    query = np.radians([[location.latitude, location.longitude]])
+                    distances = haversine_km_matrix(query, self._coordinates[positions])[0]
+                    for position, distance in zip(positions.tolist(), distances.tolist()):
+                        if distance <= radius_km:
+                            results.append(RegionConflict(
+                                int(self._ids[position]), holder, int(self._partners[position]), distance,
+                                bool(self._exclusive[position]), _datetime(self._starts[position]), _datetime(self._ends[position]),
+                            ))
+
+                for side in self._pending.get(holder, ()):
+                    if side.partner_seller_id == other or side.collaboration_id == exclude_collaboration_id \
+                            or not (side.exclusive or exclusive) or side.start >= end or side.end <= start:
+                        continue
+                    distance = haversine_km(location.latitude, location.longitude, np.degrees(side.latitude), np.degrees(side.longitude))
+                    if distance <= radius_km:
+                        results.append(RegionConflict(
+                            side.collaboration_id, holder, side.partner_seller_id, distance,
+                            side.exclusive, _datetime(side.start), _datetime(side.end),
+                        ))
+        return sorted(results, key=lambda conflict: (conflict.collaboration_id, conflict.seller_id))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "loaded": self._loaded,
+                "sides": len(self),
+                "sellers": len(self._nodes),
+                "pending_sides": self._pending_count,
+                "removed_collaborations": len(self._removed),
+            }
+
+
+exclusivity_index = ExclusivityIndex()
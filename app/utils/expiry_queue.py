@@ -0,0 +1,159 @@
+import heapq
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+COMPACT_STALE_RATIO = 1.0  # Rebuild the heap once stale entries outnumber the live ones
+MIN_COMPACT_STALE = 1024
+
+
+class ExpiryQueue:
+    """
+    In-process min-heap of the upcoming expiries, ordered by end date.
+
+    The heap only covers a window of time: refill() loads every pending expiry up to a
+    horizon from the end-date index, and writes in this process add or move their own row
+    with schedule(). An entry whose row was rescheduled or removed is not searched for in
+    the heap; it is left in place and skipped when it reaches the top, and the heap is
+    rebuilt once such stale entries pile up.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._heap: List[Tuple[datetime, str, int]] = []
+        self._scheduled: Dict[Tuple[str, int], datetime] = {}  # (entity, id) -> end date of its live entry
+        self._horizon: Optional[datetime] = None
+        self._listener: Optional[Callable[[], None]] = None
+
+    @property
+    def horizon(self) -> Optional[datetime]:
+        """
+        Every pending expiry up to this time is in the heap; None before the first refill.
+        """
+        return self._horizon
+
+    def __len__(self) -> int:
+        return len(self._scheduled)
+
+    def set_listener(self, listener: Optional[Callable[[], None]]) -> None:
+        """
+        Call `listener` whenever schedule() moves the earliest expiry forward, so the
+        scheduler doesn't sleep past it.
+        """
+        self._listener = listener
+
+    def schedule(self, entity: str, row_id: int, end_date: Optional[datetime]) -> None:
+        """
+        Record the end date a row has after a write. Rows without an end date, already
+        expired (pass None) or ending past the horizon are dropped; the refill that moves the
+        horizon past their end date loads them again.
+
+        :param entity: 'collaboration' or 'contract'.
+        :param row_id: ID of the row.
+        :param end_date: When the row expires, or None if it has nothing left to expire.
+        """
+        key = (entity, row_id)
+        with self._lock:
+            if end_date is None or self._horizon is None or end_date > self._horizon:
+                self._scheduled.pop(key, None)
+                return
+            if self._scheduled.get(key) == end_date:
+                return
+            self._scheduled[key] = end_date
+            heapq.heappush(self._heap, (end_date, entity, row_id))
+            earliest = self._heap[0] == (end_date, entity, row_id)
+            self._compact_if_needed()
+        if earliest and self._listener is not None:
+            self._listener()
+
+    def discard(self, entity: str, row_id: int) -> None:
+        """
+        Forget a deleted row.
+        """
+        with self._lock:
+            self._scheduled.pop((entity, row_id), None)
+
+    def refill(self, expiries: Iterable[Tuple[str, int, datetime]], horizon: datetime) -> int:
+        """
+        Merge the pending expiries loaded from the database and move the horizon.
+
+        :param expiries: (entity, id, end date) of every pending expiry up to `horizon`.
+        :param horizon: End of the window the expiries were loaded for.
+        :return: The number of expiries that were not queued yet.
+        """
+        added = 0
+        with self._lock:
+            for entity, row_id, end_date in expiries:
+                key = (entity, row_id)
+                if self._scheduled.get(key) == end_date:
+                    continue
+                self._scheduled[key] = end_date
+                self._heap.append((end_date, entity, row_id))
+                added += 1
+            heapq.heapify(self._heap)
+            self._horizon = horizon
+            self._compact_if_needed()
+        return added
+
+    def reset(self) -> None:
+        """
+        Drop everything, e.g. after a failed expiry run; the next refill reloads the pending rows.
+        """
+        with self._lock:
+            self._heap, self._scheduled, self._horizon = [], {}, None
+
+    def _pop_stale(self) -> None:
+        while self._heap:
+            end_date, entity, row_id = self._heap[0]
+            if self._scheduled.get((entity, row_id)) == end_date:
+                return
+            heapq.heappop(self._heap)
+
+    def next_due(self) -> Optional[datetime]:
+        """
+        The earliest queued end date, or None when nothing is queued.
+        """
+        with self._lock:
+            self._pop_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: datetime, limit: int) -> Dict[str, List[int]]:
+        """
+        Remove the rows whose end date has passed, earliest first.
+
+        :param now: The current time.
+        :param limit: Maximum number of rows to return.
+        :return: Dictionary of entity to IDs of its rows due for expiry.
+        """
+        due = defaultdict(list)
+        count = 0
+        with self._lock:
+            while count < limit:
+                self._pop_stale()
+                if not self._heap or self._heap[0][0] > now:
+                    break
+                _, entity, row_id = heapq.heappop(self._heap)
+                del self._scheduled[(entity, row_id)]
+                due[entity].append(row_id)
+                count += 1
+        return dict(due)
+
+    def _compact_if_needed(self) -> None:
+        stale = len(self._heap) - len(self._scheduled)
+        if stale > max(MIN_COMPACT_STALE, COMPACT_STALE_RATIO * len(self._scheduled)):
+            self._heap = [(end_date, entity, row_id) for (entity, row_id), end_date in self._scheduled.items()]
+            heapq.heapify(self._heap)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            self._pop_stale()
+            return {
+                "queued": len(self._scheduled),
+                "heap_entries": len(self._heap),
+                "next_due_at": self._heap[0][0] if self._heap else None,
+                "horizon": self._horizon,
+            }
+
+
+expiry_queue = ExpiryQueue()
@@ -0,0 +1,68 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterable, Iterator, Mapping, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+EXPORT_BATCH_SIZE = 1000  # Rows fetched per round-trip from the server-side cursor
+EXPORT_CHUNK_BYTES = 64 * 1024  # NDJSON lines are sent in chunks of about this size
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def stream_rows(
+    db: Session, model, seller_id: Optional[int] = None, criteria=(), batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[Mapping]:
+    """
+    Stream every row of `model`'s table matching the criteria, as column mappings.
+
+    Rows come from a server-side cursor (yield_per implies stream_results) and are never
+    turned into ORM objects, so memory stays constant however many rows match. With a
+    seller, the rows where it is the seller and the rows where it is the partner are read
+    one after the other, each in id order along its (seller column, id) index.
+
+    :param db: The database session.
+    :param model: Mapped class with seller_id, partner_seller_id and id columns.
+    :param seller_id: Only rows of this seller (as seller or partner); None exports every row.
+    :param criteria: Extra filter expressions.
+    :param batch_size: Rows fetched per round-trip.
+    :return: An iterator of row mappings (column name to value).
+    """
+    table = model.__table__
+    if seller_id is None:
+        statements = [select(table).where(*criteria)]
+    else:
+        statements = [
+            select(table).where(table.c.seller_id == seller_id, *criteria),
+            select(table).where(table.c.partner_seller_id == seller_id, table.c.seller_id != seller_id, *criteria),
+        ]
+
+    for statement in statements:
+        result = db.execute(statement.order_by(table.c.id).execution_options(yield_per=batch_size))
+        try:
+            yield from result.mappings()
+        finally:
+            result.close()
+
+
+def iter_ndjson(rows: Iterable[Mapping], chunk_bytes: int = EXPORT_CHUNK_BYTES) -> Iterator[bytes]:
+    """
+    Encode rows as newline-delimited JSON, grouped into chunks of roughly `chunk_bytes`.
+    """
+    buffer, size = [], 0
+    for row in rows:
+        line = json.dumps(dict(row), default=_json_default, separators=(",", ":")).encode() + b"\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= chunk_bytes:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
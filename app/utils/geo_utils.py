@@ -0,0 +1,210 @@
+import math
+from typing import Iterator, List, Optional, Tuple
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+# Geohash base32 alphabet (no a, i, l, o)
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 9  # ~5m x 5m cells, fine enough to serve any radius by prefix
+MAX_COVERING_CELLS = 16  # Upper bound on cells probed by a single radius query
+
+
+def parse_location(location: str) -> Tuple[float, float]:
+    """
+    Parse a 'latitude,longitude' string into a pair of floats.
+
+    :param location: Coordinates as 'latitude,longitude'.
+    :return: Tuple of (latitude, longitude).
+    """
+    try:
+        lat, lon = map(float, location.split(','))
+    except (AttributeError, ValueError):
+        raise ValueError("Invalid format for location. Please provide coordinates as 'latitude,longitude'.")
+
+    if not -90.0 <= lat <= 90.0 or not -180.0 <= lon <= 180.0:
+        raise ValueError("Location out of range. Latitude must be within [-90, 90] and longitude within [-180, 180].")
+    return lat, lon
+
+
+def try_parse_location(location: Optional[str]) -> Optional[Tuple[float, float]]:
+    """
+    Parse a 'latitude,longitude' string, returning None instead of raising on bad input.
+    """
+    if not location:
+        return None
+    try:
+        return parse_location(location)
+    except ValueError:
+        return None
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Great-circle distance between two points given in degrees.
+
+    :return: Distance in kilometers.
+    """
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
+
+    a = math.sin(dlat / 2)**2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon / 2)**2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+    return EARTH_RADIUS_KM * c
+
+
+def haversine_km_matrix(origins: np.ndarray, destinations: np.ndarray) -> np.ndarray:
+    """
+    Vectorized great-circle distances between every origin and every destination.
+
+    :param origins: Array of shape (N, 2) holding (latitude, longitude) in radians.
+    :param destinations: Array of shape (M, 2) holding (latitude, longitude) in radians.
+    :return: Array of shape (N, M) with distances in kilometers.
+    """
+    lat1 = origins[:, 0:1]
+    lon1 = origins[:, 1:2]
+    lat2 = destinations[:, 0][np.newaxis, :]
+    lon2 = destinations[:, 1][np.newaxis, :]
+
+    a = np.sin((lat2 - lat1) / 2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2)**2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def iter_haversine_km_blocks(origins: np.ndarray, destinations: np.ndarray, max_chunk_elements: int) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Compute the origin x destination distance matrix in row blocks of at most `max_chunk_elements`
+    cells, so temporaries stay bounded no matter how large the full matrix is.
+
+    :param origins: Array of shape (N, 2) holding (latitude, longitude) in radians.
+    :param destinations: Array of shape (M, 2) holding (latitude, longitude) in radians.
+    :param max_chunk_elements: Upper bound on the number of cells computed per block.
+    :return: Iterator of (first_row_index, block) pairs.
+    """
+    rows_per_chunk = max(1, max_chunk_elements // max(len(destinations), 1))
+    for start in range(0, len(origins), rows_per_chunk):
+        yield start, haversine_km_matrix(origins[start:start + rows_per_chunk], destinations)
+
+
+def bounding_box(lat: float, lon: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """
+    Compute a lat/lon box that fully contains the circle of `radius_km` around a point.
+    Longitudes are left unwrapped, so min_lon may be < -180 or max_lon > 180 near the antimeridian.
+
+    :return: Tuple of (min_lat, min_lon, max_lat, max_lon).
+    """
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat = max(lat - dlat, -90.0)
+    max_lat = min(lat + dlat, 90.0)
+
+    # Near the poles (or for huge radii) every longitude can be within reach
+    cos_lat = min(math.cos(math.radians(min_lat)), math.cos(math.radians(max_lat)))
+    if min_lat <= -90.0 or max_lat >= 90.0 or cos_lat <= 0:
+        return min_lat, -180.0, max_lat, 180.0
+    dlon = math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat))
+    if dlon >= 180.0:
+        return min_lat, -180.0, max_lat, 180.0
+    return min_lat, lon - dlon, max_lat, lon + dlon
+
+
+def _geohash_cell_size(precision: int) -> Tuple[float, float]:
+    """
+    Return the (height, width) in degrees of a geohash cell at the given precision.
+    """
+    bits = precision * 5
+    lon_bits = (bits + 1) // 2
+    lat_bits = bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def encode_geohash(lat: float, lon: float, precision: int = GEOHASH_PRECISION) -> str:
+    """
+    Encode a coordinate pair as a geohash string.
+
+    :param lat: Latitude in degrees.
+    :param lon: Longitude in degrees.
+    :param precision: Number of base32 characters in the result.
+    :return: The geohash of the cell containing the point.
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bit, ch, even = 0, 0, True
+
+    while len(chars) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            ch = (ch << 1) | 1
+            rng[0] = mid
+        else:
+            ch = ch << 1
+            rng[1] = mid
+        even = not even
+        bit += 1
+        if bit == 5:
+            chars.append(GEOHASH_ALPHABET[ch])
+            bit, ch = 0, 0
+
+    return "".join(chars)
+
+
+def geohash_cells_covering(lat: float, lon: float, radius_km: float, max_cells: int = MAX_COVERING_CELLS) -> List[str]:
+    """
+    Return the geohash prefixes whose cells together cover the circle of `radius_km` around a point.
+
+    The finest precision that needs at most `max_cells` cells is chosen, so small radii probe a few
+    tight cells while large radii fall back to coarser ones.
+
+    :return: A list of geohash prefixes to match sellers against.
+    """
+    min_lat, min_lon, max_lat, max_lon = bounding_box(lat, lon, radius_km)
+
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = _geohash_cell_size(precision)
+        lat_cells = int(180.0 / height)
+        lon_cells = int(360.0 / width)
+
+        i_min = int((min_lat + 90.0) // height)
+        i_max = min(int((max_lat + 90.0) // height), lat_cells - 1)
+        j_min = int((min_lon + 180.0) // width)
+        j_max = int((max_lon + 180.0) // width)
+        if j_max - j_min + 1 >= lon_cells:
+            j_min, j_max = 0, lon_cells - 1
+
+        if (i_max - i_min + 1) * (j_max - j_min + 1) > max_cells and precision > 1:
+            continue
+
+        cells = set()
+        for i in range(i_min, i_max + 1):
+            cell_lat = -90.0 + (i + 0.5) * height
+            for j in range(j_min, j_max + 1):
+                cell_lon = -180.0 + ((j % lon_cells) + 0.5) * width
+                cells.add(encode_geohash(cell_lat, cell_lon, precision))
+        return sorted(cells)
+
+    return []
+
+
+def geohash_to_int(geohash: str, precision: int = GEOHASH_PRECISION) -> int:
+    """
+    Convert a geohash into an integer of `precision` * 5 bits. Geohashes sharing a prefix map to
+    one contiguous integer range, so points sorted by this value can be searched by prefix.
+
+    :param geohash: Geohash of at most `precision` characters; shorter ones are padded with zero bits.
+    :return: The geohash bits as an integer.
+    """
+    value = 0
+    for char in geohash[:precision]:
+        value = (value << 5) | GEOHASH_ALPHABET.index(char)
+    return value << 5 * (precision - min(len(geohash), precision))
+
+
+def geohash_prefix_range(prefix: str, precision: int = GEOHASH_PRECISION) -> Tuple[int, int]:
+    """
+    The half-open range of geohash_to_int values of every geohash starting with `prefix`.
+
+    :return: Tuple of (first value, one past the last value).
+    """
+    start = geohash_to_int(prefix, precision)
+    return start, start + (1 << 5 * (precision - min(len(prefix), precision)))
@@ -0,0 +1,150 @@
+import threading
+from typing import Optional
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from app.config import settings
+from app.utils.circuit_breaker import CircuitBreaker, get_circuit_breaker
+
+
+class DownstreamClient:
+    """
+    Shared HTTP client for one downstream service.
+
+    Sync callers go through a single requests.Session whose adapter keeps a pool of keep-alive
+    connections to the host; async callers get an httpx.AsyncClient with the same limits.
+    Every request carries explicit connect/read timeouts and goes through the service's
+    circuit breaker: transport errors and 5xx responses count as failures, and while the
+    circuit is open requests fail fast with CircuitOpenError instead of waiting on the service.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        connect_timeout: float = settings.DOWNSTREAM_CONNECT_TIMEOUT,
+        read_timeout: float = settings.DOWNSTREAM_READ_TIMEOUT,
+        pool_maxsize: int = settings.DOWNSTREAM_POOL_MAXSIZE,
+    ):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.pool_maxsize = pool_maxsize
+        self._lock = threading.Lock()
+        self._session: Optional[requests.Session] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self.breaker: CircuitBreaker = get_circuit_breaker(name)
+
+    def url(self, path: str = "") -> str:
+        return f"{self.base_url}{path}"
+
+    @property
+    def session(self) -> requests.Session:
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize)
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    self._session = session
+        return self._session
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(max_connections=self.pool_maxsize, max_keepalive_connections=self.pool_maxsize),
+            )
+        return self._async_client
+
+    def request(self, method: str, path: str = "", **kwargs) -> requests.Response:
+        """
+        Send a request on the pooled session.
+
+        :param method: HTTP method.
+        :param path: Path appended to the service base URL.
+        :return: The response; raises requests.exceptions.RequestException on transport errors
+            and CircuitOpenError while the service's circuit is open.
+        """
+        kwargs.setdefault("timeout", (self.connect_timeout, self.read_timeout))
+        self.breaker.before_call()
+        try:
+            response = self.session.request(method, self.url(path), **kwargs)
+        except requests.exceptions.RequestException:
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            self.breaker.abandon()
+            raise
+        self._record_status(response.status_code)
+        return response
+
+    def _record_status(self, status_code: int):
+        if status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def get(self, path: str = "", **kwargs) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str = "", **kwargs) -> requests.Response:
+        return self.request("POST", path, **kwargs)
+
+    def put(self, path: str = "", **kwargs) -> requests.Response:
+        return self.request("PUT", path, **kwargs)
+
+    def delete(self, path: str = "", **kwargs) -> requests.Response:
+        return self.request("DELETE", path, **kwargs)
+
+    async def arequest(self, method: str, path: str = "", **kwargs) -> httpx.Response:
+        """
+        Send a request on the pooled async client.
+
+        :param method: HTTP method.
+        :param path: Path appended to the service base URL.
+        :return: The response; raises httpx.HTTPError on transport errors and CircuitOpenError
+            while the service's circuit is open.
+        """
+        self.breaker.before_call()
+        try:
+            response = await self.async_client.request(method, self.url(path), **kwargs)
+        except httpx.HTTPError:
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            self.breaker.abandon()
+            raise
+        self._record_status(response.status_code)
+        return response
+
+    async def aget(self, path: str = "", **kwargs) -> httpx.Response:
+        return await self.arequest("GET", path, **kwargs)
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+
+brand_service_client = DownstreamClient("brands", settings.BRAND_SERVICE_URL, read_timeout=settings.BRAND_SERVICE_READ_TIMEOUT)
+category_service_client = DownstreamClient("categories", settings.CATEGORY_SERVICE_URL, read_timeout=settings.CATEGORY_SERVICE_READ_TIMEOUT)
+
+downstream_clients = [brand_service_client, category_service_client]
+
+
+async def close_downstream_clients():
+    """
+    Release pooled connections of every downstream client (called on application shutdown).
+    """
+    for client in downstream_clients:
+        client.close()
+        await client.aclose()
@@ -0,0 +1,281 @@
+import heapq
+import math
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.utils.geo_utils import EARTH_RADIUS_KM
+
+REBUILD_DEAD_RATIO = 0.5  # Rebuild once this share of tree nodes are tombstones
+REBUILD_GROWTH_RATIO = 1.0  # Rebuild once inserts since the last build exceed this share of it
+
+
+def _to_unit_vector(lat: float, lon: float) -> Tuple[float, float, float]:
+    """
+    Project a coordinate onto the unit sphere. Euclidean (chord) distance between unit vectors
+    grows monotonically with great-circle distance, so nearest neighbours in 3D are the
+    nearest neighbours by Haversine distance.
+    """
+    lat_rad, lon_rad = math.radians(lat), math.radians(lon)
+    cos_lat = math.cos(lat_rad)
+    return cos_lat * math.cos(lon_rad), cos_lat * math.sin(lon_rad), math.sin(lat_rad)
+
+
+def _chord_to_km(chord: float) -> float:
+    return 2 * EARTH_RADIUS_KM * math.asin(min(chord / 2, 1.0))
+
+
+def _km_to_chord(distance_km: float) -> float:
+    return 2 * math.sin(min(distance_km / (2 * EARTH_RADIUS_KM), math.pi / 2))
+
+
+def _collaboration_type_tokens(preferred_collaboration_types: Optional[str]) -> frozenset:
+    """
+    Normalise a free-form preference such as 'B2B', 'B2B,B2C' or 'Both' into a set of types.
+    """
+    if not preferred_collaboration_types:
+        return frozenset()
+    tokens = {token for token in re.split(r"[\s,/|]+", preferred_collaboration_types.upper()) if token}
+    if "BOTH" in tokens:
+        tokens.update({"B2B", "B2C"})
+    return frozenset(tokens)
+
+
+class SellerKNNIndex:
+    """
+    In-process k-nearest-neighbour index over seller warehouse coordinates.
+
+    Backed by a KD-tree over unit-sphere coordinates. Seller writes are applied incrementally:
+    inserts descend the tree and attach a new leaf, deletes leave a tombstone, and the tree is
+    rebuilt (balanced) only when tombstones or unbalanced inserts pile up.
+
+    Each process holds its own copy. Writes made through this process are applied as they
+    commit; those of other workers or of the import CLI are picked up by get_seller_knn_index,
+    which reads the sellers written since its last look by updated_at before every query.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._reset()
+
+    def _reset(self):
+        self._points: List[Tuple[float, float, float]] = []
+        self._seller_ids: List[int] = []
+        self._is_active: List[bool] = []
+        self._types: List[frozenset] = []
+        self._alive: List[bool] = []
+        self._left: List[int] = []
+        self._right: List[int] = []
+        self._axis: List[int] = []
+        self._root = -1
+        self._node_by_seller: Dict[int, int] = {}
+        self._built_size = 0
+        self._inserted_since_build = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def __len__(self) -> int:
+        return len(self._node_by_seller)
+
+    def load(self, sellers) -> None:
+        """
+        Replace the index contents with the given sellers and build a balanced tree.
+
+        :param sellers: Iterable of objects with id, latitude, longitude, is_active and
+                        preferred_collaboration_types attributes.
+        """
+        with self._lock:
+            entries = [
+                (seller.id, seller.latitude, seller.longitude, seller.is_active, seller.preferred_collaboration_types)
+                for seller in sellers
+                if seller.latitude is not None and seller.longitude is not None
+            ]
+            self._build(entries)
+            self._loaded = True
+
+    def _build(self, entries) -> None:
+        self._reset()
+        for seller_id, lat, lon, is_active, preferred_types in entries:
+            self._append_node(seller_id, lat, lon, is_active, preferred_types)
+        if self._points:
+            points = np.asarray(self._points)
+            self._root = self._build_subtree(points, np.arange(len(points)), 0)
+        self._built_size = len(self._points)
+
+    def _build_subtree(self, points: np.ndarray, indices: np.ndarray, depth: int) -> int:
+        if len(indices) == 0:
+            return -1
+        axis = depth % 3
+        median = len(indices) // 2
+        order = np.argpartition(points[indices, axis], median)
+        indices = indices[order]
+        node = int(indices[median])
+        self._axis[node] = axis
+        self._left[node] = self._build_subtree(points, indices[:median], depth + 1)
+        self._right[node] = self._build_subtree(points, indices[median + 1:], depth + 1)
+        return node
+
+    def _append_node(self, seller_id: int, lat: float, lon: float, is_active: Optional[bool], preferred_types: Optional[str]) -> int:
+        node = len(self._points)
+        self._points.append(_to_unit_vector(lat, lon))
+        self._seller_ids.append(seller_id)
+        self._is_active.append(bool(is_active) if is_active is not None else True)
+        self._types.append(_collaboration_type_tokens(preferred_types))
+        self._alive.append(True)
+        self._left.append(-1)
+        self._right.append(-1)
+        self._axis.append(0)
+        self._node_by_seller[seller_id] = node
+        return node
+
+    def upsert(self, seller) -> None:
+        """
+        Insert or refresh a seller after it has been written. Sellers without coordinates are removed.
+        No-op until the index has been loaded, since the initial load will pick the seller up.
+
+        :param seller: The persisted seller object.
+        """
+        with self._lock:
+            if not self._loaded or self._unchanged(seller):
+                return
+            self._tombstone(seller.id)
+            if seller.latitude is None or seller.longitude is None:
+                self._maybe_rebuild()
+                return
+
+            node = self._append_node(
+                seller.id, seller.latitude, seller.longitude, seller.is_active, seller.preferred_collaboration_types
+            )
+            self._inserted_since_build += 1
+            if self._root == -1:
+                self._root = node
+            else:
+                self._attach(node)
+            self._maybe_rebuild()
+
+    def _unchanged(self, seller) -> bool:
+        node = self._node_by_seller.get(seller.id)
+        if node is None:
+            return seller.latitude is None or seller.longitude is None
+        return seller.latitude is not None and seller.longitude is not None \
+            and self._points[node] == _to_unit_vector(seller.latitude, seller.longitude) \
+            and self._is_active[node] == (bool(seller.is_active) if seller.is_active is not None else True) \
+            and self._types[node] == _collaboration_type_tokens(seller.preferred_collaboration_types)
+
+    def remove(self, seller_id: int) -> None:
+        """
+        Drop a seller from the index.
+        """
+        with self._lock:
+            if self._tombstone(seller_id):
+                self._maybe_rebuild()
+
+    def _tombstone(self, seller_id: int) -> bool:
+        node = self._node_by_seller.pop(seller_id, None)
+        if node is None:
+            return False
+        self._alive[node] = False
+        return True
+
+    def _attach(self, node: int) -> None:
+        point = self._points[node]
+        current, depth = self._root, 0
+        while True:
+            axis = self._axis[current]
+            branch = self._left if point[axis] < self._points[current][axis] else self._right
+            child = branch[current]
+            depth += 1
+            if child == -1:
+                branch[current] = node
+                self._axis[node] = depth % 3
+                return
+            current = child
+
+    def _maybe_rebuild(self) -> None:
+        total = len(self._points)
+        dead = total - len(self._node_by_seller)
+        if (total and dead > REBUILD_DEAD_RATIO * total) or \
+                self._inserted_since_build > max(REBUILD_GROWTH_RATIO * self._built_size, 64):
+            self._build([
+                (
+                    self._seller_ids[node],
+                    *self._node_coordinates(node),
+                    self._is_active[node],
+                    ",".join(sorted(self._types[node])),
+                )
+                for node in self._node_by_seller.values()
+            ])
+
+    def _node_coordinates(self, node: int) -> Tuple[float, float]:
+        x, y, z = self._points[node]
+        return math.degrees(math.asin(max(-1.0, min(1.0, z)))), math.degrees(math.atan2(y, x))
+
+    def nearest(
+        self,
+        lat: float,
+        lon: float,
+        k: int,
+        active_only: bool = True,
+        collaboration_type: Optional[str] = None,
+        max_distance_km: Optional[float] = None,
+        exclude_seller_id: Optional[int] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        Find the k nearest sellers to a coordinate.
+
+        :param lat: Latitude of the query point.
+        :param lon: Longitude of the query point.
+        :param k: Number of sellers to return.
+        :param active_only: Only consider sellers whose account is active.
+        :param collaboration_type: Only consider sellers that prefer this type (B2B/B2C).
+        :param max_distance_km: Optional cut-off distance.
+        :param exclude_seller_id: Seller to leave out of the results (usually the requester).
+        :return: List of (seller_id, distance_km) pairs, nearest first.
+        """
+        wanted_type = collaboration_type.upper() if collaboration_type else None
+        query = _to_unit_vector(lat, lon)
+        bound = _km_to_chord(max_distance_km) ** 2 if max_distance_km is not None else math.inf
+
+        if k <= 0:
+            return []
+
+        with self._lock:
+            best: List[Tuple[float, int]] = []  # Max-heap of (-squared_chord, node)
+            # Stack of (node, lower bound on the squared distance to anything in its subtree)
+            stack = [(self._root, 0.0)] if self._root != -1 else []
+            while stack:
+                node, lower_bound = stack.pop()
+                worst = -best[0][0] if len(best) == k else bound
+                if lower_bound > worst:
+                    continue
+
+                point = self._points[node]
+                dx, dy, dz = point[0] - query[0], point[1] - query[1], point[2] - query[2]
+                squared = dx * dx + dy * dy + dz * dz
+
+                if squared <= worst and self._alive[node] and self._seller_ids[node] != exclude_seller_id \
+                        and (not active_only or self._is_active[node]) \
+                        and (wanted_type is None or wanted_type in self._types[node]):
+                    if len(best) == k:
+                        heapq.heapreplace(best, (-squared, node))
+                    else:
+                        heapq.heappush(best, (-squared, node))
+                    worst = -best[0][0] if len(best) == k else bound
+
+                axis = self._axis[node]
+                diff = query[axis] - point[axis]
+                near, far = (self._left[node], self._right[node]) if diff < 0 else (self._right[node], self._left[node])
+                # Push the far side first so the near side is explored first
+                if far != -1 and diff * diff <= worst:
+                    stack.append((far, max(lower_bound, diff * diff)))
+                if near != -1:
+                    stack.append((near, lower_bound))
+
+            results = sorted((-negative, node) for negative, node in best)
+            return [(self._seller_ids[node], _chord_to_km(math.sqrt(squared))) for squared, node in results]
+
+
+seller_knn_index = SellerKNNIndex()
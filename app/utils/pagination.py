@@ -0,0 +1,170 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+from sqlalchemy import func, select, union_all
+from sqlalchemy.orm import Session, aliased
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(values: Sequence) -> str:
+    """
+    Encode the sort key of the last row of a page as an opaque, URL-safe cursor.
+    """
+    payload = json.dumps([value.isoformat() if isinstance(value, datetime) else value for value in values])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List:
+    """
+    Decode a cursor made by encode_cursor. Datetimes come back as ISO strings.
+
+    :raises ValueError: If the cursor is malformed.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, binascii.Error) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def split_page(rows: Sequence, limit: Optional[int]) -> Tuple[List, Optional[int]]:
+    """
+    Trim the extra look-ahead row fetched by a keyset query and derive the next cursor.
+
+    :param rows: Rows fetched with a limit of `limit + 1`.
+    :param limit: The requested page size; None means the query was not limited.
+    :return: Tuple of (rows, next_cursor); next_cursor is None on the last page.
+    """
+    rows = list(rows)
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        return rows, rows[-1].id
+    return rows, None
+
+
+def keyset_paginate(query, id_column, limit: Optional[int] = None, after: Optional[int] = None) -> Tuple[List, Optional[int]]:
+    """
+    Apply keyset (seek) pagination on an ascending id column.
+
+    Rather than OFFSET, the page starts right after the last id the client saw, so with an
+    index ending in the id column every page costs the same no matter how deep it is.
+
+    :param query: The filtered SQLAlchemy query.
+    :param id_column: The id column to order and seek on.
+    :param limit: Maximum number of rows to return; None returns every remaining row.
+    :param after: The id of the last row of the previous page.
+    :return: Tuple of (rows, next_cursor); next_cursor is None on the last page.
+    """
+    if after is not None:
+        query = query.filter(id_column > after)
+    query = query.order_by(id_column)
+
+    if limit is None:
+        return query.all(), None
+    return split_page(query.limit(limit + 1).all(), limit)
+
+
+def seller_scoped_select(model, seller_id: int, criteria=(), limit: Optional[int] = None, after: Optional[int] = None):
+    """
+    Build a keyset-paginated select of the rows of `model` where the seller is either the seller or the partner.
+
+    `seller_id = x OR partner_seller_id = x` usually defeats index use, so the query is split into
+    one branch per column, combined with UNION ALL. Each branch seeks and limits on its own
+    (seller_id, ..., id) index before the small merged result is ordered and trimmed.
+    Rows where the seller partners with itself only come from the first branch.
+
+    The statement fetches one look-ahead row; pass the result through split_page.
+
+    :param model: Mapped class with seller_id, partner_seller_id and id columns.
+    :param seller_id: ID of the seller.
+    :param criteria: Extra filter expressions applied to both branches.
+    :param limit: Maximum number of rows to return; None returns every remaining row.
+    :param after: The id of the last row of the previous page.
+    :return: A select() over an entity aliased to `model`.
+    """
+    branch_filters = [
+        (model.seller_id == seller_id,),
+        (model.partner_seller_id == seller_id, model.seller_id != seller_id),
+    ]
+    branches = []
+    for filters in branch_filters:
+        branch = select(model).where(*filters, *criteria)
+        if after is not None:
+            branch = branch.where(model.id > after)
+        if limit is not None:
+            branch = branch.order_by(model.id).limit(limit + 1)
+        branches.append(select(branch.subquery()))
+
+    entity = aliased(model, union_all(*branches).subquery())
+    statement = select(entity).order_by(entity.id)
+    if limit is not None:
+        statement = statement.limit(limit + 1)
+    return statement
+
+
+def seller_scoped_page(
+    db: Session, model, seller_id: int, criteria=(), limit: Optional[int] = None, after: Optional[int] = None
+) -> Tuple[List, Optional[int]]:
+    """
+    Keyset-paginate the rows of `model` where the seller is either the seller or the partner.
+    See seller_scoped_select for how the query is built.
+
+    :param db: The database session.
+    :param model: Mapped class with seller_id, partner_seller_id and id columns.
+    :param seller_id: ID of the seller.
+    :param criteria: Extra filter expressions applied to both branches.
+    :param limit: Maximum number of rows to return; None returns every remaining row.
+    :param after: The id of the last row of the previous page.
+    :return: Tuple of (rows, next_cursor); next_cursor is None on the last page.
+    """
+    statement = seller_scoped_select(model, seller_id, criteria, limit, after)
+    return split_page(db.execute(statement).scalars().all(), limit)
+
+
+def seller_scoped_version_select(model, seller_id: int):
+    """
+    Build a cheap change probe over the rows of `model` where the seller is either the seller
+    or the partner: the row count and latest updated_at of each branch, combined with UNION ALL.
+
+    Each branch is answered from a (seller column, updated_at) index without touching the rows.
+    Rows where the seller partners with itself are counted by both branches, which doesn't
+    matter for detecting changes.
+
+    :param model: Mapped class with seller_id, partner_seller_id and updated_at columns.
+    :param seller_id: ID of the seller.
+    :return: A select() yielding one (count, max updated_at) row per branch; combine them with merge_versions.
+    """
+    return union_all(*(
+        select(func.count(), func.max(model.updated_at)).where(column == seller_id)
+        for column in (model.seller_id, model.partner_seller_id)
+    ))
+
+
+def merge_versions(rows) -> Tuple[int, Optional[datetime]]:
+    """
+    Combine the branch rows of seller_scoped_version_select into (row count, latest updated_at).
+    """
+    count, latest = 0, None
+    for branch_count, branch_latest in rows:
+        count += branch_count
+        if branch_latest is not None and (latest is None or branch_latest > latest):
+            latest = branch_latest
+    return count, latest
+
+
+def seller_scoped_version(db: Session, model, seller_id: int) -> Tuple[int, Optional[datetime]]:
+    """
+    Version of a seller's rows for conditional requests; see seller_scoped_version_select.
+
+    :param db: The database session.
+    :param model: Mapped class with seller_id, partner_seller_id and updated_at columns.
+    :param seller_id: ID of the seller.
+    :return: Tuple of (row count, latest updated_at); any insert, update or delete changes it.
+    """
+    return merge_versions(db.execute(seller_scoped_version_select(model, seller_id)).all())
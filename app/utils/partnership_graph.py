@@ -0,0 +1,299 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+COLLABORATION_TYPE_CODES = {"B2B": 0, "B2C": 1}
+OTHER_TYPE_CODE = len(COLLABORATION_TYPE_CODES)  # Rows with an unrecognised collaboration_type
+COMPACT_PENDING_RATIO = 0.25  # Fold pending writes into the arrays once they exceed this share of edges
+MIN_COMPACT_PENDING = 1024
+DEFAULT_MAX_HOPS = 6
+
+
+def _type_code(collaboration_type: Optional[str]) -> int:
+    return COLLABORATION_TYPE_CODES.get((collaboration_type or "").upper(), OTHER_TYPE_CODE)
+
+
+def _filter_code(collaboration_type: Optional[str]) -> Optional[int]:
+    if collaboration_type is None:
+        return None
+    code = COLLABORATION_TYPE_CODES.get(collaboration_type.upper())
+    if code is None:
+        raise ValueError(f"collaboration_type must be one of {', '.join(COLLABORATION_TYPE_CODES)}")
+    return code
+
+
+class PartnershipGraph:
+    """
+    In-process graph of sellers connected by collaborations.
+
+    Adjacency is stored CSR-style in numpy arrays: sellers are numbered in id order, the
+    edges of seller i occupy slots indptr[i]:indptr[i + 1], and each slot holds the partner's
+    node number, the collaboration type and the collaboration id. Each collaboration is an
+    undirected edge, stored once from either side.
+
+    Writes after the initial load don't touch the arrays: new or changed collaborations go
+    to a small per-seller overlay, and removed ones are masked by id. Once those pile up,
+    the arrays are rebuilt in memory with the pending writes folded in.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._build(np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.int8))
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def __len__(self) -> int:
+        return len(self._base_ids) - len(self._removed) + len(self._added)
+
+    def load(self, collaborations: Iterable) -> None:
+        """
+        Replace the graph contents with the given collaborations.
+
+        :param collaborations: Iterable of objects with id, seller_id, partner_seller_id and
+                               collaboration_type attributes.
+        """
+        with self._lock:
+            ids, sellers, partners, types = [], [], [], []
+            for collaboration in collaborations:
+                ids.append(collaboration.id)
+                sellers.append(collaboration.seller_id)
+                partners.append(collaboration.partner_seller_id)
+                types.append(_type_code(collaboration.collaboration_type))
+            self._build(
+                np.asarray(ids, np.int64), np.asarray(sellers, np.int64),
+                np.asarray(partners, np.int64), np.asarray(types, np.int8),
+            )
+            self._loaded = True
+
+    def _build(self, ids: np.ndarray, sellers: np.ndarray, partners: np.ndarray, types: np.ndarray) -> None:
+        sources = np.concatenate([sellers, partners])
+        targets = np.concatenate([partners, sellers])
+        nodes = np.unique(sources)
+        source_nodes = np.searchsorted(nodes, sources)
+        order = np.argsort(source_nodes, kind="stable")
+
+        self._nodes = nodes
+        self._indptr = np.zeros(len(nodes) + 1, np.int64)
+        np.cumsum(np.bincount(source_nodes, minlength=len(nodes)), out=self._indptr[1:])
+        self._neighbors = np.searchsorted(nodes, targets)[order].astype(np.int32)
+        self._edge_types = np.concatenate([types, types])[order]
+        self._edge_ids = np.concatenate([ids, ids])[order]
+        self._base_ids = np.unique(ids)
+
+        self._removed = set()  # Collaboration ids masked out of the arrays
+        self._removed_ids = np.empty(0, np.int64)
+        self._added: Dict[int, Tuple[int, int, int]] = {}  # Collaboration id -> (seller, partner, type)
+        self._added_by_seller: Dict[int, Dict[int, Tuple[int, int]]] = {}  # Seller -> {collaboration id: (partner, type)}
+
+    def _in_base(self, collaboration_id: int) -> bool:
+        position = np.searchsorted(self._base_ids, collaboration_id)
+        return position < len(self._base_ids) and self._base_ids[position] == collaboration_id
+
+    def upsert(self, collaboration) -> None:
+        """
+        Insert or refresh a collaboration after it has been written.
+        No-op until the graph has been loaded, since the initial load will pick it up.
+
+        :param collaboration: The persisted collaboration object.
+        """
+        with self._lock:
+            if not self._loaded:
+                return
+            self._discard(collaboration.id)
+            self._add(collaboration.id, collaboration.seller_id, collaboration.partner_seller_id,
+                      _type_code(collaboration.collaboration_type))
+            self._maybe_compact()
+
+    def remove(self, collaboration_id: int) -> None:
+        """
+        Drop a collaboration from the graph.
+        """
+        with self._lock:
+            if self._loaded:
+                self._discard(collaboration_id)
+                self._maybe_compact()
+
+    def _add(self, collaboration_id: int, seller_id: int, partner_seller_id: int, type_code: int) -> None:
+        self._added[collaboration_id] = (seller_id, partner_seller_id, type_code)
+        self._added_by_seller.setdefault(seller_id, {})[collaboration_id] = (partner_seller_id, type_code)
+        self._added_by_seller.setdefault(partner_seller_id, {})[collaboration_id] = (seller_id, type_code)
+
+    def _discard(self, collaboration_id: int) -> None:
+        edge = self._added.pop(collaboration_id, None)
+        if edge is not None:
+            for seller_id in edge[:2]:
+                overlay = self._added_by_seller.get(seller_id)
+                if overlay is not None:
+                    overlay.pop(collaboration_id, None)
+                    if not overlay:
+                        del self._added_by_seller[seller_id]
+        if collaboration_id not in self._removed and self._in_base(collaboration_id):
+            self._removed.add(collaboration_id)
+            self._removed_ids = np.fromiter(sorted(self._removed), np.int64, len(self._removed))
+
+    def _maybe_compact(self) -> None:
+        pending = len(self._added) + len(self._removed)
+        if pending > max(COMPACT_PENDING_RATIO * len(self._base_ids), MIN_COMPACT_PENDING):
+            self._compact()
+
+    def _compact(self) -> None:
+        # Every collaboration appears in two slots; keep the one stored from the lower node
+        sources = np.repeat(np.arange(len(self._nodes)), np.diff(self._indptr))
+        keep = sources <= self._neighbors
+        if len(self._removed_ids):
+            keep &= ~np.isin(self._edge_ids, self._removed_ids)
+        ids, first = np.unique(self._edge_ids[keep], return_index=True)
+        sellers = self._nodes[sources[keep][first]]
+        partners = self._nodes[self._neighbors[keep][first]]
+        types = self._edge_types[keep][first]
+
+        added = self._added
+        self._build(
+            np.concatenate([ids, np.fromiter(added.keys(), np.int64, len(added))]),
+            np.concatenate([sellers, np.fromiter((edge[0] for edge in added.values()), np.int64, len(added))]),
+            np.concatenate([partners, np.fromiter((edge[1] for edge in added.values()), np.int64, len(added))]),
+            np.concatenate([types, np.fromiter((edge[2] for edge in added.values()), np.int8, len(added))]),
+        )
+
+    def _edges_from(self, seller_ids: np.ndarray, type_code: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        All edges leaving the given sellers, as parallel arrays of (seller id, partner seller id).
+        """
+        positions = np.searchsorted(self._nodes, seller_ids)
+        known = positions < len(self._nodes)
+        known[known] = self._nodes[positions[known]] == seller_ids[known]
+        positions = positions[known]
+
+        starts = self._indptr[positions]
+        lengths = self._indptr[positions + 1] - starts
+        # Slot numbers of every edge of every seller, without a Python loop over sellers
+        slots = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        sources = np.repeat(seller_ids[known], lengths)
+        targets = self._nodes[self._neighbors[slots]]
+
+        keep = np.ones(len(slots), bool)
+        if type_code is not None:
+            keep &= self._edge_types[slots] == type_code
+        if len(self._removed_ids):
+            keep &= ~np.isin(self._edge_ids[slots], self._removed_ids)
+        sources, targets = sources[keep], targets[keep]
+
+        if self._added_by_seller:
+            extra = [
+                (seller_id, partner_id)
+                for seller_id in self._added_by_seller.keys() & set(seller_ids.tolist())
+                for partner_id, code in self._added_by_seller[seller_id].values()
+                if type_code is None or code == type_code
+            ]
+            if extra:
+                extra = np.asarray(extra, np.int64)
+                sources = np.concatenate([sources, extra[:, 0]])
+                targets = np.concatenate([targets, extra[:, 1]])
+        return sources, targets
+
+    def partners(self, seller_id: int, collaboration_type: Optional[str] = None) -> List[int]:
+        """
+        Sellers with at least one collaboration with the given seller.
+        """
+        with self._lock:
+            _, targets = self._edges_from(np.asarray([seller_id], np.int64), _filter_code(collaboration_type))
+        return [partner for partner in np.unique(targets).tolist() if partner != seller_id]
+
+    def recommend(self, seller_id: int, collaboration_type: Optional[str] = None, limit: int = 10) -> List[Tuple[int, int]]:
+        """
+        Recommend partners of the seller's partners that it doesn't collaborate with yet.
+
+        :param seller_id: The seller to recommend partners for.
+        :param collaboration_type: Only follow collaborations of this type (B2B/B2C).
+        :param limit: Maximum number of recommendations.
+        :return: List of (seller_id, mutual partner count), most mutual partners first.
+        """
+        type_code = _filter_code(collaboration_type)
+        with self._lock:
+            _, partners = self._edges_from(np.asarray([seller_id], np.int64), type_code)
+            partners = np.unique(partners)
+            partners = partners[partners != seller_id]
+            if not len(partners):
+                return []
+            via, candidates = self._edges_from(partners, type_code)
+
+        keep = (candidates != seller_id) & ~np.isin(candidates, partners)
+        # Count each mutual partner once, however many collaborations link the pair
+        pairs = np.unique(np.stack([candidates[keep], via[keep]]), axis=1)
+        candidates, mutual = np.unique(pairs[0], return_counts=True)
+        order = np.lexsort((candidates, -mutual))[:limit]
+        return list(zip(candidates[order].tolist(), mutual[order].tolist()))
+
+    def shortest_path(
+        self,
+        source_seller_id: int,
+        target_seller_id: int,
+        collaboration_type: Optional[str] = None,
+        max_hops: int = DEFAULT_MAX_HOPS,
+    ) -> Optional[List[int]]:
+        """
+        Find a shortest chain of collaborations between two sellers with a bidirectional
+        breadth-first search, always expanding the smaller frontier.
+
+        :param source_seller_id: First seller of the path.
+        :param target_seller_id: Last seller of the path.
+        :param collaboration_type: Only follow collaborations of this type (B2B/B2C).
+        :param max_hops: Longest path (in collaborations) to look for.
+        :return: Seller ids along the path from source to target, or None if there is none within max_hops.
+        """
+        type_code = _filter_code(collaboration_type)
+        if source_seller_id == target_seller_id:
+            return [source_seller_id]
+
+        # Per side: seller -> (previous seller towards that side's root, distance from the root)
+        visited = ({source_seller_id: (None, 0)}, {target_seller_id: (None, 0)})
+        frontiers = [[source_seller_id], [target_seller_id]]
+        with self._lock:
+            for _ in range(max_hops):
+                side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+                seen, other = visited[side], visited[1 - side]
+                sources, targets = self._edges_from(np.asarray(frontiers[side], np.int64), type_code)
+                targets, first = np.unique(targets, return_index=True)
+
+                depth = seen[frontiers[side][0]][1] + 1
+                next_frontier, meeting = [], None
+                for seller_id, previous in zip(targets.tolist(), sources[first].tolist()):
+                    if seller_id in seen:
+                        continue
+                    seen[seller_id] = (previous, depth)
+                    next_frontier.append(seller_id)
+                    if seller_id in other and (meeting is None or other[seller_id][1] < other[meeting][1]):
+                        meeting = seller_id
+                if meeting is not None:
+                    return self._chain(visited[0], meeting)[::-1] + self._chain(visited[1], meeting)[1:]
+                if not next_frontier:
+                    return None
+                frontiers[side] = next_frontier
+        return None
+
+    @staticmethod
+    def _chain(visited: Dict[int, Tuple[Optional[int], int]], seller_id: int) -> List[int]:
+        chain = []
+        while seller_id is not None:
+            chain.append(seller_id)
+            seller_id = visited[seller_id][0]
+        return chain
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "loaded": self._loaded,
+                "sellers": len(self._nodes),
+                "collaborations": len(self),
+                "pending_additions": len(self._added),
+                "pending_removals": len(self._removed),
+                "array_bytes": sum(
+                    array.nbytes for array in (self._nodes, self._indptr, self._neighbors, self._edge_types, self._edge_ids, self._base_ids)
+                ),
+            }
+
+
+partnership_graph = PartnershipGraph()
@@ -0,0 +1,128 @@
+import bisect
+import threading
+import time
+from typing import Dict, List
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+# Upper bounds (seconds) of the checkout wait-time histogram buckets; the last bucket is +Inf
+WAIT_TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class PoolMetrics:
+    """
+    Counters and a checkout wait-time histogram for one SQLAlchemy engine's connection pool.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._engine = None
+        self.checkouts = 0
+        self.checkins = 0
+        self.connections_created = 0
+        self.overflow_connections = 0
+        self.checkout_timeouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.wait_time_buckets: List[int] = [0] * (len(WAIT_TIME_BUCKETS) + 1)
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self.wait_time_buckets[bisect.bisect_left(WAIT_TIME_BUCKETS, seconds)] += 1
+            self.wait_time_total += seconds
+            self.wait_time_max = max(self.wait_time_max, seconds)
+            if timed_out:
+                self.checkout_timeouts += 1
+
+    def _increment(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def snapshot(self) -> Dict:
+        """
+        Return the current pool state and the counters collected so far.
+        """
+        pool = self._engine.pool if self._engine is not None else None
+        with self._lock:
+            observed = sum(self.wait_time_buckets)
+            cumulative, histogram = 0, {}
+            for bound, count in zip([*map(str, WAIT_TIME_BUCKETS), "+Inf"], self.wait_time_buckets):
+                cumulative += count
+                histogram[bound] = cumulative
+            return {
+                "engine": self.name,
+                "pool_size": pool.size() if hasattr(pool, "size") else None,
+                "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+                "checked_in": pool.checkedin() if hasattr(pool, "checkedin") else None,
+                "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connections_created": self.connections_created,
+                "overflow_connections": self.overflow_connections,
+                "checkout_timeouts": self.checkout_timeouts,
+                "checkout_wait_seconds": {
+                    "count": observed,
+                    "sum": self.wait_time_total,
+                    "max": self.wait_time_max,
+                    "avg": self.wait_time_total / observed if observed else 0.0,
+                    "buckets": histogram,  # Cumulative counts per upper bound, Prometheus style
+                },
+            }
+
+
+pool_metrics: Dict[str, PoolMetrics] = {}
+
+
+def instrument_engine(engine, name: str) -> PoolMetrics:
+    """
+    Attach pool statistics collection to a (sync) engine. For an AsyncEngine pass its sync_engine.
+
+    Counts come from SQLAlchemy pool events. Pools have no "checkout requested" event, so the
+    wait time is measured around Engine.raw_connection, which every Connection goes through;
+    it covers both queueing for a free connection and opening a new one.
+
+    :param engine: The SQLAlchemy Engine to instrument.
+    :param name: Name the statistics are reported under.
+    :return: The PoolMetrics collecting statistics for the engine.
+    """
+    metrics = PoolMetrics(name)
+    metrics._engine = engine
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics._increment("checkouts")
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        metrics._increment("checkins")
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        metrics._increment("connections_created")
+        overflow = getattr(engine.pool, "overflow", None)
+        if overflow is not None and overflow() > 0:
+            metrics._increment("overflow_connections")
+
+    raw_connection = engine.raw_connection
+
+    def timed_raw_connection(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            connection = raw_connection(*args, **kwargs)
+        except PoolTimeoutError:
+            metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        metrics.record_wait(time.perf_counter() - start)
+        return connection
+
+    engine.raw_connection = timed_raw_connection
+    pool_metrics[name] = metrics
+    return metrics
+
+
+def get_pool_statistics() -> List[Dict]:
+    """
+    Return a statistics snapshot for every instrumented engine.
+    """
+    return [metrics.snapshot() for metrics in pool_metrics.values()]
@@ -0,0 +1,148 @@
+import asyncio
+import json
+import logging
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, List, NamedTuple
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+EVENT_BROKERS = ("rabbitmq", "memory", "none")
+
+
+class EventMessage(NamedTuple):
+    routing_key: str  # e.g. 'collaboration.created'
+    body: bytes
+    message_id: str
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def row_data(obj) -> Dict:
+    """
+    Column values of a mapped object, as the payload of a change event.
+    """
+    return {column.key: getattr(obj, column.key) for column in obj.__table__.columns}
+
+
+def build_event(entity: str, action: str, data: Dict) -> EventMessage:
+    """
+    Encode a change event. The routing key is '<entity>.<action>', so consumers can bind to
+    e.g. 'collaboration.*' or '*.deleted' on the topic exchange.
+
+    :param entity: 'collaboration', 'contract' or 'seller'.
+    :param action: 'created', 'updated', 'upserted' or 'deleted'.
+    :param data: The row's column values.
+    :return: The message to publish.
+    """
+    message_id = uuid.uuid4().hex
+    event = f"{entity}.{action}"
+    body = {"event": event, "id": message_id, "occurred_at": datetime.utcnow().isoformat(), "data": data}
+    return EventMessage(event, json.dumps(body, default=_json_default, separators=(",", ":")).encode(), message_id)
+
+
+class InMemoryBroker:
+    """
+    Stand-in for RabbitMQ in tests and benchmarks. Published messages are appended to
+    `messages`; `latency` simulates the confirm round-trip of each batch and `fail_batches`
+    makes the next N batches fail as if the connection dropped.
+    """
+
+    def __init__(self, latency: float = 0.0, fail_batches: int = 0):
+        self.latency = latency
+        self.fail_batches = fail_batches
+        self.messages: List[EventMessage] = []
+        self.batches = 0
+
+    async def publish_batch(self, messages: List[EventMessage]) -> List[EventMessage]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail_batches:
+            self.fail_batches -= 1
+            raise ConnectionError("Simulated broker failure")
+        self.messages.extend(messages)
+        self.batches += 1
+        return []
+
+    async def close(self):
+        pass
+
+
+class RabbitMQBroker:
+    """
+    Publishes to a durable topic exchange on a channel in publisher-confirm mode.
+    The connection is opened on the first batch (and again after a failed batch), so the
+    service starts even while the broker is unreachable.
+    """
+
+    def __init__(self, url: str, exchange_name: str):
+        self.url = url
+        self.exchange_name = exchange_name
+        self._connection = None
+        self._exchange = None
+
+    async def _connect(self):
+        import aio_pika
+
+        # A plain connection: after a failure the publisher reconnects on its next attempt
+        self._connection = await aio_pika.connect(self.url)
+        channel = await self._connection.channel(publisher_confirms=True)
+        self._exchange = await channel.declare_exchange(self.exchange_name, aio_pika.ExchangeType.TOPIC, durable=True)
+
+    async def publish_batch(self, messages: List[EventMessage]) -> List[EventMessage]:
+        """
+        Publish a batch and wait for all of its confirms together, rather than one
+        round-trip per message.
+
+        :return: The messages the broker did not confirm; raises if none were confirmed.
+        """
+        import aio_pika
+
+        if self._exchange is None:
+            await self._connect()
+        results = await asyncio.gather(*(
+            self._exchange.publish(
+                aio_pika.Message(
+                    message.body,
+                    content_type="application/json",
+                    delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+                    message_id=message.message_id,
+                ),
+                routing_key=message.routing_key,
+            )
+            for message in messages
+        ), return_exceptions=True)
+        failed = [message for message, result in zip(messages, results) if isinstance(result, BaseException)]
+        if failed and len(failed) == len(messages):
+            await self.close()  # Start over with a fresh connection on the next attempt
+            raise next(result for result in results if isinstance(result, BaseException))
+        return failed
+
+    async def close(self):
+        connection, self._connection, self._exchange = self._connection, None, None
+        if connection is not None:
+            try:
+                await connection.close()
+            except Exception as e:
+                logger.warning(f"Error closing RabbitMQ connection: {e}")
+
+
+def create_event_broker(kind: str = settings.EVENT_BROKER):
+    """
+    Build the broker configured by EVENT_BROKER; None when event publishing is disabled.
+    """
+    if kind not in EVENT_BROKERS:
+        raise ValueError(f"EVENT_BROKER must be one of {', '.join(EVENT_BROKERS)}")
+    if kind == "rabbitmq":
+        return RabbitMQBroker(settings.RABBITMQ_URL, settings.EVENT_EXCHANGE)
+    if kind == "memory":
+        return InMemoryBroker()
+    return None
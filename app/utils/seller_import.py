@@ -0,0 +1,210 @@
+import codecs
+import csv
+import json
+import logging
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import anyio
+from pydantic import ValidationError
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import Session
+from app.crud.seller_crud import upsert_sellers
+from app.schemas.seller_schemas import SellerCreate
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ("csv", "ndjson")
+DEFAULT_IMPORT_BATCH_SIZE = 5000
+MAX_REPORTED_REJECTIONS = 1000  # Rejected rows listed in the report; the count covers all of them
+
+
+def detect_import_format(name: Optional[str]) -> Optional[str]:
+    """
+    Guess the import format from a file name or content type.
+    """
+    name = (name or "").lower()
+    if "ndjson" in name or "jsonl" in name or "json" in name:
+        return "ndjson"
+    if "csv" in name:
+        return "csv"
+    return None
+
+
+def iter_text_lines(chunks: Iterable[bytes], encoding: str = "utf-8") -> Iterator[str]:
+    """
+    Decode a stream of byte chunks into lines (line endings kept), holding at most one
+    partial line in memory.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ""
+    for chunk in chunks:
+        pending += decoder.decode(chunk)
+        lines = pending.splitlines(keepends=True)
+        pending = lines.pop() if lines and not lines[-1].endswith(("\n", "\r")) else ""
+        yield from lines
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+def iter_request_body(request) -> Iterator[bytes]:
+    """
+    Iterate a Starlette request body from a sync endpoint (which runs in a worker thread),
+    pulling one chunk at a time from the event loop.
+    """
+    stream = request.stream().__aiter__()
+    while True:
+        try:
+            yield anyio.from_thread.run(stream.__anext__)
+        except StopAsyncIteration:
+            return
+
+
+def iter_csv_records(lines: Iterable[str]) -> Iterator[Tuple[int, Optional[Dict], Optional[str]]]:
+    """
+    Parse CSV with a header row into (row number, record, error) tuples. Empty cells become None.
+    """
+    reader = csv.DictReader(lines)
+    for record in reader:
+        if None in record:
+            yield reader.line_num, None, "Row has more cells than the header"
+            continue
+        yield reader.line_num, {key: (value if value != "" else None) for key, value in record.items()}, None
+
+
+def iter_ndjson_records(lines: Iterable[str]) -> Iterator[Tuple[int, Optional[Dict], Optional[str]]]:
+    """
+    Parse newline-delimited JSON into (line number, record, error) tuples. Blank lines are skipped.
+    """
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, "Expected a JSON object"
+            continue
+        yield line_number, record, None
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, item['loc'])) or 'row'}: {item['msg']}" for item in error.errors())
+
+
+def _validate_records(records: List[Tuple[int, Optional[Dict], Optional[str]]]) -> Tuple[List[Tuple[int, SellerCreate]], List[Tuple[int, str]]]:
+    """
+    Validate parsed records against SellerCreate (module-level so worker processes can run it).
+    """
+    sellers, rejections = [], []
+    for row, record, error in records:
+        if error is not None:
+            rejections.append((row, error))
+            continue
+        try:
+            sellers.append((row, SellerCreate(**record)))
+        except ValidationError as e:
+            rejections.append((row, _validation_message(e)))
+    return sellers, rejections
+
+
+def _upsert_or_reject(db: Session, sellers: List[Tuple[int, SellerCreate]]) -> Tuple[int, List[Tuple[int, str]]]:
+    """
+    Upsert a batch of (row number, seller) pairs. If the database rejects a row the batch is
+    rolled back, split in halves and retried, until the offending rows are isolated and
+    rejected, so one bad row costs a few extra statements rather than the whole import.
+    Errors not caused by the data (e.g. a lost connection) propagate.
+
+    :return: Tuple of (number of sellers written, rejected rows with the database's message).
+    """
+    if not sellers:
+        return 0, []
+    try:
+        return upsert_sellers(db, [seller for _, seller in sellers]), []
+    except (DataError, IntegrityError) as e:
+        if len(sellers) == 1:
+            return 0, [(sellers[0][0], f"Rejected by the database: {e.orig}")]
+    middle = len(sellers) // 2
+    imported_first, rejected_first = _upsert_or_reject(db, sellers[:middle])
+    imported_second, rejected_second = _upsert_or_reject(db, sellers[middle:])
+    return imported_first + imported_second, rejected_first + rejected_second
+
+
+def _iter_validated_batches(records: Iterator, batch_size: int, workers: int) -> Iterator[Tuple[int, List[Tuple[int, SellerCreate]], List[Tuple[int, str]]]]:
+    """
+    Group records into batches and validate them, inline or in a pool of worker processes.
+    With workers, at most two batches per worker are in flight and results keep file order.
+    """
+    batches = iter(lambda: list(islice(records, batch_size)), [])
+    if workers <= 1:
+        for batch in batches:
+            yield (len(batch), *_validate_records(batch))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for batch in batches:
+            pending.append((len(batch), pool.submit(_validate_records, batch)))
+            if len(pending) >= workers * 2:
+                size, result = pending.popleft()
+                yield (size, *result.result())
+        while pending:
+            size, result = pending.popleft()
+            yield (size, *result.result())
+
+
+def import_sellers(
+    db: Session,
+    lines: Iterable[str],
+    import_format: str,
+    batch_size: int = DEFAULT_IMPORT_BATCH_SIZE,
+    on_progress: Optional[Callable[[Dict], None]] = None,
+    workers: int = 1,
+) -> Dict:
+    """
+    Stream sellers from CSV or NDJSON lines into the database.
+
+    Rows are validated against SellerCreate and upserted by email in batches (one
+    transaction per batch), so only a few batches are held in memory at a time. Rows the
+    database refuses are rejected like invalid ones; see _upsert_or_reject.
+
+    :param db: The database session.
+    :param lines: Text lines of the file, read lazily.
+    :param import_format: 'csv' or 'ndjson'.
+    :param batch_size: Number of rows read, validated and written per batch.
+    :param on_progress: Called with the running report after every batch.
+    :param workers: Number of processes validating batches in parallel; 1 validates inline.
+    :return: Report with processed/imported/rejected counts and the first rejected rows.
+    """
+    if import_format not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported import format '{import_format}'; expected one of {', '.join(IMPORT_FORMATS)}")
+    records = iter_csv_records(lines) if import_format == "csv" else iter_ndjson_records(lines)
+
+    report = {"processed": 0, "imported": 0, "rejected": 0, "rejections": [], "elapsed_seconds": 0.0, "rows_per_second": 0.0}
+    started = time.perf_counter()
+
+    for size, sellers, rejections in _iter_validated_batches(records, batch_size, workers):
+        imported, refused = _upsert_or_reject(db, sellers)
+        rejections = sorted(rejections + refused) if refused else rejections
+        report["processed"] += size
+        report["imported"] += imported
+        report["rejected"] += len(rejections)
+        room = MAX_REPORTED_REJECTIONS - len(report["rejections"])
+        report["rejections"].extend({"row": row, "detail": detail} for row, detail in rejections[:max(room, 0)])
+
+        elapsed = time.perf_counter() - started
+        report["elapsed_seconds"] = round(elapsed, 3)
+        report["rows_per_second"] = round(report["processed"] / elapsed, 1) if elapsed else 0.0
+        if on_progress:
+            on_progress(report)
+
+    logger.info(
+        f"Seller import finished: {report['processed']} rows, {report['imported']} imported, "
+        f"{report['rejected']} rejected in {report['elapsed_seconds']}s"
+    )
+    return report
@@ -0,0 +1,102 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical fetches so only one upstream call is in flight per key.
+
+    The first caller for a key (the leader) runs the fetch; callers arriving while it is
+    running wait for and share its result or error. The in-flight call is a
+    concurrent.futures.Future, so threadpool (sync) callers and event-loop (async) callers
+    can wait on the same call whichever kind of caller leads it.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def _join(self, key: Hashable):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                return call, False
+            call = Future()
+            self._calls[key] = call
+            self.leaders += 1
+            return call, True
+
+    def _finish(self, key: Hashable, call: Future):
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+
+    def do(self, key: Hashable, fetch: Callable[[], T]) -> T:
+        """
+        Run `fetch` for `key`, or wait for the identical call already in flight.
+
+        :param key: Identifies identical fetches.
+        :param fetch: Function performing the upstream call.
+        :return: The (shared) result of the fetch; its error is re-raised to every waiter.
+        """
+        call, leader = self._join(key)
+        if not leader:
+            return call.result()
+
+        try:
+            result = fetch()
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            self._finish(key, call)
+
+    async def ado(self, key: Hashable, fetch: Callable[[], Awaitable[T]]) -> T:
+        """
+        Async counterpart of do(); `fetch` is a coroutine function.
+        """
+        call, leader = self._join(key)
+        if not leader:
+            return await asyncio.wrap_future(call)
+
+        try:
+            result = await fetch()
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            self._finish(key, call)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                "in_flight": len(self._calls),
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+            }
+
+
+category_flights = SingleFlight("categories")
+brand_flights = SingleFlight("brands")
+
+
+def get_single_flight_statistics():
+    """
+    Return coalescing statistics for every downstream lookup.
+    """
+    return [category_flights.stats(), brand_flights.stats()]
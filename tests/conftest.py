@@ -0,0 +1,83 @@
+import os
+import tempfile
+
+# The settings are read when app.config is imported, so the test environment is set up
+# before anything from the app is imported: a throwaway SQLite database, the in-process
+# event broker and no background services that would write to the database on their own.
+_database_dir = tempfile.mkdtemp(prefix="collaboration-service-tests-")
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{_database_dir}/test.db",
+    USE_ASYNC_DATABASE="false",
+    EVENT_BROKER="memory",
+    CATALOG_REPLICA_ENABLED="false",
+    EXPIRY_SCHEDULER_ENABLED="false",
+    SELLER_STATS_RECONCILE_INTERVAL="0",
+)
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.models  # noqa: F401 (registers every table on the metadata)
+from app.database import BaseModel, SessionLocal, engine
+from app.models.seller import SellerModel
+from app.utils.geo_utils import encode_geohash
+from app.utils.exclusivity_index import exclusivity_index
+from app.utils.knn_index import seller_knn_index
+from app.utils.partnership_graph import partnership_graph
+
+BaseModel.metadata.create_all(engine)
+
+
+def reset_database() -> None:
+    """
+    Delete every row and drop the in-memory indexes built from them.
+    """
+    with engine.begin() as connection:
+        for table in reversed(BaseModel.metadata.sorted_tables):
+            connection.execute(table.delete())
+    partnership_graph.__init__()
+    seller_knn_index.__init__()
+    exclusivity_index.invalidate()
+
+
+@pytest.fixture(autouse=True)
+def clean_database():
+    yield
+    reset_database()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client():
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def make_seller(db):
+    """
+    Insert a seller, with a warehouse at (latitude, longitude) if given, and return it.
+    """
+    def make(seller_id: int, latitude=None, longitude=None, **columns):
+        seller = SellerModel(
+            id=seller_id, name=f"Seller {seller_id}", email=f"seller{seller_id}@example.com", is_active=True, **columns
+        )
+        if latitude is not None:
+            seller.latitude, seller.longitude = latitude, longitude
+            seller.geohash = encode_geohash(latitude, longitude)
+            seller.warehouse_location = f"{latitude},{longitude}"
+        db.add(seller)
+        db.commit()
+        return seller
+
+    return make
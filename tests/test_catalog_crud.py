@@ -0,0 +1,119 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+import requests
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.crud import brand_crud, catalog_replica_crud, category_crud
+from app.crud.catalog_replica_crud import replica_freshness
+from app.models.brand import BrandModel
+from app.models.category import CategoryModel
+from app.models.collaboration import CollaborationModel
+from app.config import settings
+from app.services.enrichment_service import expand_collaborations, expand_collaborations_async
+
+
+@pytest.fixture
+def fresh_replica(db, monkeypatch):
+    """
+    A fresh replica with brands 1 (live) and 2 (deleted upstream) and category 1; opening a
+    session of its own for a read fails the test.
+    """
+    now = datetime.utcnow()
+    db.add_all([
+        BrandModel(id=1, name="Acme", replicated_at=now),
+        BrandModel(id=2, name="Gone", replicated_at=now, deleted_at=now),
+        CategoryModel(id=1, name="Tools", replicated_at=now),
+    ])
+    db.commit()
+    monkeypatch.setattr(replica_freshness, "is_fresh", lambda entity: True)
+
+    async def ais_fresh(entity):
+        return True
+
+    monkeypatch.setattr(replica_freshness, "ais_fresh", ais_fresh)
+
+    def no_session():
+        raise AssertionError("The replica read opened its own session")
+
+    monkeypatch.setattr(catalog_replica_crud, "SessionLocal", no_session)
+    monkeypatch.setattr(catalog_replica_crud, "AsyncSessionLocal", no_session)
+
+
+class Unreachable:
+    """
+    Stand-in for a downstream client whose every request fails.
+    """
+
+    def __getattr__(self, method):
+        def request(*args, **kwargs):
+            raise requests.exceptions.ConnectionError("unreachable")
+        return request
+
+
+def make_collaboration(db, make_seller):
+    make_seller(1)
+    make_seller(2)
+    collaboration = CollaborationModel(
+        seller_id=1, partner_seller_id=2, collaboration_type="B2B", agreement_details="Terms", brand_id=1, category_id=1
+    )
+    db.add(collaboration)
+    db.commit()
+    db.refresh(collaboration)
+    return collaboration
+
+
+def test_reads_use_the_callers_session(db, fresh_replica):
+    assert brand_crud.get_brand_by_id(1, db)["name"] == "Acme"
+    assert [brand["id"] for brand in brand_crud.get_all_brands(db)] == [1]
+    assert category_crud.get_categories_by_ids([1, 1, None], db).keys() == {1}
+    with pytest.raises(HTTPException) as error:
+        brand_crud.get_brand_by_id(2, db)
+    assert (error.value.status_code, error.value.detail) == (404, "Brand not found")
+
+
+def test_ids_the_replica_never_saw_go_to_the_service(db, fresh_replica, monkeypatch):
+    requested = []
+    monkeypatch.setattr(brand_crud.brand_loader, "load_many", lambda ids: requested.extend(ids) or {3: {"id": 3}})
+
+    assert brand_crud.get_brands_by_ids([1, 2, 3], db).keys() == {1, 3}
+    assert requested == [3]
+
+
+def test_enrichment_reads_the_replica_on_the_request_session(db, fresh_replica, make_seller):
+    collaboration = make_collaboration(db, make_seller)
+
+    expanded, = expand_collaborations([collaboration], {"brand", "category"}, db)
+
+    assert expanded.brand_details["name"] == "Acme"
+    assert expanded.category_details["name"] == "Tools"
+
+
+def test_async_reads_use_the_callers_session(db, fresh_replica, make_seller):
+    collaboration = make_collaboration(db, make_seller)
+    engine = create_async_engine(settings.DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://"))
+
+    async def read():
+        async with async_sessionmaker(engine)() as session:
+            brand = await brand_crud.get_brand_by_id_async(1, session)
+            found = await category_crud.get_categories_by_ids_async([1], session)
+            expanded, = await expand_collaborations_async([collaboration], {"brand", "category"}, session)
+        await engine.dispose()
+        return brand, found, expanded
+
+    brand, found, expanded = asyncio.run(read())
+    assert brand["name"] == "Acme"
+    assert found[1]["name"] == "Tools"
+    assert (expanded.brand_details["name"], expanded.category_details["name"]) == ("Acme", "Tools")
+
+
+@pytest.mark.parametrize("crud, name, service", [(brand_crud.brands, "brand", "brand-service"), (category_crud.categories, "category", "category-service")])
+def test_write_errors_name_the_entity_and_service(crud, name, service, monkeypatch):
+    monkeypatch.setattr(crud, "client", Unreachable())
+
+    for write, action in ((lambda: crud.create({}), "creating"), (lambda: crud.update(1, {}), "updating"), (lambda: crud.delete(1), "deleting")):
+        with pytest.raises(HTTPException) as error:
+            write()
+        assert (error.value.status_code, error.value.detail) == (500, f"Error {action} {name} from {service}")
@@ -0,0 +1,127 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.config import settings
+from app.crud import async_collaboration_crud, collaboration_crud
+from app.database import get_async_db
+from app.routes import async_collaboration
+from app.utils.exclusivity_index import exclusivity_index
+
+
+@pytest.fixture
+def async_client():
+    """
+    The async collaboration router on its own app, backed by aiosqlite on the test database.
+    """
+    async_engine = create_async_engine(settings.DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://"))
+    sessions = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def get_test_async_db():
+        async with sessions() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(async_collaboration.router, prefix="/collaboration")
+    app.dependency_overrides[get_async_db] = get_test_async_db
+    with TestClient(app) as test_client:
+        yield test_client
+    asyncio.run(async_engine.dispose())
+
+
+def collaboration(seller_id, partner_seller_id, **fields):
+    return {
+        "seller_id": seller_id,
+        "partner_seller_id": partner_seller_id,
+        "agreement_details": "Shared warehousing",
+        "collaboration_type": "B2B",
+        **fields,
+    }
+
+
+@pytest.fixture
+def sellers(make_seller):
+    make_seller(1, 52.0, 13.0)
+    make_seller(2, 52.1, 13.1)
+    make_seller(3, 52.2, 13.2)
+    make_seller(4, 48.0, 2.0)
+
+
+@pytest.mark.parametrize("router", ["sync", "async"])
+def test_routers_share_conditional_reads(router, sellers, client, async_client):
+    test_client = client if router == "sync" else async_client
+    created = test_client.post("/collaboration/", json=collaboration(1, 4)).json()
+
+    response = test_client.get(f"/collaboration/{created['id']}")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert test_client.get(f"/collaboration/{created['id']}", headers={"If-None-Match": etag}).status_code == 304
+    assert test_client.get("/collaboration/999", headers={"If-None-Match": etag}).status_code == 404
+
+    listing = test_client.get("/collaboration/seller/1", params={"limit": 10})
+    assert listing.status_code == 200
+    unchanged = test_client.get("/collaboration/seller/1", params={"limit": 10}, headers={"If-None-Match": listing.headers["ETag"]})
+    assert unchanged.status_code == 304
+    other_page = test_client.get("/collaboration/seller/1", params={"limit": 5}, headers={"If-None-Match": listing.headers["ETag"]})
+    assert other_page.status_code == 200
+
+
+@pytest.mark.parametrize("router", ["sync", "async"])
+def test_routers_share_error_mapping(router, sellers, client, async_client):
+    test_client = client if router == "sync" else async_client
+    assert test_client.post("/collaboration/", json=collaboration(1, 2, geographical_exclusivity=True)).status_code == 200
+    conflict = test_client.post("/collaboration/", json=collaboration(1, 3))
+    assert conflict.status_code == 409
+    assert "exclusive collaboration" in conflict.json()["detail"]
+
+    assert test_client.get("/collaboration/search", params={"status": "pending"}).status_code == 400
+    assert test_client.get("/collaboration/search", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert test_client.get("/collaboration/seller/1", params={"expand": "owner"}).status_code == 400
+    assert test_client.get("/collaboration/contracts/1", params={"expand": "owner"}).status_code == 400
+
+    rejected = test_client.post("/collaboration/bulk", json=[collaboration(1, 3), collaboration(2, 3)])
+    assert rejected.status_code == 422
+    assert [error["index"] for error in rejected.json()["detail"]] == [0, 1]
+
+
+def test_async_path_builds_indexes_in_a_worker_thread(sellers):
+    loop_threads, load_threads = [], []
+
+    def loader(db):
+        load_threads.append(threading.get_ident())
+        exclusivity_index.load([])
+
+    async def ensure_loaded():
+        loop_threads.append(threading.get_ident())
+        await asyncio.gather(*(async_collaboration_crud.ensure_index_loaded(exclusivity_index, loader) for _ in range(3)))
+
+    asyncio.run(ensure_loaded())
+    assert exclusivity_index.loaded
+    assert len(load_threads) == 1  # Concurrent callers wait for the one build
+    assert load_threads[0] != loop_threads[0]
+
+
+def test_database_errors_on_create_are_logged_as_500(sellers, client, monkeypatch, caplog):
+    def fail(db, collaboration):
+        raise OperationalError("INSERT INTO collaborations ...", {}, Exception("database is locked"))
+
+    monkeypatch.setattr(collaboration_crud, "create_collaboration", fail)
+    with caplog.at_level("ERROR", logger="app.routes.collaboration_common"):
+        response = client.post("/collaboration/", json=collaboration(1, 4))
+    assert response.status_code == 500
+    assert response.json()["detail"] == "Error creating collaboration"
+    assert any(record.exc_info and isinstance(record.exc_info[1], OperationalError) for record in caplog.records)
+
+
+def test_programming_errors_on_create_are_not_masked(sellers, client, monkeypatch):
+    def fail(db, collaboration):
+        raise KeyError("seller_id")
+
+    monkeypatch.setattr(collaboration_crud, "create_collaboration", fail)
+    with pytest.raises(KeyError):
+        client.post("/collaboration/", json=collaboration(1, 4))
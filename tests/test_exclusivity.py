@@ -0,0 +1,217 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import delete, update
+from sqlalchemy.dialects import postgresql
+
+from app.crud import collaboration_crud, exclusivity_crud, seller_crud
+from app.crud.exclusivity_crud import ExclusivityConflictError, get_exclusivity_index, lock_sellers
+from app.database import SessionLocal
+from app.models.collaboration import CollaborationModel
+from app.models.seller import SellerModel
+from app.schemas.collaboration_schemas import CollaborationCreate, CollaborationUpdate
+from app.schemas.seller_schemas import SellerCreate
+from app.utils.exclusivity_index import exclusivity_index
+from app.utils.geo_utils import encode_geohash
+
+
+NOW = datetime.utcnow()
+
+
+def days(count):
+    return NOW + timedelta(days=count)
+
+
+@pytest.fixture
+def sellers(make_seller):
+    """
+    Sellers 1, 2 and 3 about 10 km apart around Berlin, 4 near 1, and 5 in Paris, far from all of them.
+    """
+    make_seller(1, 52.52, 13.40)
+    make_seller(2, 52.45, 13.50)
+    make_seller(3, 52.40, 13.60)
+    make_seller(4, 52.53, 13.41)
+    make_seller(5, 48.85, 2.35)
+
+
+def proposal(seller_id, partner_seller_id, **fields):
+    fields = {"collaboration_type": "B2B", "agreement_details": "Terms", **fields}
+    return CollaborationCreate(seller_id=seller_id, partner_seller_id=partner_seller_id, **fields)
+
+
+def create(db, seller_id, partner_seller_id, **fields):
+    return collaboration_crud.create_collaboration(db, proposal(seller_id, partner_seller_id, **fields))
+
+
+def test_exclusive_collaboration_binds_both_sellers(db, sellers):
+    create(db, 1, 2, geographical_exclusivity=True)
+
+    # Seller 1 may not take a partner near 2, nor seller 2 one near 1
+    with pytest.raises(ExclusivityConflictError, match="Seller 1 has an exclusive collaboration"):
+        create(db, 1, 3)
+    with pytest.raises(ExclusivityConflictError, match="Seller 2 has an exclusive collaboration"):
+        create(db, 2, 4)
+    assert create(db, 1, 5).id is not None
+
+
+def test_only_exclusive_collaborations_conflict(db, sellers):
+    create(db, 1, 2)
+
+    assert create(db, 1, 3).id is not None
+    with pytest.raises(ExclusivityConflictError, match="Seller 1 already collaborates with seller 2"):
+        create(db, 1, 3, geographical_exclusivity=True)
+
+
+def test_collaborations_running_at_different_times_do_not_conflict(db, sellers):
+    create(db, 1, 2, geographical_exclusivity=True, collaboration_start_date=days(10), collaboration_end_date=days(20))
+
+    assert create(db, 1, 3, collaboration_end_date=days(10)).id is not None
+    assert create(db, 1, 3, collaboration_start_date=days(20)).id is not None
+    with pytest.raises(ExclusivityConflictError):
+        create(db, 1, 3, collaboration_start_date=days(15))
+
+
+def test_update_into_an_exclusivity_is_rejected_and_rolled_back(db, sellers):
+    create(db, 1, 2, geographical_exclusivity=True, collaboration_start_date=days(10))
+    running = create(db, 1, 3, collaboration_end_date=days(5))
+
+    with pytest.raises(ExclusivityConflictError):
+        collaboration_crud.update_collaboration(db, running.id, CollaborationUpdate(collaboration_end_date=days(15)))
+
+    db.expire_all()
+    assert db.get(CollaborationModel, running.id).collaboration_end_date < days(6)
+    updated = collaboration_crud.update_collaboration(db, running.id, CollaborationUpdate(collaboration_end_date=days(8)))
+    assert updated.collaboration_end_date > days(7)
+
+
+def test_bulk_checks_against_existing_collaborations_and_earlier_items(db, sellers):
+    create(db, 1, 2, geographical_exclusivity=True)
+
+    created, errors = collaboration_crud.create_collaborations_bulk(
+        db, [proposal(1, 3), proposal(2, 5, geographical_exclusivity=True), proposal(3, 5)], partial=True
+    )
+
+    assert [(row.seller_id, row.partner_seller_id) for row in created] == [(2, 5)]
+    assert errors[0].startswith("Seller 1 has an exclusive collaboration")
+    assert errors[2] == "Breaks geographical exclusivity with item 1 of the batch"
+
+
+def test_check_sees_collaborations_written_by_other_processes(db, sellers):
+    get_exclusivity_index(db)
+    # Written behind this process's index, as another instance of the service would
+    db.add(CollaborationModel(seller_id=1, partner_seller_id=2, collaboration_type="B2B", agreement_details="Terms", geographical_exclusivity=True))
+    db.commit()
+
+    with pytest.raises(ExclusivityConflictError):
+        create(db, 1, 3)
+
+
+def test_check_forgets_collaborations_deleted_by_other_processes(db, sellers):
+    exclusive = create(db, 1, 2, geographical_exclusivity=True)
+    db.execute(delete(CollaborationModel).where(CollaborationModel.id == exclusive.id))
+    db.commit()
+
+    assert create(db, 1, 3).id is not None
+
+
+def test_check_follows_sellers_moved_by_other_processes(db, sellers):
+    exclusive = create(db, 1, 2, geographical_exclusivity=True)
+    # An old collaboration, outside the window the index re-reads collaborations in
+    db.execute(update(CollaborationModel).where(CollaborationModel.id == exclusive.id).values(updated_at=days(-30)))
+    db.commit()
+    exclusivity_index.invalidate()
+    get_exclusivity_index(db)
+    # Seller 2 moves to Paris behind this process's index
+    db.execute(
+        update(SellerModel).where(SellerModel.id == 2)
+        .values(latitude=48.86, longitude=2.36, geohash=encode_geohash(48.86, 2.36), updated_at=datetime.utcnow())
+    )
+    db.commit()
+
+    assert create(db, 1, 3).id is not None
+    with pytest.raises(ExclusivityConflictError):
+        create(db, 1, 5)
+
+
+def test_seller_import_reindexes_only_the_sellers_that_moved(db, sellers, monkeypatch):
+    create(db, 1, 2, geographical_exclusivity=True)
+    reindexed = []
+    reindex = exclusivity_crud.reindex_seller_collaborations
+    monkeypatch.setattr(exclusivity_crud, "reindex_seller_collaborations", lambda db, ids: reindexed.extend(ids) or reindex(db, ids))
+
+    seller_crud.upsert_sellers(db, [
+        SellerCreate(name="Seller 1", email="seller1@example.com", warehouse_location="52.52,13.4"),
+        SellerCreate(name="Seller 2", email="seller2@example.com", warehouse_location="48.86,2.36"),
+        SellerCreate(name="Seller 6", email="seller6@example.com", warehouse_location="52.0,13.0"),
+    ])
+
+    assert reindexed == [2]
+    assert exclusivity_index.loaded
+    assert create(db, 1, 3).id is not None
+    with pytest.raises(ExclusivityConflictError):
+        create(db, 1, 5)
+
+
+def test_resync_of_unchanged_collaborations_writes_nothing(db, sellers):
+    create(db, 1, 2, geographical_exclusivity=True)
+    create(db, 3, 5)
+    pending = exclusivity_index.stats()["pending_sides"]
+
+    for _ in range(3):
+        exclusivity_crud.sync_exclusivity_index(db, [1, 2, 3, 5])
+
+    assert exclusivity_index.stats()["pending_sides"] == pending
+
+
+def test_concurrent_conflicting_creates_let_exactly_one_through(sellers, monkeypatch):
+    find_conflicts = exclusivity_crud.find_exclusivity_conflicts
+
+    def slow_find_conflicts(*args, **kwargs):
+        # Widens the window between the check and the insert
+        conflicts = find_conflicts(*args, **kwargs)
+        time.sleep(0.2)
+        return conflicts
+
+    monkeypatch.setattr(exclusivity_crud, "find_exclusivity_conflicts", slow_find_conflicts)
+    start = threading.Barrier(2)
+    outcomes = []
+
+    def write(seller_id, partner_seller_id):
+        session = SessionLocal()
+        try:
+            start.wait()
+            create(session, seller_id, partner_seller_id, geographical_exclusivity=True)
+            outcomes.append("created")
+        except ExclusivityConflictError:
+            outcomes.append("conflict")
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=write, args=pair) for pair in ((1, 2), (1, 3))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(outcomes) == ["conflict", "created"]
+
+
+def test_postgresql_locks_sellers_in_id_order():
+    statements = []
+
+    class PostgresSession:
+        def get_bind(self):
+            return SimpleNamespace(dialect=postgresql.dialect())
+
+        def execute(self, statement):
+            statements.append(str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})))
+
+    lock_sellers(PostgresSession(), [3, 1, None, 3])
+
+    statement, = statements
+    assert "pg_advisory_xact_lock(7301, anon_1.seller_id)" in statement
+    assert "unnest(ARRAY[1, 3])" in statement
+    assert statement.endswith("ORDER BY anon_1.seller_id")
@@ -0,0 +1,94 @@
+import random
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.utils import exclusivity_index as exclusivity_index_module
+from app.utils.exclusivity_index import ExclusivityIndex, SellerLocation
+
+NOW = datetime(2030, 1, 1)
+RADIUS_KM = 50
+
+
+def random_collaboration(rng, collaboration_id, seller_count):
+    seller_id, partner_seller_id = rng.sample(range(1, seller_count + 1), 2)
+    start = NOW + timedelta(days=rng.randint(-30, 30)) if rng.random() < 0.7 else None
+    end = start + timedelta(days=rng.randint(1, 60)) if start and rng.random() < 0.7 else None
+    return SimpleNamespace(
+        id=collaboration_id, seller_id=seller_id, partner_seller_id=partner_seller_id, collaboration_start_date=start,
+        collaboration_end_date=end, geographical_exclusivity=rng.random() < 0.5, expired_at=None,
+    )
+
+
+def rounded(conflicts):
+    return [conflict._replace(distance_km=round(conflict.distance_km, 6)) for conflict in conflicts]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_incremental_writes_answer_like_a_fresh_load(seed, monkeypatch):
+    # Small thresholds so that the overlays are folded into the arrays and compacted along the way
+    monkeypatch.setattr(exclusivity_index_module, "SMALL_SLICE", 4)
+    monkeypatch.setattr(exclusivity_index_module, "MIN_COMPACT_PENDING", 40)
+    rng = random.Random(seed)
+    seller_count = 12
+    locations = {seller_id: SellerLocation(52 + rng.uniform(-0.5, 0.5), 13 + rng.uniform(-0.5, 0.5)) for seller_id in range(1, seller_count + 1)}
+    collaborations = {collaboration_id: random_collaboration(rng, collaboration_id, seller_count) for collaboration_id in range(1, 80)}
+    index = ExclusivityIndex()
+    index.load((collaboration, locations) for collaboration in collaborations.values())
+
+    next_id = 80
+    for _ in range(400):
+        action = rng.random()
+        if action < 0.4:
+            collaborations[next_id] = random_collaboration(rng, next_id, seller_count)
+            index.upsert(collaborations[next_id], locations)
+            next_id += 1
+        elif action < 0.7 and collaborations:
+            collaboration = collaborations[rng.choice(list(collaborations))]
+            collaboration.collaboration_end_date = NOW + timedelta(days=rng.randint(1, 90))
+            index.upsert_many([(collaboration, locations)])
+        elif action < 0.85 and collaborations:
+            index.remove(collaborations.pop(rng.choice(list(collaborations))).id)
+        else:
+            # Unchanged rows read back from the database
+            index.upsert_many((collaboration, locations) for collaboration in rng.sample(list(collaborations.values()), 10))
+
+    fresh = ExclusivityIndex()
+    fresh.load((collaboration, locations) for collaboration in collaborations.values())
+    assert len(index) == len(fresh)
+    for seller_id in range(1, seller_count + 1):
+        for partner_seller_id in range(1, seller_count + 1):
+            for exclusive in (False, True):
+                query = (seller_id, partner_seller_id, locations, NOW, NOW + timedelta(days=30), exclusive, RADIUS_KM)
+                assert rounded(index.conflicts(*query, now=NOW)) == rounded(fresh.conflicts(*query, now=NOW))
+
+
+def test_unchanged_rows_are_not_written_again():
+    location = {1: SellerLocation(52.0, 13.0), 2: SellerLocation(52.1, 13.1)}
+    collaboration = SimpleNamespace(
+        id=1, seller_id=1, partner_seller_id=2, collaboration_start_date=None, collaboration_end_date=None,
+        geographical_exclusivity=True, expired_at=None,
+    )
+    index = ExclusivityIndex()
+    index.load([(collaboration, location)])
+
+    index.upsert_many([(collaboration, location)] * 3)
+
+    assert index.stats()["pending_sides"] == 0
+    assert index.stats()["removed_collaborations"] == 0
+
+
+def test_sellers_gaining_a_location_count_as_moved_only_when_party_to_a_collaboration():
+    collaboration = SimpleNamespace(
+        id=1, seller_id=1, partner_seller_id=2, collaboration_start_date=None, collaboration_end_date=None,
+        geographical_exclusivity=True, expired_at=None,
+    )
+    index = ExclusivityIndex()
+    index.load([(collaboration, {1: SellerLocation(52.0, 13.0)})])
+
+    assert index.seller_moved(2, 52.1, 13.1)
+    assert not index.seller_moved(3, 52.1, 13.1)
+    assert not index.seller_moved(1, 52.0, 13.0)
+    assert index.seller_moved(1, 48.0, 2.0)
+    assert index.seller_moved(1, None, None)
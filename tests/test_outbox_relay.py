@@ -0,0 +1,136 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from app.crud.outbox_crud import add_outbox_events, get_outbox_backlog
+from app.models.outbox import OutboxModel
+from app.services.outbox_relay import OutboxRelay, OutboxRelayError, purge_published_outbox_once
+from app.utils.rabbitmq import InMemoryBroker
+
+
+class UnconfirmingBroker(InMemoryBroker):
+    """
+    Leaves the given message positions of its next batch unconfirmed, as the broker does
+    when it nacks or returns individual messages.
+    """
+
+    def __init__(self, unconfirmed):
+        super().__init__()
+        self.unconfirmed = set(unconfirmed)
+
+    async def publish_batch(self, messages):
+        failed = [message for position, message in enumerate(messages) if position in self.unconfirmed]
+        self.unconfirmed = set()
+        await super().publish_batch([message for message in messages if message not in failed])
+        return failed
+
+
+def queue_events(db, count):
+    add_outbox_events(db, "seller", "upserted", ({"id": seller_id} for seller_id in range(1, count + 1)))
+    db.commit()
+
+
+def relay_with(broker, **options):
+    relay = OutboxRelay(**{"batch_size": 10, "poll_interval": 0.05, "max_retry_delay": 0.05, "purge_interval": 0, **options})
+    relay._broker = broker
+    return relay
+
+
+def published_ids(broker):
+    return [json.loads(message.body)["data"]["id"] for message in broker.messages]
+
+
+def pending(db):
+    db.expire_all()
+    return get_outbox_backlog(db)["pending"]
+
+
+def test_relay_batch_publishes_and_marks_events_in_outbox_order(db):
+    queue_events(db, 3)
+    broker = InMemoryBroker()
+    relay = relay_with(broker)
+
+    assert asyncio.run(relay.relay_batch()) == 3
+
+    assert published_ids(broker) == [1, 2, 3]
+    assert broker.batches == 1
+    assert pending(db) == 0
+    assert all(row.published_at is not None for row in db.query(OutboxModel))
+    assert asyncio.run(relay.relay_batch()) == 0
+    assert relay.stats()["published"] == 3
+
+
+def test_relay_batch_claims_at_most_the_batch_size(db):
+    queue_events(db, 5)
+    broker = InMemoryBroker()
+    relay = relay_with(broker, batch_size=2)
+
+    assert [asyncio.run(relay.relay_batch()) for _ in range(4)] == [2, 2, 1, 0]
+    assert published_ids(broker) == [1, 2, 3, 4, 5]
+
+
+def test_failed_batch_stays_in_the_outbox_and_is_published_on_retry(db):
+    queue_events(db, 3)
+    broker = InMemoryBroker(fail_batches=1)
+    relay = relay_with(broker)
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(relay.relay_batch())
+    assert broker.messages == []
+    assert pending(db) == 3
+
+    assert asyncio.run(relay.relay_batch()) == 3
+    assert published_ids(broker) == [1, 2, 3]
+    assert pending(db) == 0
+
+
+def test_unconfirmed_events_are_not_marked_published(db):
+    queue_events(db, 4)
+    broker = UnconfirmingBroker(unconfirmed={1, 3})
+    relay = relay_with(broker)
+
+    with pytest.raises(OutboxRelayError, match="2 of 4"):
+        asyncio.run(relay.relay_batch())
+    assert published_ids(broker) == [1, 3]
+    assert pending(db) == 2
+
+    assert asyncio.run(relay.relay_batch()) == 2
+    assert published_ids(broker) == [1, 3, 2, 4]
+    assert pending(db) == 0
+
+
+def test_running_relay_backs_off_on_failures_and_drains_the_outbox(db):
+    broker = InMemoryBroker(fail_batches=2)
+    relay = relay_with(broker)
+
+    async def run():
+        await relay.start(broker)
+        try:
+            # Written after start: the commit wakes the relay
+            await asyncio.to_thread(queue_events, db, 3)
+            deadline = time.monotonic() + 5
+            while broker.batches == 0 and time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+        finally:
+            await relay.stop()
+
+    asyncio.run(run())
+
+    stats = relay.stats()
+    assert (stats["published"], stats["failed_batches"]) == (3, 2)
+    assert stats["last_error"] == "Simulated broker failure"
+    assert not stats["running"]
+    assert pending(db) == 0
+
+
+def test_purge_deletes_only_published_events(db):
+    queue_events(db, 3)
+    relay = relay_with(InMemoryBroker(), batch_size=2)
+    asyncio.run(relay.relay_batch())
+
+    assert purge_published_outbox_once(retention=-1) == 2
+    db.expire_all()
+    assert db.query(OutboxModel).count() == 1
+    assert pending(db) == 1
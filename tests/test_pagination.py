@@ -0,0 +1,62 @@
+import pytest
+from sqlalchemy import text
+
+from app.crud.expiry_crud import live_criteria
+from app.database import engine
+from app.models.b2b_contract import B2BContractModel
+from app.models.collaboration import CollaborationModel
+from app.utils.pagination import seller_scoped_select
+
+
+def query_plan(statement):
+    """
+    SQLite's EXPLAIN QUERY PLAN for a select, one detail string per step.
+    """
+    sql = statement.compile(engine, compile_kwargs={"literal_binds": True})
+    with engine.connect() as connection:
+        return [row[3] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+
+def assert_seeks(plan, table, *indexes):
+    for index in indexes:
+        assert any(step.startswith(f"SEARCH {table} USING INDEX {index} ") for step in plan), plan
+    assert not any(step.startswith(f"SCAN {table}") for step in plan), plan
+
+
+def test_seller_scoped_select_by_type_seeks_both_type_indexes():
+    statement = seller_scoped_select(
+        CollaborationModel, 7, (CollaborationModel.collaboration_type == "B2B",), limit=20, after=100
+    )
+    assert_seeks(
+        query_plan(statement),
+        "collaborations",
+        "ix_collaborations_seller_id_type_id",
+        "ix_collaborations_partner_seller_id_type_id",
+    )
+
+
+def test_seller_scoped_select_by_type_without_limit_seeks_both_type_indexes():
+    statement = seller_scoped_select(CollaborationModel, 7, (CollaborationModel.collaboration_type == "B2C",))
+    assert_seeks(
+        query_plan(statement),
+        "collaborations",
+        "ix_collaborations_seller_id_type_id",
+        "ix_collaborations_partner_seller_id_type_id",
+    )
+
+
+def test_seller_scoped_select_seeks_both_keyset_indexes():
+    plan = query_plan(seller_scoped_select(CollaborationModel, 7, limit=20, after=100))
+    assert_seeks(plan, "collaborations", "ix_collaborations_seller_id_id", "ix_collaborations_partner_seller_id_id")
+
+
+def test_seller_scoped_select_on_contracts_seeks_both_keyset_indexes():
+    plan = query_plan(seller_scoped_select(B2BContractModel, 7, limit=20))
+    assert_seeks(plan, "b2b_contracts", "ix_b2b_contracts_seller_id_id", "ix_b2b_contracts_partner_seller_id_id")
+
+
+@pytest.mark.parametrize("model", [CollaborationModel, B2BContractModel])
+def test_listing_without_expired_rows_seeks_both_keyset_indexes(model):
+    table = model.__tablename__
+    plan = query_plan(seller_scoped_select(model, 7, live_criteria(model, include_expired=False), limit=20, after=100))
+    assert_seeks(plan, table, f"ix_{table}_seller_id_id", f"ix_{table}_partner_seller_id_id")
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.main import app
+from app.utils.collaboration_utils import calculate_proximity_many
+
+DESTINATIONS = ["52.52,13.40", "48.85,2.35", "40.71,-74.00"]
+
+
+@pytest.fixture
+def api():
+    # Without the context manager, so the startup jobs don't run
+    return TestClient(app)
+
+
+def test_single_origin_returns_a_flat_list(api):
+    response = api.post("/calculate-proximity/batch/", json={"origin": "51.50,-0.12", "destinations": DESTINATIONS})
+
+    assert response.status_code == 200
+    assert response.json()["distances"] == pytest.approx(calculate_proximity_many("51.50,-0.12", DESTINATIONS).tolist())
+
+
+def test_matrix_is_streamed_in_blocks_of_rows(api, monkeypatch):
+    origins = [f"{50 + index * 0.1},{10 + index * 0.1}" for index in range(7)]
+    chunks = main.iter_proximity_chunks
+    # Two rows per block, so the rows are joined across blocks
+    monkeypatch.setattr(main, "iter_proximity_chunks", lambda origins, destinations: chunks(origins, destinations, 2 * len(destinations)))
+
+    response = api.post("/calculate-proximity/batch/", json={"origins": origins, "destinations": DESTINATIONS})
+
+    assert response.status_code == 200
+    np.testing.assert_allclose(response.json()["distances"], calculate_proximity_many(origins, DESTINATIONS))
+
+
+def test_invalid_coordinates_are_rejected_before_streaming(api):
+    response = api.post("/calculate-proximity/batch/", json={"origins": ["52.5,13.4", "north"], "destinations": DESTINATIONS})
+
+    assert response.status_code == 400
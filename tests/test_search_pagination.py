@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.crud.collaboration_crud import search_collaborations
+from app.models.collaboration import CollaborationModel
+
+BASE = datetime(2030, 1, 1)
+
+# End dates with NULLs and ties, spread over both seller columns of seller 1, plus rows of
+# other sellers that a seller-scoped search must leave out
+END_DATES = [
+    (1, 2, BASE + timedelta(days=3)),
+    (2, 1, None),
+    (1, 3, BASE + timedelta(days=1)),
+    (3, 1, BASE + timedelta(days=3)),
+    (1, 2, None),
+    (2, 3, BASE + timedelta(days=2)),
+    (1, 3, BASE + timedelta(days=1)),
+    (3, 1, None),
+    (1, 2, BASE + timedelta(days=3)),
+    (3, 2, None),
+    (2, 1, BASE + timedelta(days=2)),
+    (1, 3, BASE + timedelta(days=1)),
+]
+
+
+@pytest.fixture
+def collaborations(db, make_seller):
+    for seller_id in (1, 2, 3):
+        make_seller(seller_id)
+    rows = [
+        CollaborationModel(
+            seller_id=seller_id,
+            partner_seller_id=partner_seller_id,
+            collaboration_type="B2B",
+            agreement_details="Terms",
+            collaboration_end_date=end_date,
+        )
+        for seller_id, partner_seller_id, end_date in END_DATES
+    ]
+    db.add_all(rows)
+    db.commit()
+    return [(row.id, row.seller_id, row.partner_seller_id, row.collaboration_end_date) for row in rows]
+
+
+def expected_order(collaborations, seller_id, descending):
+    """
+    The search's order: end date ascending with NULLs last (descending: NULLs first), ties by id.
+    """
+    rows = [row for row in collaborations if seller_id is None or seller_id in row[1:3]]
+    rows.sort(key=lambda row: (row[3] is None, row[3] or BASE, row[0]), reverse=descending)
+    return [row[0] for row in rows]
+
+
+def paginate(db, seller_id, descending, limit):
+    ids, cursor = [], None
+    while True:
+        page, cursor = search_collaborations(db, seller_id, sort="end_date", descending=descending, limit=limit, cursor=cursor)
+        ids.extend(collaboration.id for collaboration in page)
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.parametrize("descending", [False, True])
+@pytest.mark.parametrize("seller_id", [None, 1])
+@pytest.mark.parametrize("limit", [1, 2, 3, 5])
+def test_end_date_pages_neither_skip_nor_repeat_rows(db, collaborations, seller_id, descending, limit):
+    assert paginate(db, seller_id, descending, limit) == expected_order(collaborations, seller_id, descending)
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_end_date_cursor_survives_the_http_round_trip(client, collaborations, descending):
+    ids, params = [], {"sort": "-end_date" if descending else "end_date", "limit": 2, "seller_id": 1}
+    while True:
+        response = client.get("/collaboration/search", params=params)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        ids.extend(collaboration["id"] for collaboration in page["items"])
+        if page["next_cursor"] is None:
+            break
+        params["cursor"] = page["next_cursor"]
+
+    assert ids == expected_order(collaborations, 1, descending)
@@ -0,0 +1,94 @@
+import json
+
+import pytest
+from sqlalchemy.exc import DataError
+
+from app.crud import seller_crud
+from app.models.seller import SellerModel
+from app.utils import seller_import
+from app.utils.seller_import import import_sellers
+
+
+def ndjson(*records):
+    return [json.dumps(record) + "\n" for record in records]
+
+
+def seller_by_email(db, email):
+    db.expire_all()
+    return db.query(SellerModel).filter(SellerModel.email == email).one()
+
+
+def test_upsert_keeps_columns_missing_from_the_file(db, make_seller):
+    make_seller(1, 52.0, 13.0, seller_rating=4.5, address="Old street 1")
+
+    report = import_sellers(db, ndjson({"name": "Renamed", "email": "seller1@example.com"}), "ndjson")
+
+    assert report["imported"] == 1
+    seller = seller_by_email(db, "seller1@example.com")
+    assert seller.name == "Renamed"
+    assert seller.seller_rating == 4.5
+    assert seller.address == "Old street 1"
+    assert seller.warehouse_location == "52.0,13.0"
+    assert seller.latitude == 52.0
+
+
+def test_upsert_writes_columns_present_in_the_file(db, make_seller):
+    make_seller(1, 52.0, 13.0, seller_rating=4.5)
+
+    import_sellers(db, ndjson({"name": "Seller 1", "email": "seller1@example.com", "warehouse_location": "48.0,2.0", "seller_rating": 3.0}), "ndjson")
+
+    seller = seller_by_email(db, "seller1@example.com")
+    assert seller.seller_rating == 3.0
+    assert (seller.latitude, seller.longitude) == (48.0, 2.0)
+
+
+def test_new_sellers_get_the_table_defaults(db):
+    report = import_sellers(db, ["name,email\n", "New,new@example.com\n"], "csv")
+
+    assert report["imported"] == 1
+    seller = seller_by_email(db, "new@example.com")
+    assert seller.seller_rating == 0.0
+    assert seller.is_active is True
+    assert seller.created_at is not None
+
+
+def test_oversized_fields_are_rejected_by_validation(db):
+    report = import_sellers(
+        db, ndjson({"name": "x" * 256, "email": "long@example.com"}, {"name": "Fine", "email": "fine@example.com"}), "ndjson"
+    )
+
+    assert (report["imported"], report["rejected"]) == (1, 1)
+    assert report["rejections"][0]["row"] == 1
+    assert "name" in report["rejections"][0]["detail"]
+
+
+def test_rows_refused_by_the_database_are_rejected_and_the_rest_imported(db, monkeypatch):
+    upsert_sellers = seller_crud.upsert_sellers
+
+    def refuse_bad_rows(session, sellers):
+        if any(seller.name == "bad" for seller in sellers):
+            session.rollback()
+            raise DataError("INSERT INTO sellers ...", {}, Exception("value too long for type character varying(255)"))
+        return upsert_sellers(session, sellers)
+
+    monkeypatch.setattr(seller_import, "upsert_sellers", refuse_bad_rows)
+    records = [{"name": "bad" if index in (2, 5) else f"Seller {index}", "email": f"s{index}@example.com"} for index in range(1, 8)]
+
+    report = import_sellers(db, ndjson(*records), "ndjson", batch_size=4)
+
+    assert (report["processed"], report["imported"], report["rejected"]) == (7, 5, 2)
+    assert [rejection["row"] for rejection in report["rejections"]] == [2, 5]
+    assert "value too long" in report["rejections"][0]["detail"]
+    assert db.query(SellerModel).count() == 5
+
+
+def test_other_database_errors_abort_the_import(db, monkeypatch):
+    from sqlalchemy.exc import OperationalError
+
+    def lose_connection(session, sellers):
+        raise OperationalError("INSERT INTO sellers ...", {}, Exception("connection lost"))
+
+    monkeypatch.setattr(seller_import, "upsert_sellers", lose_connection)
+
+    with pytest.raises(OperationalError):
+        import_sellers(db, ndjson({"name": "Seller", "email": "s@example.com"}), "ndjson")
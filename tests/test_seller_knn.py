@@ -0,0 +1,40 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from sqlalchemy import update
+
+from app.crud.collaboration_crud import find_nearest_sellers
+from app.models.seller import SellerModel
+from app.utils.knn_index import SellerKNNIndex
+
+
+def nearest_ids(db, seller_id, k=3):
+    return [seller.id for seller in find_nearest_sellers(db, seller_id, k)]
+
+
+def test_nearest_sellers_follow_writes_of_other_processes(db, make_seller):
+    make_seller(1, 52.52, 13.40)
+    make_seller(2, 52.45, 13.50)
+    make_seller(3, 48.85, 2.35)
+    assert nearest_ids(db, 1) == [2, 3]
+
+    # Written behind this process's index, as another worker or the import CLI would
+    make_seller(4, 52.53, 13.41)
+    db.execute(update(SellerModel).where(SellerModel.id == 2).values(is_active=False, updated_at=datetime.utcnow()))
+    db.commit()
+
+    assert nearest_ids(db, 1) == [4, 3]
+
+
+def test_unchanged_sellers_are_not_reinserted():
+    index = SellerKNNIndex()
+    seller = SimpleNamespace(id=1, latitude=52.0, longitude=13.0, is_active=True, preferred_collaboration_types="B2B")
+    index.load([seller])
+
+    index.upsert(seller)
+    index.upsert(SimpleNamespace(id=2, latitude=None, longitude=None, is_active=True, preferred_collaboration_types=None))
+
+    assert len(index._points) == 1
+    index.upsert(SimpleNamespace(**{**vars(seller), "is_active": False}))
+    assert len(index._points) == 2
+    assert index.nearest(52.0, 13.0, 1) == []
@@ -0,0 +1,145 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from app.crud import collaboration_crud
+from app.crud.expiry_crud import COLLABORATION, expire_rows
+from app.crud.seller_stats_crud import (
+    COUNTER_COLUMNS,
+    collaboration_stats_delta,
+    compute_seller_stats,
+    get_seller_stats,
+    reconcile_seller_stats,
+)
+from app.models.collaboration import CollaborationModel
+from app.models.seller_stats import SellerStatsModel
+from app.schemas.collaboration_schemas import CollaborationCreate, CollaborationUpdate
+
+
+@pytest.fixture
+def sellers(make_seller):
+    make_seller(1)
+    make_seller(2)
+
+
+def create(db, **fields):
+    fields = {"seller_id": 1, "partner_seller_id": 2, "collaboration_type": "B2B", "agreement_details": "Terms", **fields}
+    collaboration = CollaborationCreate(**fields)
+    return collaboration_crud.create_collaboration(db, collaboration)
+
+
+def let_end_date_pass(db, collaboration_id):
+    """
+    Move a collaboration's end date into the past behind the service's back, as the clock would.
+    """
+    db.execute(
+        update(CollaborationModel)
+        .where(CollaborationModel.id == collaboration_id)
+        .values(collaboration_end_date=datetime.utcnow() - timedelta(minutes=1))
+    )
+    db.commit()
+
+
+def counts(db, seller_id):
+    db.expire_all()
+    stats = get_seller_stats(db, seller_id)
+    return stats["active_collaboration_count"], stats["expired_collaboration_count"]
+
+
+def stored_counters(db):
+    db.expire_all()
+    return {row.seller_id: {column: getattr(row, column) for column in COUNTER_COLUMNS} for row in db.query(SellerStatsModel)}
+
+
+def test_removal_delta_follows_the_expired_at_flag(db, sellers):
+    collaboration = create(db, collaboration_end_date=datetime.utcnow() + timedelta(hours=1))
+    let_end_date_pass(db, collaboration.id)
+    db.refresh(collaboration)
+
+    delta = collaboration_stats_delta(collaboration, sign=-1)
+
+    # Written while active and not flagged yet, so it leaves the active counter
+    assert delta[1]["active_collaboration_count"] == -1
+    assert delta[1]["expired_collaboration_count"] == 0
+
+    collaboration.expired_at = collaboration.collaboration_end_date
+    delta = collaboration_stats_delta(collaboration, sign=-1)
+    assert delta[1]["active_collaboration_count"] == 0
+    assert delta[1]["expired_collaboration_count"] == -1
+
+
+def test_deleting_a_row_whose_end_date_passed_unflagged_leaves_no_negative_counters(db, sellers):
+    collaboration = create(db, collaboration_end_date=datetime.utcnow() + timedelta(hours=1))
+    assert counts(db, 1) == (1, 0)
+    let_end_date_pass(db, collaboration.id)
+
+    collaboration_crud.delete_collaboration(db, collaboration.id)
+
+    assert counts(db, 1) == (0, 0)
+    assert counts(db, 2) == (0, 0)
+
+
+def test_expiry_then_deletion_moves_and_removes_the_row_once(db, sellers):
+    collaboration = create(db, collaboration_end_date=datetime.utcnow() + timedelta(hours=1))
+    let_end_date_pass(db, collaboration.id)
+
+    assert expire_rows(db, COLLABORATION, [collaboration.id], datetime.utcnow()) == [collaboration.id]
+    assert counts(db, 1) == (0, 1)
+
+    collaboration_crud.delete_collaboration(db, collaboration.id)
+    assert counts(db, 1) == (0, 0)
+
+
+def test_update_of_an_unflagged_passed_row_keeps_counters_consistent(db, sellers):
+    collaboration = create(db, collaboration_end_date=datetime.utcnow() + timedelta(hours=1))
+    let_end_date_pass(db, collaboration.id)
+
+    collaboration_crud.update_collaboration(db, collaboration.id, CollaborationUpdate(agreement_details="New terms"))
+
+    # The update re-derives expired_at from the end date, moving the row to the expired counter
+    assert counts(db, 1) == (0, 1)
+    assert stored_counters(db) == compute_seller_stats(db)
+
+
+def test_incremental_counters_match_a_full_recomputation(db, sellers, make_seller):
+    make_seller(3)
+    now = datetime.utcnow()
+    create(db, revenue_sharing_percentage=10.0)
+    create(db, collaboration_type="B2C", collaboration_end_date=now - timedelta(days=1))
+    create(db, collaboration_start_date=now + timedelta(days=1))
+    passed = create(db, collaboration_end_date=now + timedelta(hours=1))
+    let_end_date_pass(db, passed.id)
+    expire_rows(db, COLLABORATION, [passed.id], datetime.utcnow())
+    removed = create(db, revenue_sharing_percentage=20.0)
+    collaboration_crud.delete_collaboration(db, removed.id)
+
+    assert stored_counters(db) == compute_seller_stats(db)
+    assert reconcile_seller_stats(db)["corrected"] == 0
+
+
+def test_reconciliation_leaves_unflagged_rows_to_the_expiry_scheduler(db, sellers):
+    collaboration = create(db, collaboration_end_date=datetime.utcnow() + timedelta(hours=1))
+    let_end_date_pass(db, collaboration.id)
+
+    assert reconcile_seller_stats(db)["corrected"] == 0
+    assert counts(db, 1) == (1, 0)
+
+    # The scheduler then moves it exactly once; reconciling again finds nothing to correct
+    expire_rows(db, COLLABORATION, [collaboration.id], datetime.utcnow())
+    assert counts(db, 1) == (0, 1)
+    assert reconcile_seller_stats(db)["corrected"] == 0
+
+
+def test_reconciliation_corrects_drifted_and_removes_stale_rows(db, sellers, make_seller):
+    make_seller(3)
+    create(db, revenue_sharing_percentage=10.0)
+    db.execute(update(SellerStatsModel).where(SellerStatsModel.seller_id == 1).values(collaboration_count=7))
+    db.add(SellerStatsModel(seller_id=3, collaboration_count=2))
+    db.commit()
+
+    result = reconcile_seller_stats(db)
+
+    assert result == {"sellers": 2, "corrected": 1, "removed": 1}
+    assert stored_counters(db) == compute_seller_stats(db)
+    assert get_seller_stats(db, 1)["collaboration_count"] == 1